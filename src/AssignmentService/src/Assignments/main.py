@@ -1,80 +1,306 @@
-from fastapi import APIRouter, Header, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from json_codec import JSONResponse, dumps, MessagePackRoute
 from . import pyd_models
 from db_config import get_db, ObjectId
 from datetime import datetime
+from itertools import islice
+from os import getenv
+from typing import Iterable, Iterator
+import enrollments
+from conditional_get import http_date
+from trusted_serialization import TrustedSerializer
+
+
+# largest page of the assignment lists, which return every assignment when no limit is given
+ASSIGNMENTS_MAX_PAGE_SIZE = int(getenv("ASSIGNMENTS_MAX_PAGE_SIZE", "1000"))
+# assignments of a student read with a single query
+STUDENT_ASSIGNMENTS_BATCH_SIZE = 500
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ID_ORDER = [("_id", 1)]
 
 
 assignments_router = APIRouter(
     prefix="/assignments",
     tags=["Assignments"],
-    responses={404: {"description": "Not found"}}
+    responses={404: {"description": "Not found"}},
+    route_class=MessagePackRoute
 )
 
 
+# assignments read from the database were validated when written
+ASSIGNMENT_SERIALIZER = TrustedSerializer(pyd_models.AssignmentDB)
+
+def serialize_assignment(assignment: dict) -> dict:
+    return ASSIGNMENT_SERIALIZER.dump(
+        assignment, status=pyd_models.submission_status(assignment["submissonDeadline"])
+    )
+
+def check_cursor(after: str | None):
+    if after is not None and not ObjectId.is_valid(after):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid after cursor"
+        )
+
+def keyset_filter(query: dict, after: str | None) -> dict:
+    """
+    Restrict a query to the assignments following the given ID, the cursor of the previous page.
+    """
+    check_cursor(after)
+    if after is not None:
+        query["_id"] = {"$gt": ObjectId(after)}
+    return query
+
+def assignments_response(
+    message: str, assignments: Iterable[dict], accept: str | None, limit: int | None, read_ids: list | None = None
+):
+    """
+    Return the assignments as a JSON list, or as NDJSON streamed while the cursor produces them.
+    The JSON list of a full page carries the ID to pass as after to read the next one.
+    read_ids are the IDs read for the page, when there can be fewer assignments than IDs.
+    """
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return StreamingResponse(
+            (dumps(serialize_assignment(assignment)) + b"\n" for assignment in assignments),
+            media_type=NDJSON_MEDIA_TYPE
+        )
+    assignment_list = [serialize_assignment(assignment) for assignment in assignments]
+    content = {
+        "message": message,
+        "assignments": assignment_list
+    }
+    if limit is not None:
+        page_ids = read_ids if read_ids is not None else [assignment["id"] for assignment in assignment_list]
+        content["nextAfter"] = str(page_ids[-1]) if len(page_ids) == limit else None
+    return JSONResponse(content, status_code=200)
+
 @assignments_router.get("/")
-async def read_assignments():
+async def read_assignments(
+    after: str | None = Query(None, description="Return the assignments whose ID follows this one"),
+    limit: int | None = Query(None, ge=1, le=ASSIGNMENTS_MAX_PAGE_SIZE),
+    accept: str | None = Header(None),
+):
     """
-    Retrieve all the assignments in db
+    Retrieve all the assignments in db, ordered by ID.
     """
     db = get_db()
-    assignments = db.assignments.find()
+    assignments = db.assignments.find(
+        keyset_filter({}, after), ASSIGNMENT_SERIALIZER.projection, sort=ID_ORDER, limit=limit or 0
+    )
+    return assignments_response("List of assignments", assignments, accept, limit)
+    
+@assignments_router.post("/batch")
+async def read_assignments_batch(request: pyd_models.AssignmentBatchRequest):
+    """
+    Retrieve several assignments by ID with a single query, keyed by ID, listing the IDs not found.
+    """
+    db = get_db()
+    assignment_ids = list(dict.fromkeys(request.assignmentIds))
+    object_ids = [ObjectId(assignment_id) for assignment_id in assignment_ids if ObjectId.is_valid(assignment_id)]
+    assignments = {}
+    for assignment in db.assignments.find({"_id": {"$in": object_ids}}, ASSIGNMENT_SERIALIZER.projection):
+        assignment = serialize_assignment(assignment)
+        assignments[assignment["id"]] = assignment
     return JSONResponse({
-        "message": "List of assignments",
-        "assignments": [pyd_models.AssignmentDB(**assignment).model_dump(mode="json") for assignment in assignments]
+        "message": "Assignments retrieved",
+        "assignments": assignments,
+        "missing": [assignment_id for assignment_id in assignment_ids if assignment_id not in assignments]
         }, status_code=200)
-    
+
+def last_modified(assignment: dict) -> datetime:
+    """
+    Return when the representation of a serialized assignment last changed: its last update,
+    or the submission deadline once passed, since the status closes then.
+    """
+    modified = datetime.fromisoformat(assignment["lastModifiedDate"])
+    if assignment["status"] == "Closed Submission":
+        modified = max(modified.astimezone(), datetime.fromisoformat(assignment["submissonDeadline"]).astimezone())
+    return modified
+
 @assignments_router.get("/{assignment_id}")
 async def read_assignment(assignment_id: str):
     """
     Retrieve a specific assignment by its ID.
     """
     db = get_db()
-    assignment = db.assignments.find_one({"_id": ObjectId(assignment_id)})
+    assignment = db.assignments.find_one({"_id": ObjectId(assignment_id)}, ASSIGNMENT_SERIALIZER.projection)
     if not assignment:
         raise HTTPException(
             status_code=404,
             detail="Assignment not found"
         )
-    assignment["_id"] = str(assignment["_id"])
+    assignment = serialize_assignment(assignment)
     return JSONResponse({
         "message": "Assignment retrieved",
-        "assignment": pyd_models.AssignmentDB(**assignment).model_dump(mode="json")
-        }, status_code=200)
+        "assignment": assignment
+        }, status_code=200, headers={"Last-Modified": http_date(last_modified(assignment))})
 
 @assignments_router.get("/teacher/{teacher_id}")
-async def read_assignments_by_teacher(teacher_id: str):
+async def read_assignments_by_teacher(
+    teacher_id: str,
+    after: str | None = Query(None, description="Return the assignments whose ID follows this one"),
+    limit: int | None = Query(None, ge=1, le=ASSIGNMENTS_MAX_PAGE_SIZE),
+    accept: str | None = Header(None),
+):
     """
-    Retrieve all assignments created by a specific teacher.
+    Retrieve all assignments created by a specific teacher, ordered by ID.
     """
     db = get_db()
-    assignments = list(db.assignments.find({"teacherId": teacher_id}))
+    assignments = db.assignments.find(
+        keyset_filter({"teacherId": teacher_id}, after), ASSIGNMENT_SERIALIZER.projection,
+        sort=ID_ORDER, limit=limit or 0
+    )
+    return assignments_response("List of assignments by teacher", assignments, accept, limit)
 
-    assignment_list = []
-    for assignment in assignments:
-        assignment["_id"] = str(assignment["_id"])
-        assignment_list.append(pyd_models.AssignmentDB(**assignment).model_dump(mode="json"))
+def iter_student_assignments(db, assignment_ids: Iterable[ObjectId]) -> Iterator[dict]:
+    """
+    Yield the assignments of a student ordered by ID, reading them in batches of enrollments.
+    """
+    assignment_ids = iter(assignment_ids)
+    while batch := list(islice(assignment_ids, STUDENT_ASSIGNMENTS_BATCH_SIZE)):
+        yield from db.assignments.find({"_id": {"$in": batch}}, ASSIGNMENT_SERIALIZER.projection, sort=ID_ORDER)
 
-    return JSONResponse({
-        "message": "List of assignments by teacher",
-        "assignments": assignment_list
-    }, status_code=200)
-    
 @assignments_router.get("/student/{student_id}")
-async def read_assignments_by_student(student_id: str):
+async def read_assignments_by_student(
+    student_id: str,
+    after: str | None = Query(None, description="Return the assignments whose ID follows this one"),
+    limit: int | None = Query(None, ge=1, le=ASSIGNMENTS_MAX_PAGE_SIZE),
+    accept: str | None = Header(None),
+):
     """
-    Retrieve all assignments involving a specific student.
+    Retrieve all assignments involving a specific student, ordered by ID.
     """
+    check_cursor(after)
     db = get_db()
-    assignments = db.assignments.find({"involvedStudentIds": {"$in": [student_id]}})
-    assignments_list = []
-    for assignment in assignments:
-        assignment["_id"] = str(assignment["_id"])
-        assignments_list.append(pyd_models.AssignmentDB(**assignment).model_dump(mode="json"))
-    
+    assignment_ids = enrollments.iter_assignment_ids_of_student(db, student_id, after, limit)
+    if limit is not None:
+        # the cursor follows the enrollments read, an enrollment of a deleted assignment must not end the paging
+        assignment_ids = list(assignment_ids)
+    assignments = iter_student_assignments(db, assignment_ids)
+    return assignments_response(
+        "List of assignments by student", assignments, accept, limit,
+        read_ids=assignment_ids if limit is not None else None
+    )
+
+@assignments_router.get("/{assignment_id}/students/{student_id}")
+async def read_assignment_membership(assignment_id: str, student_id: str):
+    """
+    Check that a student is involved in an assignment and return its submission deadline.
+    Two lookups by key, reading only the enrollment and the deadline instead of the whole assignment.
+    """
+    db = get_db()
+    assignment = None
+    if enrollments.is_enrolled(db, assignment_id, student_id):
+        assignment = db.assignments.find_one({"_id": ObjectId(assignment_id)}, {"_id": 1, "submissonDeadline": 1})
+    if not assignment:
+        raise HTTPException(
+            status_code=404,
+            detail="Student not involved in the assignment"
+        )
+    return JSONResponse({
+        "message": "Student involved in the assignment",
+        "membership": pyd_models.AssignmentMembership(
+            assignmentId=str(assignment["_id"]),
+            studentId=student_id,
+            submissonDeadline=assignment["submissonDeadline"],
+        ).model_dump(mode="json")
+        }, status_code=200)
+
+def check_assignment_exists(db, assignment_id: str):
+    if not db.assignments.find_one({"_id": ObjectId(assignment_id)}, {"_id": 1}):
+        raise HTTPException(
+            status_code=404,
+            detail="Assignment not found"
+        )
+
+def touch_assignment(db, assignment_id: str):
+    db.assignments.update_one(
+        {"_id": ObjectId(assignment_id)}, {"$set": {"lastModifiedDate": datetime.now().isoformat()}}
+    )
+
+@assignments_router.get("/{assignment_id}/students")
+async def read_assignment_roster(
+    assignment_id: str,
+    after: str | None = Query(None, description="Return the students whose ID follows this one"),
+    limit: int = Query(enrollments.ROSTER_PAGE_SIZE, ge=1, le=enrollments.ROSTER_MAX_PAGE_SIZE),
+):
+    """
+    Retrieve a page of the students involved in an assignment, ordered by ID.
+    """
+    db = get_db()
+    check_assignment_exists(db, assignment_id)
+    student_ids = enrollments.read_roster_page(db, assignment_id, after, limit)
+    return JSONResponse({
+        "message": "Students of the assignment",
+        "roster": pyd_models.RosterPage(
+            assignmentId=assignment_id,
+            studentIds=student_ids,
+            nextAfter=student_ids[-1] if len(student_ids) == limit else None,
+        ).model_dump(mode="json")
+        }, status_code=200)
+
+@assignments_router.post("/{assignment_id}/students")
+async def enroll_students(assignment_id: str, request: pyd_models.EnrollmentRequest):
+    """
+    Enroll students in an assignment. Students already enrolled are skipped.
+    """
+    db = get_db()
+    check_assignment_exists(db, assignment_id)
+    enrolled = enrollments.enroll_students(db, assignment_id, request.studentIds)
+    if enrolled:
+        touch_assignment(db, assignment_id)
+    return JSONResponse({
+        "message": "Students enrolled",
+        "enrolled": enrolled
+        }, status_code=200)
+
+@assignments_router.post("/{assignment_id}/students/remove")
+async def unenroll_students(assignment_id: str, request: pyd_models.EnrollmentRequest):
+    """
+    Remove students from an assignment. Students not enrolled are skipped.
+    """
+    db = get_db()
+    check_assignment_exists(db, assignment_id)
+    removed = enrollments.unenroll_students(db, assignment_id, request.studentIds)
+    if removed:
+        touch_assignment(db, assignment_id)
+    return JSONResponse({
+        "message": "Students removed",
+        "removed": removed
+        }, status_code=200)
+
+@assignments_router.post("/{assignment_id}/students/csv")
+async def update_students_from_csv(
+    assignment_id: str,
+    request: Request,
+    action: str = Query("add", pattern="^(add|remove)$", description="Whether to enroll or remove the students"),
+):
+    """
+    Enroll or remove the students listed in a CSV body, with one student ID per row.
+    The body is parsed while it is received and applied in batches, so the roster change is never held in memory.
+    """
+    db = get_db()
+    check_assignment_exists(db, assignment_id)
+    apply_batch = enrollments.enroll_students if action == "add" else enrollments.unenroll_students
+    processed = 0
+    changed = 0
+    batch = []
+    async for student_id in enrollments.iter_csv_student_ids(request.stream()):
+        batch.append(student_id)
+        if len(batch) == enrollments.ENROLLMENT_BATCH_SIZE:
+            changed += apply_batch(db, assignment_id, batch)
+            processed += len(batch)
+            batch = []
+    if batch:
+        changed += apply_batch(db, assignment_id, batch)
+        processed += len(batch)
+    if changed:
+        touch_assignment(db, assignment_id)
     return JSONResponse({
-        "message": "List of assignments by student",
-        "assignments": assignments_list
+        "message": "Students enrolled" if action == "add" else "Students removed",
+        "processed": processed,
+        "enrolled" if action == "add" else "removed": changed
         }, status_code=200)
 
 @assignments_router.post("/")
@@ -86,6 +312,9 @@ async def create_assignment(
     """
     db = get_db()
     assignment = assignment.model_dump(mode="json")
+    # the roster is stored as separate enrollments, so the assignment stays small for any class size
+    student_ids = assignment.pop("involvedStudentIds")
+    assignment["studentCount"] = 0
     assignment["createdDate"] = datetime.now().isoformat()
     assignment["lastModifiedDate"] = datetime.now().isoformat()
     
@@ -97,6 +326,7 @@ async def create_assignment(
         )
     assignment_id = str(insert_result.inserted_id)
     del assignment["_id"]
+    assignment["studentCount"] = enrollments.enroll_students(db, assignment_id, student_ids)
     assignment = pyd_models.AssignmentDB(
         **assignment,
         _id=assignment_id,
@@ -126,6 +356,9 @@ async def update_assignment(assignment_id: str, updates: pyd_models.AssignmentUp
     # Prepare the update data
     update_data = updates.model_dump(exclude_unset=True, mode="json")
     update_data["lastModifiedDate"] = datetime.now().isoformat()
+    student_ids = update_data.pop("involvedStudentIds", None)
+    if student_ids is not None:
+        enrollments.replace_roster(db, assignment_id, student_ids)
 
     # Perform the update
     update_result = assignment_collection.update_one(
@@ -1,20 +1,34 @@
 from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
+from os import getenv
 from db_config import ObjectId
 
+
+# IDs accepted by a batch lookup
+MAX_BATCH_IDS = int(getenv("MAX_BATCH_IDS", "500"))
+
+def submission_status(submission_deadline) -> str:
+    """
+    Return whether submissions are still accepted before the given deadline.
+    """
+    if isinstance(submission_deadline, str):
+        submission_deadline = datetime.fromisoformat(submission_deadline)
+    now = datetime.now(submission_deadline.tzinfo) if submission_deadline.tzinfo else datetime.now()
+    return "Open Submission" if now < submission_deadline else "Closed Submission"
+
+
 class BaseAssignment(BaseModel):
     name: str = Field(..., description="Name of the assignment")
     description: str = Field(..., description="Description of the assignment")
     submissonDeadline: datetime = Field(..., description="Submission deadline for the assignment in ISO format")
     teacherId: str = Field(..., description="ID of the teacher who created the assignment")
-    involvedStudentIds: list[str] = Field(..., description="List of student IDs involved in the assignment")
     
 
 class AssignmentCreate(BaseAssignment):
     """
     Represents the fields required to create a new assignment.
     """
-    pass
+    involvedStudentIds: list[str] = Field(..., description="List of student IDs involved in the assignment")
     
     
 class AssignmentUpdate(BaseModel):
@@ -27,7 +41,7 @@ class AssignmentUpdate(BaseModel):
     lastModifiedDate: datetime | None = Field(None, description="Last modified date for the assignment in ISO format")
     createdDate: datetime | None = Field(None, description="Creation date for the assignment in ISO format")
     teacherId: str | None = Field(None, description="ID of the teacher who created the assignment")
-    involvedStudentIds: list[str] | None = Field(None, description="List of student IDs involved in the assignment")
+    involvedStudentIds: list[str] | None = Field(None, description="List of student IDs involved in the assignment, replacing the current ones")
 
 
 class AssignmentDB(BaseAssignment):
@@ -37,17 +51,52 @@ class AssignmentDB(BaseAssignment):
     id: str = Field(..., description="Unique identifier for the assignment", alias="_id")
     lastModifiedDate: datetime = Field(..., description="Last modified date for the assignment in ISO format")
     createdDate: datetime = Field(..., description="Creation date for the assignment in ISO format")
+    studentCount: int = Field(0, description="Number of students involved in the assignment")
+    status: str = Field(None, description="Status of the assignment")
+
+    @model_validator(mode='before')
+    def set_status(cls, values):
+        submission_deadline = values.get('submissonDeadline')
+        if submission_deadline:
+            values['status'] = submission_status(submission_deadline)
+        return values
+
+
+class AssignmentBatchRequest(BaseModel):
+    """
+    Represents the IDs of the assignments to retrieve at once.
+    """
+    assignmentIds: list[str] = Field(..., min_length=1, max_length=MAX_BATCH_IDS, description="List of assignment IDs")
+
+
+class EnrollmentRequest(BaseModel):
+    """
+    Represents the students to enroll in or unenroll from an assignment.
+    """
+    studentIds: list[str] = Field(..., min_length=1, description="List of student IDs")
+
+
+class RosterPage(BaseModel):
+    """
+    Represents a page of the students involved in an assignment, ordered by ID.
+    """
+    assignmentId: str = Field(..., description="ID of the assignment")
+    studentIds: list[str] = Field(..., description="IDs of the students in the page")
+    nextAfter: str | None = Field(None, description="Value of the after parameter for the next page, null on the last page")
+
+
+class AssignmentMembership(BaseModel):
+    """
+    Represents the enrollment of a student in an assignment, without the rest of the assignment.
+    """
+    assignmentId: str = Field(..., description="ID of the assignment")
+    studentId: str = Field(..., description="ID of the enrolled student")
+    submissonDeadline: datetime = Field(..., description="Submission deadline for the assignment in ISO format")
     status: str = Field(None, description="Status of the assignment")
 
     @model_validator(mode='before')
     def set_status(cls, values):
         submission_deadline = values.get('submissonDeadline')
         if submission_deadline:
-            if isinstance(submission_deadline, str):
-                submission_deadline = datetime.fromisoformat(submission_deadline)
-            now = datetime.now(submission_deadline.tzinfo) if submission_deadline.tzinfo else datetime.now()
-            if now < submission_deadline:
-                values['status'] = "Open Submission"
-            else:
-                values['status'] = "Closed Submission"
+            values['status'] = submission_status(submission_deadline)
         return values
\ No newline at end of file
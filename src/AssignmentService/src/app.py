@@ -6,13 +6,46 @@ except Exception as e:
     print(f"Error loading .env file: {e}")
 
 from fastapi import FastAPI
+from json_codec import JSONResponse, MessagePackMiddleware
 from fastapi.middleware.cors import CORSMiddleware
+from conditional_get import ConditionalGetMiddleware
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
 
 from Assignments import assignments_router
+from db_config import get_db, ensure_assignment_indexes
+from enrollments import ensure_enrollment_indexes, migrate_embedded_enrollments
 
-app = FastAPI()
+
+def prepare_collections():
+    db = get_db()
+    ensure_assignment_indexes(db)
+    ensure_enrollment_indexes(db)
+    migrate_embedded_enrollments(db)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan context manager to initialize resources.
+    """
+    # Create the indexes and move the rosters still embedded in the assignments to the enrollments
+    try:
+        await run_in_threadpool(prepare_collections)
+    except Exception as e:
+        print(f"Error preparing the assignments and enrollments collections: {e}")
+    yield
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=JSONResponse)
 app.include_router(assignments_router)
 
+# ETags and 304 responses for the read endpoints
+app.add_middleware(ConditionalGetMiddleware)
+
+# MessagePack for the internal calls of the orchestrator
+app.add_middleware(MessagePackMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  
@@ -1,5 +1,5 @@
 from os import getenv
-from pymongo import MongoClient
+from pymongo import ASCENDING, MongoClient
 from bson import ObjectId
 
 if getenv("MONGO_URI") is None:
@@ -14,4 +14,11 @@ def get_db():
     db = client.get_default_database()
     if db is None:
         raise ValueError("Failed to connect to the database. Please check your MONGO_URI.")
-    return db
\ No newline at end of file
+    return db
+
+
+def ensure_assignment_indexes(db):
+    """
+    Create the index used to page through the assignments of a teacher in ID order.
+    """
+    db.assignments.create_index([("teacherId", ASCENDING), ("_id", ASCENDING)])
\ No newline at end of file
@@ -0,0 +1,171 @@
+import codecs
+import csv
+from datetime import datetime
+from os import getenv
+from typing import AsyncIterator, Iterable, Iterator, Optional
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+from db_config import ObjectId
+
+
+# enrollments written or removed with a single bulk operation
+ENROLLMENT_BATCH_SIZE = int(getenv("ENROLLMENT_BATCH_SIZE", "1000"))
+# students returned per page of a roster
+ROSTER_PAGE_SIZE = int(getenv("ROSTER_PAGE_SIZE", "500"))
+ROSTER_MAX_PAGE_SIZE = int(getenv("ROSTER_MAX_PAGE_SIZE", "5000"))
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+def ensure_enrollment_indexes(db):
+    """
+    Create the indexes of the enrollments collection: one enrollment per student and assignment,
+    ordered by student to page through the rosters, and one by student to list their assignments.
+    """
+    db.enrollments.create_index([("assignmentId", ASCENDING), ("studentId", ASCENDING)], unique=True)
+    db.enrollments.create_index([("studentId", ASCENDING), ("assignmentId", ASCENDING)])
+
+
+def _batches(student_ids: list[str]):
+    for start in range(0, len(student_ids), ENROLLMENT_BATCH_SIZE):
+        yield student_ids[start:start + ENROLLMENT_BATCH_SIZE]
+
+
+def _update_student_count(db, assignment_id: str, delta: int):
+    if delta:
+        db.assignments.update_one({"_id": ObjectId(assignment_id)}, {"$inc": {"studentCount": delta}})
+
+
+def enroll_students(db, assignment_id: str, student_ids: Iterable[str]) -> int:
+    """
+    Enroll the students in the assignment, skipping the ones already enrolled.
+    Return the number of new enrollments, which is added to the student count of the assignment.
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    enrolled_date = datetime.now().isoformat()
+    enrolled = 0
+    for batch in _batches(student_ids):
+        operations = [
+            UpdateOne(
+                {"assignmentId": assignment_id, "studentId": student_id},
+                {"$setOnInsert": {"enrolledDate": enrolled_date}},
+                upsert=True
+            )
+            for student_id in batch
+        ]
+        try:
+            enrolled += db.enrollments.bulk_write(operations, ordered=False).upserted_count
+        except BulkWriteError as e:
+            # a concurrent request enrolled the same student first
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details["writeErrors"]):
+                raise
+            enrolled += e.details["nUpserted"]
+    _update_student_count(db, assignment_id, enrolled)
+    return enrolled
+
+
+def unenroll_students(db, assignment_id: str, student_ids: Iterable[str]) -> int:
+    """
+    Remove the enrollments of the students from the assignment.
+    Return the number of removed enrollments, which is subtracted from the student count of the assignment.
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    removed = 0
+    for batch in _batches(student_ids):
+        removed += db.enrollments.delete_many(
+            {"assignmentId": assignment_id, "studentId": {"$in": batch}}
+        ).deleted_count
+    _update_student_count(db, assignment_id, -removed)
+    return removed
+
+
+def replace_roster(db, assignment_id: str, student_ids: Iterable[str]):
+    """
+    Make the given students the roster of the assignment, writing only the enrollments that change.
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    removed = db.enrollments.delete_many(
+        {"assignmentId": assignment_id, "studentId": {"$nin": student_ids}}
+    ).deleted_count
+    _update_student_count(db, assignment_id, -removed)
+    enroll_students(db, assignment_id, student_ids)
+
+
+def read_roster_page(db, assignment_id: str, after: Optional[str] = None, limit: int = ROSTER_PAGE_SIZE) -> list[str]:
+    """
+    Return the IDs of the students enrolled in the assignment, in order, starting after the given student ID.
+    """
+    query = {"assignmentId": assignment_id}
+    if after is not None:
+        query["studentId"] = {"$gt": after}
+    enrollments = db.enrollments.find(query, {"_id": 0, "studentId": 1}).sort("studentId", ASCENDING).limit(limit)
+    return [enrollment["studentId"] for enrollment in enrollments]
+
+
+def is_enrolled(db, assignment_id: str, student_id: str) -> bool:
+    return db.enrollments.find_one({"assignmentId": assignment_id, "studentId": student_id}, {"_id": 1}) is not None
+
+
+def iter_assignment_ids_of_student(
+    db, student_id: str, after: Optional[str] = None, limit: Optional[int] = None
+) -> Iterator[ObjectId]:
+    """
+    Yield the IDs of the assignments the student is enrolled in, in order, starting after the given assignment ID.
+    """
+    query = {"studentId": student_id}
+    if after is not None:
+        query["assignmentId"] = {"$gt": after}
+    enrollments = db.enrollments.find(
+        query, {"_id": 0, "assignmentId": 1}, sort=[("assignmentId", ASCENDING)], limit=limit or 0
+    )
+    for enrollment in enrollments:
+        yield ObjectId(enrollment["assignmentId"])
+
+
+async def iter_csv_student_ids(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Parse the student IDs of a CSV file while it is received, one ID in the first column of each row.
+    Empty rows and a "studentId" header are skipped.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    first_row = True
+
+    def rows(lines: list[str]):
+        nonlocal first_row
+        for row in csv.reader(lines):
+            student_id = row[0].strip() if row else ""
+            if first_row and student_id.lower() == "studentid":
+                student_id = ""
+            first_row = False
+            if student_id:
+                yield student_id
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        lines = pending.splitlines(keepends=True)
+        # the last line can continue in the next chunk
+        pending = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        for student_id in rows(lines):
+            yield student_id
+    pending += decoder.decode(b"", final=True)
+    for student_id in rows(pending.splitlines()):
+        yield student_id
+
+
+def migrate_embedded_enrollments(db):
+    """
+    Move the rosters still stored as involvedStudentIds in the assignment documents to the enrollments collection.
+    Enrollments already moved are skipped, so an interrupted migration can be run again.
+    """
+    migrated = 0
+    for assignment in db.assignments.find({"involvedStudentIds": {"$exists": True}}, {"involvedStudentIds": 1}):
+        assignment_id = str(assignment["_id"])
+        enroll_students(db, assignment_id, assignment["involvedStudentIds"])
+        db.assignments.update_one(
+            {"_id": assignment["_id"]},
+            [{"$set": {"studentCount": {"$ifNull": ["$studentCount", 0]}}}, {"$unset": "involvedStudentIds"}]
+        )
+        migrated += 1
+    if migrated:
+        print(f"Moved the rosters of {migrated} assignments to the enrollments collection")
@@ -0,0 +1,142 @@
+"""
+Codecs of the service bodies. Every service is built from its own src/ directory, so each one ships
+an identical copy of this module: change them together.
+"""
+from contextvars import ContextVar
+from datetime import datetime
+import msgpack
+import orjson
+from bson import ObjectId
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse as StarletteJSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# set for the requests accepting MessagePack, the internal calls of the orchestrator
+_msgpack_accepted: ContextVar[bool] = ContextVar("msgpack_accepted", default=False)
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _msgpack_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        # same representation as in JSON
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not MessagePack serializable")
+
+
+def dumps(content) -> bytes:
+    """
+    Encode content as compact UTF-8 JSON with orjson. Datetimes become ISO strings and ObjectIds strings.
+    """
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def loads(data):
+    """
+    Decode a JSON document given as bytes or str with orjson.
+    """
+    return orjson.loads(data)
+
+
+def packb(content) -> bytes:
+    """
+    Encode content as MessagePack, with datetimes and ObjectIds as strings like in JSON.
+    """
+    return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+def unpackb(data: bytes):
+    """
+    Decode a MessagePack document.
+    """
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+class JSONResponse(StarletteJSONResponse):
+    """
+    JSON response rendered with orjson instead of json.dumps, the default response class of the service.
+    It is rendered as MessagePack instead when the request accepts it.
+    """
+
+    def render(self, content) -> bytes:
+        if _msgpack_accepted.get():
+            self.media_type = MSGPACK_MEDIA_TYPE
+            return packb(content)
+        return dumps(content)
+
+
+class MessagePackRequest(Request):
+    """
+    Request with a MessagePack body, decoded in one pass into the object given to the route.
+    """
+
+    def __init__(self, scope: Scope, receive: Receive):
+        # FastAPI only gives the bodies of JSON requests to json()
+        scope = dict(scope)
+        MutableHeaders(scope=scope)["content-type"] = "application/json"
+        super().__init__(scope, receive)
+
+    async def json(self):
+        if not hasattr(self, "_json"):
+            try:
+                self._json = unpackb(await self.body())
+            except (ValueError, TypeError, msgpack.UnpackException):
+                raise HTTPException(status_code=400, detail="Invalid MessagePack body")
+        return self._json
+
+
+class MessagePackRoute(APIRoute):
+    """
+    Route class of the routers of the service, accepting MessagePack request bodies besides JSON.
+    """
+
+    def get_route_handler(self):
+        route_handler = super().get_route_handler()
+
+        async def handler(request: Request) -> Response:
+            if request.headers.get("content-type", "").split(";")[0].strip() == MSGPACK_MEDIA_TYPE:
+                request = MessagePackRequest(request.scope, request.receive)
+            return await route_handler(request)
+
+        return handler
+
+
+class MessagePackMiddleware:
+    """
+    Content negotiation of MessagePack, the wire format of the calls between the orchestrator and the service:
+    the JSONResponses are rendered as MessagePack for the requests with Accept: application/msgpack.
+    The MessagePack request bodies are decoded by the MessagePackRoute of the routers.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+
+        async def send_with_vary(message: Message):
+            if message["type"] == "http.response.start":
+                # caches must not give a MessagePack body to a JSON client
+                MutableHeaders(scope=message).add_vary_header("Accept")
+            await send(message)
+
+        token = _msgpack_accepted.set(MSGPACK_MEDIA_TYPE in request_headers.get("accept", ""))
+        try:
+            await self.app(scope, receive, send_with_vary)
+        finally:
+            _msgpack_accepted.reset(token)
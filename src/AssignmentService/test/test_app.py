@@ -1,6 +1,7 @@
 """
 Integration tests for the main app endpoints.
 """
+import json
 import pytest
 from datetime import datetime, timedelta
 from unittest.mock import Mock, patch
@@ -10,6 +11,7 @@ import sys
 sys.path.append('/app/src')
 
 from app import app  # Import your FastAPI app
+from Assignments import pyd_models as pyd_models_module
 from fastapi.testclient import TestClient
 from bson import ObjectId
 
@@ -148,6 +150,7 @@ def test_read_assignments_by_student_success(mock_get_db):
     mock_get_db.return_value = mock_db
     mock_db.assignments.find.return_value = [valid_assignment_db_data]
     
+    mock_db.enrollments.find.return_value = [{"assignmentId": str(valid_assignment_db_data["_id"])}]
     response = client.get(f"/assignments/student/{student_id}")
     
     assert response.status_code == 200
@@ -166,6 +169,7 @@ def test_read_assignments_by_student_empty(mock_get_db):
     mock_get_db.return_value = mock_db
     mock_db.assignments.find.return_value = []
     
+    mock_db.enrollments.find.return_value = []
     response = client.get(f"/assignments/student/{student_id}")
     
     assert response.status_code == 200
@@ -309,6 +313,7 @@ def test_read_assignments_by_student_with_multiple_assignments(mock_get_db):
     
     mock_db.assignments.find.return_value = [assignment1, assignment2]
     
+    mock_db.enrollments.find.return_value = [{"assignmentId": str(valid_assignment_db_data["_id"])}]
     response = client.get(f"/assignments/student/{student_id}")
     
     assert response.status_code == 200
@@ -341,4 +346,268 @@ def test_update_assignment_partial_update(mock_get_db):
     
     assert response.status_code == 200
     data = response.json()
-    assert data["message"] == "Assignment updated successfully"
\ No newline at end of file
+    assert data["message"] == "Assignment updated successfully"
+
+@patch('Assignments.main.get_db')
+def test_read_assignment_membership_success(mock_get_db):
+    # UT-SYS-018
+    """Test the membership check of a student involved in an assignment."""
+    mock_db = Mock()
+    mock_get_db.return_value = mock_db
+    assignment_id = ObjectId()
+    mock_db.assignments.find_one.return_value = {
+        "_id": assignment_id,
+        "submissonDeadline": datetime.now() + timedelta(days=7)
+    }
+
+    response = client.get(f"/assignments/{assignment_id}/students/student1")
+
+    assert response.status_code == 200
+    membership = response.json()["membership"]
+    assert membership["assignmentId"] == str(assignment_id)
+    assert membership["studentId"] == "student1"
+    assert membership["status"] == "Open Submission"
+    mock_db.enrollments.find_one.assert_called_once_with(
+        {"assignmentId": str(assignment_id), "studentId": "student1"}, {"_id": 1}
+    )
+
+@patch('Assignments.main.get_db')
+def test_read_assignment_membership_not_involved(mock_get_db):
+    # UT-SYS-019
+    """Test the membership check of a student not involved in the assignment."""
+    mock_db = Mock()
+    mock_get_db.return_value = mock_db
+    mock_db.enrollments.find_one.return_value = None
+
+    response = client.get(f"/assignments/{ObjectId()}/students/student3")
+
+    assert response.status_code == 404
+
+
+@patch('Assignments.main.get_db')
+def test_read_assignment_roster_pages(mock_get_db):
+    # UT-SYS-020
+    """Test that a full roster page points to the next one, starting after its last student."""
+    mock_db = Mock()
+    mock_get_db.return_value = mock_db
+    assignment_id = str(ObjectId())
+    mock_db.enrollments.find.return_value.sort.return_value.limit.return_value = [
+        {"studentId": "student3"}, {"studentId": "student4"}
+    ]
+
+    response = client.get(f"/assignments/{assignment_id}/students?after=student2&limit=2")
+
+    assert response.status_code == 200
+    roster = response.json()["roster"]
+    assert roster["studentIds"] == ["student3", "student4"]
+    assert roster["nextAfter"] == "student4"
+    query = mock_db.enrollments.find.call_args.args[0]
+    assert query == {"assignmentId": assignment_id, "studentId": {"$gt": "student2"}}
+
+@patch('Assignments.main.get_db')
+def test_enroll_students_counts_new_enrollments(mock_get_db):
+    # UT-SYS-021
+    """Test that enrolling students upserts one enrollment each and counts only the new ones."""
+    mock_db = Mock()
+    mock_get_db.return_value = mock_db
+    assignment_id = ObjectId()
+    mock_db.enrollments.bulk_write.return_value = Mock(upserted_count=2)
+
+    response = client.post(
+        f"/assignments/{assignment_id}/students",
+        json={"studentIds": ["student1", "student3", "student4", "student3"]}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["enrolled"] == 2
+    operations = mock_db.enrollments.bulk_write.call_args.args[0]
+    assert len(operations) == 3
+    mock_db.assignments.update_one.assert_any_call({"_id": assignment_id}, {"$inc": {"studentCount": 2}})
+
+@patch('Assignments.main.get_db')
+def test_update_students_from_csv_in_batches(mock_get_db):
+    # UT-SYS-022
+    """Test that the students of a CSV body are removed in batches, skipping the header and empty rows."""
+    mock_db = Mock()
+    mock_get_db.return_value = mock_db
+    assignment_id = ObjectId()
+    mock_db.enrollments.delete_many.return_value = Mock(deleted_count=2)
+    body = "studentId\r\nstudent1\r\n\r\nstudent2,Ada\r\nstudent3\r\n"
+
+    with patch('enrollments.ENROLLMENT_BATCH_SIZE', 2):
+        response = client.post(f"/assignments/{assignment_id}/students/csv?action=remove", content=body)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["processed"] == 3
+    assert data["removed"] == 4
+    batches = [c.args[0]["studentId"]["$in"] for c in mock_db.enrollments.delete_many.call_args_list]
+    assert batches == [["student1", "student2"], ["student3"]]
+
+@patch('Assignments.main.get_db')
+def test_read_assignments_by_teacher_page(mock_get_db):
+    # UT-SYS-023
+    """Test that a full page of a teacher's assignments starts after the cursor and points to the next page."""
+    mock_db = Mock()
+    mock_get_db.return_value = mock_db
+    after = ObjectId()
+    assignment = valid_assignment_db_data.copy()
+    assignment["_id"] = ObjectId()
+    mock_db.assignments.find.return_value = [assignment]
+
+    response = client.get(f"/assignments/teacher/teacher123?after={after}&limit=1")
+
+    assert response.status_code == 200
+    assert response.json()["nextAfter"] == str(assignment["_id"])
+    query = mock_db.assignments.find.call_args.args[0]
+    assert query == {"teacherId": "teacher123", "_id": {"$gt": after}}
+    assert mock_db.assignments.find.call_args.kwargs["limit"] == 1
+
+@patch('Assignments.main.get_db')
+def test_read_assignments_by_student_ndjson(mock_get_db):
+    # UT-SYS-024
+    """Test that the assignments of a student are streamed one JSON document per line when NDJSON is accepted."""
+    mock_db = Mock()
+    mock_get_db.return_value = mock_db
+    assignment1 = valid_assignment_db_data.copy()
+    assignment2 = valid_assignment_db_data.copy()
+    assignment2["_id"] = ObjectId()
+    mock_db.enrollments.find.return_value = [
+        {"assignmentId": str(assignment1["_id"])}, {"assignmentId": str(assignment2["_id"])}
+    ]
+    mock_db.assignments.find.return_value = [assignment1, assignment2]
+
+    response = client.get("/assignments/student/student1", headers={"Accept": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [str(assignment1["_id"]), str(assignment2["_id"])]
+
+def test_read_assignments_invalid_cursor():
+    # UT-SYS-025
+    """Test that a malformed after cursor is rejected."""
+    response = client.get("/assignments/?after=not-an-id")
+
+    assert response.status_code == 400
+
+@patch('Assignments.main.get_db')
+def test_read_assignment_not_modified(mock_get_db):
+    # UT-SYS-026
+    """Test that an assignment is answered with 304 when the client sends its current ETag."""
+    mock_db = Mock()
+    mock_get_db.return_value = mock_db
+    mock_db.assignments.find_one.side_effect = lambda *args: valid_assignment_db_data.copy()
+    assignment_id = str(valid_assignment_db_data["_id"])
+
+    first = client.get(f"/assignments/{assignment_id}")
+    second = client.get(f"/assignments/{assignment_id}", headers={"If-None-Match": first.headers["etag"]})
+    since = client.get(f"/assignments/{assignment_id}", headers={"If-Modified-Since": first.headers["last-modified"]})
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.content == b""
+    assert since.status_code == 304
+
+@patch('Assignments.main.get_db')
+def test_read_assignments_batch(mock_get_db):
+    # UT-SYS-027
+    """Test that a batch lookup returns the assignments found keyed by ID and lists the missing ones."""
+    mock_db = Mock()
+    mock_get_db.return_value = mock_db
+    found_id = str(valid_assignment_db_data["_id"])
+    missing_id = str(ObjectId())
+    mock_db.assignments.find.return_value = [valid_assignment_db_data.copy()]
+
+    response = client.post("/assignments/batch", json={"assignmentIds": [found_id, missing_id, "not-an-id", found_id]})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert list(data["assignments"]) == [found_id]
+    assert data["missing"] == [missing_id, "not-an-id"]
+    query = mock_db.assignments.find.call_args.args[0]
+    assert query == {"_id": {"$in": [ObjectId(found_id), ObjectId(missing_id)]}}
+
+def test_trusted_serialization_matches_validated_dump():
+    # UT-SYS-028
+    """Test that the trusted serialization of a stored assignment equals its validated dump."""
+    from Assignments.main import serialize_assignment
+    stored = valid_assignment_db_data.copy()
+    stored["submissonDeadline"] = stored["submissonDeadline"].isoformat()
+
+    validated = pyd_models_module.AssignmentDB(**{**stored, "_id": str(stored["_id"])}).model_dump(mode="json")
+
+    assert serialize_assignment(stored) == validated
+
+def test_json_codec_encodes_database_values():
+    # UT-SYS-029
+    """Test that the JSON codec encodes ObjectIds and datetimes and renders the responses compactly."""
+    from bson import ObjectId
+    from json_codec import JSONResponse, dumps, loads
+    content = {"_id": ObjectId("507f1f77bcf86cd799439011"), "submissonDeadline": datetime(2030, 1, 2, 3, 4, 5)}
+
+    assert loads(dumps(content)) == {"_id": "507f1f77bcf86cd799439011", "submissonDeadline": "2030-01-02T03:04:05"}
+    assert JSONResponse({"message": "ok", "ids": [1, 2]}).body == b'{"message":"ok","ids":[1,2]}'
+
+@patch('Assignments.main.get_db')
+def test_read_assignments_batch_msgpack(mock_get_db):
+    # UT-SYS-030
+    """Test that a MessagePack request body is accepted and the response is MessagePack when it is accepted."""
+    from json_codec import MSGPACK_MEDIA_TYPE, packb, unpackb
+    mock_db = Mock()
+    mock_get_db.return_value = mock_db
+    found_id = str(valid_assignment_db_data["_id"])
+    mock_db.assignments.find.return_value = [valid_assignment_db_data.copy()]
+
+    response = client.post(
+        "/assignments/batch",
+        content=packb({"assignmentIds": [found_id]}),
+        headers={"Content-Type": MSGPACK_MEDIA_TYPE, "Accept": MSGPACK_MEDIA_TYPE}
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    assert "Accept" in response.headers["vary"]
+    data = unpackb(response.content)
+    assert list(data["assignments"]) == [found_id]
+    assert client.get("/").headers["content-type"] == "application/json"
+
+@patch('Assignments.main.get_db')
+def test_read_assignments_by_student_page_skips_deleted_assignments(mock_get_db):
+    # UT-SYS-031
+    """Test that the cursor of a student's page follows the enrollments read, even if an assignment was deleted."""
+    mock_db = Mock()
+    mock_get_db.return_value = mock_db
+    assignment = valid_assignment_db_data.copy()
+    deleted_id = ObjectId()
+    mock_db.enrollments.find.return_value = [
+        {"assignmentId": str(assignment["_id"])}, {"assignmentId": str(deleted_id)}
+    ]
+    mock_db.assignments.find.return_value = [assignment]
+
+    response = client.get("/assignments/student/student1?limit=2")
+
+    assert response.status_code == 200
+    assert len(response.json()["assignments"]) == 1
+    assert response.json()["nextAfter"] == str(deleted_id)
+
+@patch('Assignments.main.get_db')
+def test_msgpack_body_is_decoded_once(mock_get_db):
+    # UT-SYS-032
+    """Test that a MessagePack request body is given to the route without going through JSON, and rejected if invalid."""
+    from json_codec import MSGPACK_MEDIA_TYPE, packb
+    mock_db = Mock()
+    mock_get_db.return_value = mock_db
+    mock_db.assignments.find.return_value = []
+
+    with patch('starlette.requests.json.loads', side_effect=AssertionError("decoded as JSON")):
+        response = client.post(
+            "/assignments/batch",
+            content=packb({"assignmentIds": [str(valid_assignment_db_data["_id"])]}),
+            headers={"Content-Type": MSGPACK_MEDIA_TYPE}
+        )
+    assert response.status_code == 200
+
+    response = client.post("/assignments/batch", content=b"\xc1", headers={"Content-Type": MSGPACK_MEDIA_TYPE})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid MessagePack body"}
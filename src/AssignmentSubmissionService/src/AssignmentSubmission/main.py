@@ -1,35 +1,76 @@
-from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import JSONResponse
+import numpy as np
+from os import getenv
+from fastapi import APIRouter, HTTPException, Request, Query
+from json_codec import JSONResponse, MessagePackRoute
+from pymongo import UpdateOne, ReturnDocument
 from db_config import get_db, ObjectId
-from .pyd_models import SubmissionRequest, SubmissionResponse, SubmissionQuery
+import s3_config
+from text_extraction import enqueue_extraction, EXTRACTABLE_FILE_TYPES
+from near_duplicates import minhash_signature, similar_pairs, MINHASH_PERMUTATIONS
+from trusted_serialization import TrustedSerializer
+from .pyd_models import (
+    AttachmentDocument, SubmissionRequest, SubmissionResponse, SubmissionQuery, SubmissionBatchRequest, BlobLookupRequest,
+    UploadSessionCreate, UploadSessionPartUpdate, UploadSessionStatusUpdate, UploadSessionResponse
+)
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+
 
+# prefix of the content-addressed attachments uploaded by the orchestrator, stored by SHA-256
+BLOBS_PREFIX = "blobs/"
+# age under which an unreferenced content-addressed file is kept, far longer than a submit request,
+# so a file uploaded for a submission that is still being saved is never collected
+BLOB_GC_GRACE_HOURS = int(getenv("BLOB_GC_GRACE_HOURS", "24"))
 
 assign_submission_router = APIRouter(
     prefix="/assignments-submissions",
     tags=["assignments-submissions"],
+    route_class=MessagePackRoute
 )
 
+# the stored submissions were validated on upload, they are read back without validating them again
+SUBMISSION_SERIALIZER = TrustedSerializer(SubmissionResponse, nested={"Attachments": TrustedSerializer(AttachmentDocument)})
+
 @assign_submission_router.get("/by-submission-id/{submission_id}", response_model=list[SubmissionResponse])
 def get_submissions(submission_id: str):
     """Endpoint to retrieve all assignment submissions."""
     db = get_db()
     submissions_collection = db["submissions"]
-    submission = submissions_collection.find_one({"_id": ObjectId(submission_id)})
+    submission = submissions_collection.find_one({"_id": ObjectId(submission_id)}, SUBMISSION_SERIALIZER.projection)
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
     
     return JSONResponse(
-        content=SubmissionResponse(
-            _id=str(submission["_id"]),
-            SubmissionTimestamp=submission["SubmissionTimestamp"],
-            Status=submission["Status"],
-            AssignmentID=submission["AssignmentID"],
-            StudentID=submission["StudentID"],
-            TextContent=submission["TextContent"],
-            Attachments=submission["Attachments"],
-        ).model_dump(mode="json"),
+        content=SUBMISSION_SERIALIZER.dump(submission),
+        status_code=200
+    )
+
+
+@assign_submission_router.get("/by-submission-id/{submission_id}/text")
+def get_submission_text(submission_id: str):
+    """Endpoint to retrieve the text extracted from the attachments of a submission."""
+    db = get_db()
+    submissions_collection = db["submissions"]
+    submission = submissions_collection.find_one({"_id": ObjectId(submission_id)}, {"Extraction": 1})
+    if not submission:
+        raise HTTPException(status_code=404, detail="Submission not found")
+
+    extraction = submission.get("Extraction", {"Status": "not_required"})
+    # the texts are kept out of the submission, except in the extractions stored before they were
+    texts = extraction.get("Texts")
+    if texts is None and extraction["Status"] == "completed":
+        texts = [
+            {"FileName": text["FileName"], "Text": text["Text"]}
+            for text in db["attachment_texts"].find(
+                {"SubmissionID": submission_id}, {"FileName": 1, "Text": 1}
+            ).sort("Position", 1)
+        ]
+    return JSONResponse(
+        content={
+            "SubmissionID": submission_id,
+            "Status": extraction["Status"],
+            "Texts": texts or [],
+        },
         status_code=200
     )
 
@@ -41,30 +82,86 @@ def get_submissions_by_assignment(assignment_id: str):
     submissions_collection = db["submissions"]
 
     # Find all submissions for the given AssignmentID
-    submissions = list(submissions_collection.find({"AssignmentID": assignment_id}))
+    submissions = list(submissions_collection.find({"AssignmentID": assignment_id}, SUBMISSION_SERIALIZER.projection))
 
     if not submissions:
         raise HTTPException(status_code=404, detail="No submissions found for this assignment")
 
-    # Prepare the response
-    response = [
-        SubmissionResponse(
-            _id=str(submission["_id"]),
-            SubmissionTimestamp=submission["SubmissionTimestamp"],
-            Status=submission["Status"],
-            AssignmentID=submission["AssignmentID"],
-            StudentID=submission["StudentID"],
-            TextContent=submission["TextContent"],
-            Attachments=submission["Attachments"],
-        ) for submission in submissions
-    ]
-
     return JSONResponse(
-        content=[res.model_dump(mode="json") for res in response],
+        content=[SUBMISSION_SERIALIZER.dump(submission) for submission in submissions],
         status_code=200
     )
     
 
+@assign_submission_router.post("/submissions/batch")
+def get_submissions_batch(batch: SubmissionBatchRequest):
+    """Endpoint to retrieve several submissions with a single query, keyed by ID, listing the IDs not found."""
+    db = get_db()
+    submissions_collection = db["submissions"]
+    submission_ids = list(dict.fromkeys(batch.SubmissionIDs))
+    object_ids = [ObjectId(submission_id) for submission_id in submission_ids if ObjectId.is_valid(submission_id)]
+
+    submissions = {}
+    for submission in submissions_collection.find({"_id": {"$in": object_ids}}, SUBMISSION_SERIALIZER.projection):
+        submission = SUBMISSION_SERIALIZER.dump(submission)
+        submissions[submission["id"]] = submission
+
+    return JSONResponse(
+        content={
+            "Submissions": submissions,
+            "Missing": [submission_id for submission_id in submission_ids if submission_id not in submissions],
+        },
+        status_code=200
+    )
+
+
+@assign_submission_router.get("/submissions/assignment/{assignment_id}/similar")
+def get_similar_submissions(
+    assignment_id: str,
+    threshold: float = Query(0.5, ge=0, le=1, description="Minimum estimated Jaccard similarity of the text contents"),
+    limit: int = Query(100, ge=1, le=10000, description="Maximum number of pairs returned"),
+):
+    """
+    Endpoint to find the pairs of submissions of an assignment with near-duplicate text content,
+    most similar first. Candidate pairs come from the LSH buckets of the stored MinHash signatures.
+    """
+    db = get_db()
+    submissions_collection = db["submissions"]
+
+    submissions = list(submissions_collection.find({"AssignmentID": assignment_id}, {"StudentID": 1, "MinHash": 1}))
+    # submissions saved before the signatures were introduced get theirs now, only their text is read
+    legacy = {submission["_id"]: submission for submission in submissions if "MinHash" not in submission}
+    if legacy:
+        backfill = []
+        for text in submissions_collection.find({"_id": {"$in": list(legacy)}}, {"TextContent": 1}):
+            submission = legacy[text["_id"]]
+            submission["MinHash"] = minhash_signature(text["TextContent"])
+            backfill.append(UpdateOne({"_id": submission["_id"]}, {"$set": {"MinHash": submission["MinHash"]}}))
+        if backfill:
+            submissions_collection.bulk_write(backfill, ordered=False)
+        submissions = [submission for submission in submissions if "MinHash" in submission]
+
+    submissions = [submission for submission in submissions if len(submission["MinHash"]) == MINHASH_PERMUTATIONS]
+    signatures = np.array([submission["MinHash"] for submission in submissions], dtype=np.uint64)
+    pairs = similar_pairs(signatures, threshold)[:limit]
+
+    return JSONResponse(
+        content={
+            "AssignmentID": assignment_id,
+            "Threshold": threshold,
+            "Pairs": [
+                {
+                    "SubmissionIDs": [str(submissions[i]["_id"]), str(submissions[j]["_id"])],
+                    "StudentIDs": [submissions[i]["StudentID"], submissions[j]["StudentID"]],
+                    "Similarity": round(similarity, 4),
+                }
+                for i, j, similarity in pairs
+            ],
+        },
+        status_code=200
+    )
+
+
 @assign_submission_router.post(
     "/", response_model=SubmissionResponse
 )
@@ -90,20 +187,45 @@ async def upload_assignment(submission: SubmissionRequest):
         "AssignmentID": submission.AssignmentID,
         "StudentID": submission.StudentID,
         "Attachments": [
-            {
-                "FileName": attachment.FileName,
-                "FileType": attachment.FileType,
-                "FileReference": attachment.FileReference,
-            }
+            attachment.model_dump(exclude_none=True)
             for attachment in submission.Attachments
         ],
+        # computed once here, so finding similar submissions never re-reads their text
+        "MinHash": minhash_signature(submission.TextContent),
     }
+    extract_text = any(attachment.FileType in EXTRACTABLE_FILE_TYPES for attachment in submission.Attachments)
+    if extract_text:
+        submission_data["Extraction"] = {"Status": "pending"}
 
     # Insert into MongoDB
     result = submissions_collection.insert_one(submission_data)
     if not result.acknowledged:
         raise HTTPException(status_code=500, detail="Failed to save submission")
 
+    # Count the references to the content-addressed files
+    blob_updates = [
+        UpdateOne(
+            {"_id": attachment.ContentHash},
+            {
+                "$inc": {"RefCount": 1},
+                "$setOnInsert": {
+                    "FileReference": attachment.FileReference,
+                    "FileType": attachment.FileType,
+                    "Size": attachment.Size,
+                    "CreatedAt": submission_data["SubmissionTimestamp"],
+                },
+            },
+            upsert=True,
+        )
+        for attachment in submission.Attachments if attachment.ContentHash
+    ]
+    if blob_updates:
+        db["attachment_blobs"].bulk_write(blob_updates, ordered=False)
+
+    if extract_text:
+        # the attachments are parsed in a worker process after the response is sent
+        enqueue_extraction(str(result.inserted_id))
+
     # Prepare the response
     response = SubmissionResponse(
         _id=str(result.inserted_id),
@@ -130,24 +252,169 @@ def get_submission(assignment_id: str, student_id: str, request: Request):
     submission = submissions_collection.find_one({
         "AssignmentID": assignment_id,
         "StudentID": student_id
-    })
+    }, SUBMISSION_SERIALIZER.projection)
 
     if not submission:
         raise HTTPException(status_code=404, detail="Student didn't submit for this assignment")
 
-    # Prepare the response
-    response = SubmissionResponse(
-        _id=str(submission["_id"]),
-        SubmissionTimestamp=submission["SubmissionTimestamp"],
-        Status=submission["Status"],
-        AssignmentID=submission["AssignmentID"],
-        StudentID=submission["StudentID"],
-        TextContent=submission["TextContent"],
-        Attachments=submission["Attachments"],
+    return JSONResponse(
+        content=SUBMISSION_SERIALIZER.dump(submission),
+        status_code=200
     )
 
+
+@assign_submission_router.post("/attachments/lookup")
+def lookup_attachment_blobs(lookup: BlobLookupRequest):
+    """
+    Endpoint to check which file contents are already stored, so their upload can be skipped.
+    A content is known once a submission referencing it has been saved.
+    """
+    db = get_db()
+    blobs_collection = db["attachment_blobs"]
+
+    known = {
+        blob["_id"]: blob
+        for blob in blobs_collection.find(
+            {"_id": {"$in": lookup.ContentHashes}, "RefCount": {"$gt": 0}},
+            {"FileReference": 1, "FileType": 1, "Size": 1}
+        )
+    }
+
     return JSONResponse(
-        content=response.model_dump(mode="json"),
+        content={
+            "Known": [
+                {"ContentHash": content_hash, "FileReference": blob["FileReference"], "Size": blob.get("Size")}
+                for content_hash, blob in known.items()
+            ],
+            "Missing": [content_hash for content_hash in lookup.ContentHashes if content_hash not in known],
+        },
         status_code=200
     )
 
+
+@assign_submission_router.post("/attachments/collect-orphans")
+def collect_orphan_blobs(grace_hours: int = Query(BLOB_GC_GRACE_HOURS, ge=1)):
+    """
+    Endpoint to delete the content-addressed files that no saved submission references, e.g. uploaded
+    by a submit request that failed afterwards. Such files are never deleted by the failed request itself,
+    since another submission may be saving a reference to the same content at the same time.
+    Only the files older than the grace period are deleted. As a submit request can upload the same content
+    again and reference it after the listing, each file is checked again, with a HEAD request and against
+    the references, right before being deleted.
+    """
+    db = get_db()
+    blobs_collection = db["attachment_blobs"]
+    s3_client = s3_config.get_s3_client()
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=grace_hours)
+
+    def unreferenced(content_hashes):
+        referenced = {
+            blob["_id"]
+            for blob in blobs_collection.find({"_id": {"$in": list(content_hashes)}, "RefCount": {"$gt": 0}}, {"_id": 1})
+        }
+        return [content_hash for content_hash in content_hashes if content_hash not in referenced]
+
+    deleted = 0
+    # pages of at most 1000 keys, the limit of a single delete_objects request
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=s3_config.BUCKET_NAME, Prefix=BLOBS_PREFIX):
+        candidates = {
+            s3_object["Key"][len(BLOBS_PREFIX):]: s3_object
+            for s3_object in page.get("Contents", []) if s3_object["LastModified"] < cutoff
+        }
+        if not candidates:
+            continue
+        orphans = []
+        for content_hash in unreferenced(candidates):
+            metadata = s3_config.head_file(s3_client, s3_config.BUCKET_NAME, candidates[content_hash]["Key"])
+            # skipped if uploaded again since the listing, or already deleted
+            if metadata is not None and metadata["LastModified"] < cutoff:
+                orphans.append(content_hash)
+        if orphans:
+            # a reference saved for a file uploaded again before its HEAD request
+            orphans = unreferenced(orphans)
+        if orphans:
+            s3_client.delete_objects(
+                Bucket=s3_config.BUCKET_NAME,
+                Delete={"Objects": [{"Key": candidates[content_hash]["Key"]} for content_hash in orphans], "Quiet": True}
+            )
+            deleted += len(orphans)
+
+    return JSONResponse(content={"Deleted": deleted}, status_code=200)
+
+
+def upload_session_response(session: dict) -> dict:
+    """Convert an upload session document, whose parts are keyed by part number, to its response."""
+    return UploadSessionResponse(
+        **{key: value for key, value in session.items() if key not in ("_id", "Parts")},
+        _id=str(session["_id"]),
+        Parts=[
+            {"PartNumber": int(part_number), **part}
+            for part_number, part in sorted(session["Parts"].items(), key=lambda item: int(item[0]))
+        ],
+    ).model_dump(mode="json")
+
+
+@assign_submission_router.post("/upload-sessions", response_model=UploadSessionResponse)
+def create_upload_session(upload_session: UploadSessionCreate):
+    """Endpoint to track a new resumable multipart upload of an attachment."""
+    db = get_db()
+    sessions_collection = db["upload_sessions"]
+
+    now = datetime.utcnow()
+    session = {
+        **upload_session.model_dump(),
+        "Status": "in_progress",
+        "Parts": {},
+        "CreatedAt": now,
+        "UpdatedAt": now,
+    }
+    result = sessions_collection.insert_one(session)
+    if not result.acknowledged:
+        raise HTTPException(status_code=500, detail="Failed to save upload session")
+
+    return JSONResponse(content=upload_session_response(session), status_code=201)
+
+
+@assign_submission_router.get("/upload-sessions/{session_id}", response_model=UploadSessionResponse)
+def get_upload_session(session_id: str):
+    """Endpoint to retrieve an upload session, with the parts uploaded so far."""
+    db = get_db()
+    session = db["upload_sessions"].find_one({"_id": ObjectId(session_id)})
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+
+    return JSONResponse(content=upload_session_response(session), status_code=200)
+
+
+@assign_submission_router.put("/upload-sessions/{session_id}/parts/{part_number}", response_model=UploadSessionResponse)
+def record_uploaded_part(session_id: str, part_number: int, part: UploadSessionPartUpdate):
+    """
+    Endpoint to record a part uploaded to the storage. Parts can be recorded in any order and concurrently,
+    a part uploaded again replaces the previous one.
+    """
+    db = get_db()
+    session = db["upload_sessions"].find_one_and_update(
+        {"_id": ObjectId(session_id), "Status": "in_progress"},
+        {"$set": {f"Parts.{part_number}": part.model_dump(), "UpdatedAt": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found or no longer in progress")
+
+    return JSONResponse(content=upload_session_response(session), status_code=200)
+
+
+@assign_submission_router.patch("/upload-sessions/{session_id}", response_model=UploadSessionResponse)
+def close_upload_session(session_id: str, status_update: UploadSessionStatusUpdate):
+    """Endpoint to mark an upload session as completed or aborted."""
+    db = get_db()
+    session = db["upload_sessions"].find_one_and_update(
+        {"_id": ObjectId(session_id), "Status": "in_progress"},
+        {"$set": {"Status": status_update.Status, "UpdatedAt": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found or no longer in progress")
+
+    return JSONResponse(content=upload_session_response(session), status_code=200)
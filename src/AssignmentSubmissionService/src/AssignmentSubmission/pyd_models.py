@@ -1,11 +1,17 @@
 from pydantic import BaseModel, Field
 from typing import List, Literal, Optional
 from datetime import datetime
+from os import getenv
+
+# IDs accepted by a batch lookup
+MAX_BATCH_IDS = int(getenv("MAX_BATCH_IDS", "500"))
 
 class AttachmentDocument(BaseModel):
     FileName: str = Field(..., description="Name of the file")
     FileType: Literal["PDF", "TXT", "JPG"] = Field(..., description="Type of the file")
     FileReference: str = Field(..., description="URL reference to the file")
+    ContentHash: Optional[str] = Field(None, pattern=r"^[0-9a-f]{64}$", description="SHA-256 of the file content, for content-addressed files")
+    Size: Optional[int] = Field(None, ge=0, description="Size of the file in bytes")
 
 class SubmissionRequest(BaseModel):
     TextContent: str = Field(..., description="Text content of the submission")
@@ -22,6 +28,41 @@ class SubmissionResponse(BaseModel):
     TextContent: str = Field(..., description="Text content of the submission")
     Attachments: List[AttachmentDocument] = Field(..., description="List of attachment documents")
 
+class SubmissionBatchRequest(BaseModel):
+    SubmissionIDs: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_IDS, description="IDs of the submissions to retrieve")
+
+class BlobLookupRequest(BaseModel):
+    ContentHashes: List[str] = Field(..., description="SHA-256 of the contents to look up")
+
+class UploadSessionCreate(BaseModel):
+    AssignmentID: str = Field(..., description="ID of the assignment")
+    StudentID: str = Field(..., description="ID of the student")
+    FileName: str = Field(..., description="Name of the file")
+    ContentType: str = Field(..., description="MIME type of the file")
+    Size: int = Field(..., gt=0, description="Size of the file in bytes")
+    PartSize: int = Field(..., gt=0, description="Size of every part but the last one, in bytes")
+    ObjectKey: str = Field(..., description="Key of the object in the submissions bucket")
+    UploadID: str = Field(..., description="ID of the S3 multipart upload")
+
+class UploadedPart(BaseModel):
+    PartNumber: int = Field(..., ge=1, description="Number of the part, starting from 1")
+    ETag: str = Field(..., description="ETag returned by the storage for the part")
+    Size: int = Field(..., gt=0, description="Size of the part in bytes")
+
+class UploadSessionPartUpdate(BaseModel):
+    ETag: str = Field(..., description="ETag returned by the storage for the part")
+    Size: int = Field(..., gt=0, description="Size of the part in bytes")
+
+class UploadSessionStatusUpdate(BaseModel):
+    Status: Literal["completed", "aborted"] = Field(..., description="Final status of the upload session")
+
+class UploadSessionResponse(UploadSessionCreate):
+    id: str = Field(..., description="Unique identifier of the upload session", alias="_id")
+    Status: Literal["in_progress", "completed", "aborted"] = Field(..., description="Status of the upload session")
+    Parts: List[UploadedPart] = Field(..., description="Parts uploaded so far, by part number")
+    CreatedAt: datetime = Field(..., description="Creation timestamp of the session")
+    UpdatedAt: datetime = Field(..., description="Timestamp of the last uploaded part")
+
 class SubmissionQuery(BaseModel):
     AssignmentID: str
     StudentID: str
@@ -11,13 +11,45 @@ import db_config
 import s3_config
 
 from fastapi import FastAPI
+from json_codec import JSONResponse, MessagePackMiddleware
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
 from AssignmentSubmission import assign_submission_router
+from db_config import get_db
+from text_extraction import ensure_extraction_indexes, resume_pending_extractions, shutdown_extraction_executor
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application lifespan context manager to initialize resources.
+    """
+    # Provision the submissions bucket once, it is retried on first use if the storage is not reachable yet
+    try:
+        await run_in_threadpool(s3_config.ensure_bucket)
+    except Exception as e:
+        print(f"Error provisioning S3 bucket '{s3_config.BUCKET_NAME}': {e}")
+    # Create the index of the extracted texts and enqueue again the text extractions interrupted by a restart
+    try:
+        await run_in_threadpool(ensure_extraction_indexes, get_db())
+        await resume_pending_extractions()
+    except Exception as e:
+        print(f"Error resuming pending text extractions: {e}")
+    yield
+    shutdown_extraction_executor()
+
+
+app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=JSONResponse,
+)
 
 app.include_router(assign_submission_router)
 
+# MessagePack for the internal calls of the orchestrator
+app.add_middleware(MessagePackMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  
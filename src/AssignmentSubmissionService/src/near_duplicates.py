@@ -0,0 +1,88 @@
+import re
+import zlib
+from os import getenv
+import numpy as np
+
+
+# MinHash signature length, split in LSH_BANDS bands of equal size
+MINHASH_PERMUTATIONS = int(getenv("MINHASH_PERMUTATIONS", "128"))
+LSH_BANDS = int(getenv("LSH_BANDS", "32"))
+# characters per shingle
+SHINGLE_SIZE = int(getenv("SHINGLE_SIZE", "5"))
+
+if MINHASH_PERMUTATIONS % LSH_BANDS != 0:
+    raise ValueError("MINHASH_PERMUTATIONS must be a multiple of LSH_BANDS")
+
+# universal hashing (a * x + b) mod p, with p = 2^31 - 1 so that a * x + b never overflows 64 bits
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(seed=1)
+_A = _rng.integers(1, int(_MERSENNE_PRIME), size=(MINHASH_PERMUTATIONS, 1), dtype=np.uint64)
+_B = _rng.integers(0, int(_MERSENNE_PRIME), size=(MINHASH_PERMUTATIONS, 1), dtype=np.uint64)
+# random multipliers to combine the rows of a band in a single bucket key
+_BAND_MULTIPLIERS = _rng.integers(1, 1 << 63, size=MINHASH_PERMUTATIONS // LSH_BANDS, dtype=np.uint64)
+# shingles hashed at a time, bounds the memory of the permutation matrix
+_SHINGLE_BLOCK = 4096
+
+
+def shingles(text: str) -> set[str]:
+    """Return the character shingles of a text, ignoring case and whitespace differences."""
+    normalized = re.sub(r"\s+", " ", text.lower()).strip()
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(text: str) -> list[int]:
+    """
+    Compute the MinHash signature of a text. The permutations are applied to blocks of shingles at once
+    as a (permutations x shingles) matrix, keeping the running minimum of each permutation.
+    A text without shingles has an empty signature.
+    """
+    hashed = np.fromiter(
+        (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(text)), dtype=np.uint64
+    ) % _MERSENNE_PRIME
+    if len(hashed) == 0:
+        return []
+    signature = np.full(MINHASH_PERMUTATIONS, _MERSENNE_PRIME, dtype=np.uint64)
+    for start in range(0, len(hashed), _SHINGLE_BLOCK):
+        block = hashed[start:start + _SHINGLE_BLOCK]
+        permuted = (_A * block + _B) % _MERSENNE_PRIME
+        np.minimum(signature, permuted.min(axis=1), out=signature)
+    return signature.tolist()
+
+
+def similar_pairs(signatures: np.ndarray, threshold: float) -> list[tuple[int, int, float]]:
+    """
+    Find the pairs of signatures whose estimated Jaccard similarity is at least the threshold.
+    Candidates are the pairs sharing a bucket in at least one LSH band, so the cost grows with the number
+    of signatures and of similar pairs instead of with all the N^2 pairs.
+    Return (index, index, similarity) tuples, most similar first.
+    """
+    count = len(signatures)
+    if count < 2:
+        return []
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    # one bucket key per signature and band
+    bands = signatures.reshape(count, LSH_BANDS, rows)
+    keys = (bands * _BAND_MULTIPLIERS).sum(axis=2)
+
+    candidates = set()
+    for band in range(LSH_BANDS):
+        order = np.argsort(keys[:, band], kind="stable")
+        sorted_keys = keys[order, band]
+        # runs of equal keys are the buckets with more than one signature, the others are skipped at once
+        same = np.concatenate(([0], (sorted_keys[1:] == sorted_keys[:-1]).astype(np.int8), [0]))
+        edges = np.diff(same)
+        for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+            bucket = np.sort(order[start:end + 1]).tolist()
+            for i in range(len(bucket)):
+                for j in range(i + 1, len(bucket)):
+                    candidates.add((bucket[i], bucket[j]))
+
+    if not candidates:
+        return []
+    pairs = np.array(sorted(candidates))
+    similarities = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    selected = np.flatnonzero(similarities >= threshold)
+    selected = selected[np.argsort(-similarities[selected], kind="stable")]
+    return [(int(pairs[k, 0]), int(pairs[k, 1]), float(similarities[k])) for k in selected]
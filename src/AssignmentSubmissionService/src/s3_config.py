@@ -1,5 +1,8 @@
 import boto3
 import os
+import threading
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 if os.getenv("S3_ACCESS_KEY") is None:
@@ -14,6 +17,24 @@ ACCESS_KEY = os.getenv("S3_ACCESS_KEY")
 SECRET_KEY = os.getenv("S3_SECRET_KEY")
 
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1") # required by boto3, not used for Seaweed
+# connections kept open to SeaweedFS by the shared client; bounds the concurrent S3 requests of the process
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "50"))
+# files larger than the threshold are uploaded in parts of S3_MULTIPART_CHUNK_SIZE_MB, several at a time
+S3_MULTIPART_THRESHOLD_MB = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "8"))
+S3_MULTIPART_CHUNK_SIZE_MB = int(os.getenv("S3_MULTIPART_CHUNK_SIZE_MB", "8"))
+S3_MULTIPART_CONCURRENCY = int(os.getenv("S3_MULTIPART_CONCURRENCY", "4"))
+
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+    multipart_chunksize=S3_MULTIPART_CHUNK_SIZE_MB * 1024 * 1024,
+    max_concurrency=S3_MULTIPART_CONCURRENCY,
+)
+
+BUCKET_NAME = 'assignment-submissions'
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+_provisioned_buckets = set()
 
 
 def create_s3_client():
@@ -25,11 +46,30 @@ def create_s3_client():
         aws_access_key_id=ACCESS_KEY,
         aws_secret_access_key=SECRET_KEY,
         region_name=AWS_REGION,
+        config=Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS),
         # Optionally disable SSL verification if needed
         # verify=False
     )
     return s3_client
 
+def get_s3_client():
+    """
+    Returns the process-wide S3 client, creating it on first use.
+    boto3 clients are thread-safe, so the client and its connection pool are shared by all requests."""
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                _s3_client = create_s3_client()
+    return _s3_client
+
+def ensure_bucket(bucket_name=BUCKET_NAME):
+    """Creates the bucket if needed, only once per process."""
+    if bucket_name in _provisioned_buckets:
+        return
+    create_bucket(get_s3_client(), bucket_name)
+    _provisioned_buckets.add(bucket_name)
+
 def create_bucket(s3_client, bucket_name):
     """Creates an S3 bucket. SeaweedFS creates it dynamically if it does not exist."""
     try:
@@ -51,7 +91,7 @@ def upload_file(s3_client, file_name, bucket, object_name=None):
         object_name = os.path.basename(file_name)
 
     try:
-        s3_client.upload_file(file_name, bucket, object_name)
+        s3_client.upload_file(file_name, bucket, object_name, Config=TRANSFER_CONFIG)
         print(f"File '{file_name}' successfully uploaded to '{bucket}/{object_name}'.")
     except ClientError as e:
         print(f"Error uploading file: {e}")
@@ -64,7 +104,7 @@ def upload_fileobj(s3_client, file_obj, bucket, object_name=None):
         object_name = os.path.basename(file_obj.name)
 
     try:
-        s3_client.upload_fileobj(file_obj, bucket, object_name)
+        s3_client.upload_fileobj(file_obj, bucket, object_name, Config=TRANSFER_CONFIG)
         print(f"File object successfully uploaded to '{bucket}/{object_name}'.")
     except ClientError as e:
         print(f"Error uploading file object: {e}")
@@ -84,6 +124,16 @@ def list_files(s3_client, bucket):
     except ClientError as e:
         print(f"Error listing files: {e}")
 
+def head_file(s3_client, bucket, object_name):
+    """Returns the metadata of an object, or None if it does not exist."""
+    try:
+        return s3_client.head_object(Bucket=bucket, Key=object_name)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        print(f"Error reading file metadata: {e}")
+        raise
+
 def download_file(s3_client, bucket, object_name, download_path):
     """Downloads an object from the S3 bucket."""
     try:
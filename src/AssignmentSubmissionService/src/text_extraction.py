@@ -0,0 +1,207 @@
+import asyncio
+import multiprocessing
+import socket
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from io import BytesIO
+from os import cpu_count, getenv, getpid
+from typing import Optional
+from pymongo import ASCENDING, ReturnDocument
+from pypdf import PdfReader
+from starlette.concurrency import run_in_threadpool
+from db_config import get_db, ObjectId
+import s3_config
+
+
+# worker processes parsing the attachments, off the request threads and the event loop
+EXTRACTION_WORKERS = int(getenv("EXTRACTION_WORKERS", str(cpu_count() or 1)))
+# text kept for each attachment; every text is stored in its own document of the attachment_texts
+# collection, so neither it nor the submission can grow past the MongoDB document size limit
+EXTRACTED_TEXT_MAX_CHARS = int(getenv("EXTRACTED_TEXT_MAX_CHARS", "1000000"))
+# an extraction claimed this long ago by a replica that never finished it can be claimed again
+EXTRACTION_LEASE_SECONDS = int(getenv("EXTRACTION_LEASE_SECONDS", "3600"))
+
+EXTRACTABLE_FILE_TYPES = ("PDF", "TXT")
+
+# identifies the replica running an extraction
+EXTRACTION_OWNER = f"{socket.gethostname()}:{getpid()}"
+
+_executor: Optional[ProcessPoolExecutor] = None
+# references to the running extractions, so they are not garbage collected
+_extraction_tasks: set = set()
+# S3 client of a worker process, created by its initializer
+_worker_s3_client = None
+
+
+def init_extraction_worker():
+    """
+    Create the S3 client of a worker process. The workers are spawned rather than forked,
+    so they never share the connection pool of the parent's client or the threads of its MongoDB client.
+    """
+    global _worker_s3_client
+    _worker_s3_client = s3_config.create_s3_client()
+
+
+def get_extraction_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=EXTRACTION_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_extraction_worker
+        )
+    return _executor
+
+
+def ensure_extraction_indexes(db):
+    """
+    Create the index used to read the extracted texts of a submission in attachment order.
+    """
+    db.attachment_texts.create_index([("SubmissionID", ASCENDING), ("Position", ASCENDING)])
+
+
+def shutdown_extraction_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def extract_text(data: bytes, file_type: str) -> str:
+    """
+    Extract the text of a PDF or TXT file.
+    """
+    if file_type == "PDF":
+        reader = PdfReader(BytesIO(data))
+        text = "\n".join(page.extract_text() or "" for page in reader.pages)
+    else:
+        text = data.decode("utf-8", errors="replace")
+    return text[:EXTRACTED_TEXT_MAX_CHARS]
+
+
+def extract_attachment_text(file_reference: str, file_type: str) -> str:
+    """
+    Download an attachment and extract its text. Runs in a worker process, with the S3 client of the process.
+    """
+    bucket, object_name = file_reference.split("/", 1)
+    s3_object = _worker_s3_client.get_object(Bucket=bucket, Key=object_name)
+    try:
+        data = s3_object["Body"].read()
+    finally:
+        s3_object["Body"].close()
+    return extract_text(data, file_type)
+
+
+def claim_extraction(submissions_collection, query: dict) -> Optional[dict]:
+    """
+    Atomically mark a pending extraction matching the query as running on this replica, and return its
+    submission. Extractions left running by a replica for longer than the lease can be claimed again.
+    Return None if there is nothing to claim, e.g. another replica already claimed it.
+    """
+    now = datetime.utcnow()
+    return submissions_collection.find_one_and_update(
+        {
+            **query,
+            "$or": [
+                {"Extraction.Status": "pending"},
+                {
+                    "Extraction.Status": "running",
+                    "Extraction.ClaimedAt": {"$lt": now - timedelta(seconds=EXTRACTION_LEASE_SECONDS)}
+                },
+            ],
+        },
+        {"$set": {"Extraction.Status": "running", "Extraction.Owner": EXTRACTION_OWNER, "Extraction.ClaimedAt": now}},
+        projection={"Attachments": 1},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def extract_submission_texts(submission: dict):
+    """
+    Extract the text of the PDF and TXT attachments of a claimed submission and store it in attachment_texts.
+    The text of content-addressed attachments is also stored with the content, so it is computed once.
+    """
+    db = get_db()
+    submissions_collection = db["submissions"]
+    blobs_collection = db["attachment_blobs"]
+    texts_collection = db["attachment_texts"]
+    loop = asyncio.get_running_loop()
+    submission_id = str(submission["_id"])
+
+    try:
+        # the texts of an interrupted run of the same extraction are replaced
+        await run_in_threadpool(texts_collection.delete_many, {"SubmissionID": submission_id})
+        file_names = []
+        for attachment in submission["Attachments"]:
+            if attachment["FileType"] not in EXTRACTABLE_FILE_TYPES:
+                continue
+            text = None
+            content_hash = attachment.get("ContentHash")
+            if content_hash:
+                blob = await run_in_threadpool(
+                    blobs_collection.find_one, {"_id": content_hash}, {"ExtractedText": 1}
+                )
+                text = (blob or {}).get("ExtractedText")
+            if text is None:
+                text = await loop.run_in_executor(
+                    get_extraction_executor(), extract_attachment_text, attachment["FileReference"], attachment["FileType"]
+                )
+                if content_hash:
+                    await run_in_threadpool(
+                        blobs_collection.update_one, {"_id": content_hash}, {"$set": {"ExtractedText": text}}
+                    )
+            await run_in_threadpool(texts_collection.insert_one, {
+                "SubmissionID": submission_id,
+                "Position": len(file_names),
+                "FileName": attachment["FileName"],
+                "Text": text,
+            })
+            file_names.append(attachment["FileName"])
+        extraction = {"Status": "completed", "FileNames": file_names, "CompletedAt": datetime.utcnow()}
+    except Exception as e:
+        print(f"Error extracting the text of submission {submission_id}: {e}")
+        extraction = {"Status": "failed", "Error": str(e), "CompletedAt": datetime.utcnow()}
+
+    # the result is only saved while this replica still owns the extraction
+    await run_in_threadpool(
+        submissions_collection.update_one,
+        {"_id": submission["_id"], "Extraction.Owner": EXTRACTION_OWNER},
+        {"$set": {"Extraction": extraction}}
+    )
+
+
+async def run_extraction(submission_id: str):
+    """
+    Claim the text extraction of a submission and run it, unless another replica already claimed it.
+    """
+    submissions_collection = get_db()["submissions"]
+    submission = await run_in_threadpool(claim_extraction, submissions_collection, {"_id": ObjectId(submission_id)})
+    if submission:
+        await extract_submission_texts(submission)
+
+
+def _schedule(coroutine):
+    task = asyncio.create_task(coroutine)
+    _extraction_tasks.add(task)
+    task.add_done_callback(_extraction_tasks.discard)
+
+
+def enqueue_extraction(submission_id: str):
+    """
+    Schedule the text extraction of a submission on the event loop, without waiting for it.
+    """
+    _schedule(run_extraction(submission_id))
+
+
+async def resume_pending_extractions():
+    """
+    Claim and enqueue again the extractions still pending, e.g. interrupted by a restart of the service.
+    Each extraction is claimed atomically, so replicas starting at the same time never run the same one.
+    """
+    submissions_collection = get_db()["submissions"]
+    resumed = 0
+    while submission := await run_in_threadpool(claim_extraction, submissions_collection, {}):
+        _schedule(extract_submission_texts(submission))
+        resumed += 1
+    if resumed:
+        print(f"Resumed {resumed} pending text extractions")
@@ -0,0 +1,43 @@
+from typing import Optional
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined, to_jsonable_python
+
+
+class TrustedSerializer:
+    """
+    Serializes the documents read from the database, which were validated when they were written,
+    without validating them again: only the fields of the model are kept, renamed from their alias,
+    missing optional fields get their default, and the values are converted to JSON types.
+    Fields computed by the validators of the model are given by the caller.
+    """
+
+    def __init__(self, model: type[BaseModel], nested: Optional[dict[str, "TrustedSerializer"]] = None):
+        self.fields = []
+        for name, field in model.model_fields.items():
+            default = PydanticUndefined if field.is_required() else field.get_default(call_default_factory=True)
+            self.fields.append((field.alias or name, name, default))
+        self.nested = nested or {}
+        # fields to read from the database
+        self.projection = {key: 1 for key, _, _ in self.fields}
+
+    def copy(self, document: dict) -> dict:
+        data = {}
+        for key, name, default in self.fields:
+            if key in document:
+                value = document[key]
+                serializer = self.nested.get(name)
+                if serializer is not None and value is not None:
+                    value = [serializer.copy(item) for item in value] if isinstance(value, list) else serializer.copy(value)
+                data[name] = value
+            elif default is not PydanticUndefined:
+                data[name] = default
+        return data
+
+    def dump(self, document: dict, **computed) -> dict:
+        """
+        Return the document as model_dump(mode="json") would, with the computed fields added.
+        """
+        data = self.copy(document)
+        data.update(computed)
+        # ObjectIds become strings, datetimes ISO strings
+        return to_jsonable_python(data, fallback=str)
@@ -4,6 +4,7 @@ Integration tests for the main app endpoints.
 import pytest
 from unittest.mock import patch, MagicMock
 from datetime import datetime
+from bson import ObjectId
 
 # add os path to include the src directory
 import sys
@@ -285,3 +286,250 @@ def test_get_submission_missing_parameters():
     """Test get submission endpoint with missing query parameters."""
     response = client.get("/assignments-submissions/submission")
     assert response.status_code == 422
+
+# UT-SYS-017
+@patch('AssignmentSubmission.main.get_db')
+def test_upload_assignment_counts_content_references(mock_get_db):
+    """Test that saving a submission increments the reference count of its content-addressed files."""
+    mock_db = MagicMock()
+    mock_collection = MagicMock()
+    mock_db.__getitem__.return_value = mock_collection
+    mock_get_db.return_value = mock_db
+
+    mock_collection.find_one.return_value = None
+    mock_result = MagicMock()
+    mock_result.acknowledged = True
+    mock_result.inserted_id = "507f1f77bcf86cd799439011"
+    mock_collection.insert_one.return_value = mock_result
+
+    content_hash = "a" * 64
+    data = {
+        **sample_submission_data,
+        "Attachments": [{
+            "FileName": "template.pdf",
+            "FileType": "PDF",
+            "FileReference": f"assignment-submissions/blobs/{content_hash}",
+            "ContentHash": content_hash,
+            "Size": 1024
+        }]
+    }
+
+    response = client.post("/assignments-submissions/", json=data)
+    assert response.status_code == 201
+
+    blob_updates = mock_collection.bulk_write.call_args.args[0]
+    assert len(blob_updates) == 1
+    assert blob_updates[0]._filter == {"_id": content_hash}
+    assert blob_updates[0]._doc["$inc"] == {"RefCount": 1}
+
+# UT-SYS-018
+@patch('AssignmentSubmission.main.get_db')
+def test_lookup_attachment_blobs(mock_get_db):
+    """Test the lookup of already stored file contents."""
+    mock_db = MagicMock()
+    mock_collection = MagicMock()
+    mock_db.__getitem__.return_value = mock_collection
+    mock_get_db.return_value = mock_db
+
+    known_hash, missing_hash = "a" * 64, "b" * 64
+    mock_collection.find.return_value = [
+        {"_id": known_hash, "FileReference": f"assignment-submissions/blobs/{known_hash}", "Size": 1024}
+    ]
+
+    response = client.post(
+        "/assignments-submissions/attachments/lookup",
+        json={"ContentHashes": [known_hash, missing_hash]}
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "Known": [{"ContentHash": known_hash, "FileReference": f"assignment-submissions/blobs/{known_hash}", "Size": 1024}],
+        "Missing": [missing_hash]
+    }
+
+# UT-SYS-019
+@patch('AssignmentSubmission.main.get_db')
+def test_record_uploaded_part(mock_get_db):
+    """Test that an uploaded part is recorded in its upload session."""
+    mock_db = MagicMock()
+    mock_collection = MagicMock()
+    mock_db.__getitem__.return_value = mock_collection
+    mock_get_db.return_value = mock_db
+
+    mock_collection.find_one_and_update.return_value = {
+        "_id": "507f1f77bcf86cd799439011",
+        "AssignmentID": "assignment123",
+        "StudentID": "student456",
+        "FileName": "dataset.txt",
+        "ContentType": "text/plain",
+        "Size": 10,
+        "PartSize": 5,
+        "ObjectKey": "assignment123/student456/dataset.txt",
+        "UploadID": "upload1",
+        "Status": "in_progress",
+        "Parts": {"2": {"ETag": '"etag2"', "Size": 5}},
+        "CreatedAt": datetime.utcnow(),
+        "UpdatedAt": datetime.utcnow()
+    }
+
+    response = client.put(
+        "/assignments-submissions/upload-sessions/507f1f77bcf86cd799439011/parts/2",
+        json={"ETag": '"etag2"', "Size": 5}
+    )
+    assert response.status_code == 200
+    assert response.json()["Parts"] == [{"PartNumber": 2, "ETag": '"etag2"', "Size": 5}]
+    update = mock_collection.find_one_and_update.call_args.args[1]
+    assert update["$set"]["Parts.2"] == {"ETag": '"etag2"', "Size": 5}
+
+# UT-SYS-024
+@patch('AssignmentSubmission.main.get_db')
+def test_get_submissions_batch(mock_get_db):
+    """Test that a batch lookup returns the submissions found keyed by ID and lists the missing ones."""
+    mock_db = MagicMock()
+    mock_collection = MagicMock()
+    mock_db.__getitem__.return_value = mock_collection
+    mock_get_db.return_value = mock_db
+
+    found_id = "507f1f77bcf86cd799439011"
+    missing_id = "507f1f77bcf86cd799439012"
+    mock_collection.find.return_value = [{
+        "_id": ObjectId(found_id),
+        "SubmissionTimestamp": datetime.utcnow(),
+        "Status": "submitted",
+        "AssignmentID": "assignment123",
+        "StudentID": "student456",
+        "TextContent": "This is my submission",
+        "Attachments": []
+    }]
+
+    response = client.post(
+        "/assignments-submissions/submissions/batch",
+        json={"SubmissionIDs": [found_id, missing_id, "not-an-id"]}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["Submissions"][found_id]["StudentID"] == "student456"
+    assert data["Missing"] == [missing_id, "not-an-id"]
+    assert mock_collection.find.call_args.args[0] == {"_id": {"$in": [ObjectId(found_id), ObjectId(missing_id)]}}
+
+
+# UT-SYS-025
+def test_trusted_serialization_matches_validated_dump():
+    """Test that a stored submission is serialized as its validated model would be, without its internal fields."""
+    from AssignmentSubmission.main import SUBMISSION_SERIALIZER
+    from AssignmentSubmission.pyd_models import SubmissionResponse
+    stored = {
+        "_id": ObjectId("507f1f77bcf86cd799439011"),
+        "SubmissionTimestamp": datetime.utcnow(),
+        "Status": "submitted",
+        "AssignmentID": "assignment123",
+        "StudentID": "student456",
+        "TextContent": "This is my submission",
+        "Attachments": [{"FileName": "essay.txt", "FileType": "TXT", "FileReference": "essay-key"}],
+        "MinHash": [1, 2, 3],
+    }
+
+    validated = SubmissionResponse(**{**stored, "_id": str(stored["_id"])}).model_dump(mode="json")
+
+    assert SUBMISSION_SERIALIZER.dump(stored) == validated
+    assert "MinHash" not in SUBMISSION_SERIALIZER.projection
+
+
+# UT-SYS-026
+@patch('AssignmentSubmission.main.get_db')
+def test_get_submissions_batch_msgpack(mock_get_db):
+    """Test that a batch lookup sent and answered as MessagePack keeps the shape of the JSON response."""
+    from json_codec import MSGPACK_MEDIA_TYPE, packb, unpackb
+    mock_db = MagicMock()
+    mock_collection = MagicMock()
+    mock_db.__getitem__.return_value = mock_collection
+    mock_get_db.return_value = mock_db
+
+    found_id = "507f1f77bcf86cd799439011"
+    timestamp = datetime(2030, 1, 2, 3, 4, 5)
+    mock_collection.find.return_value = [{
+        "_id": ObjectId(found_id),
+        "SubmissionTimestamp": timestamp,
+        "Status": "submitted",
+        "AssignmentID": "assignment123",
+        "StudentID": "student456",
+        "TextContent": "This is my submission",
+        "Attachments": []
+    }]
+
+    response = client.post(
+        "/assignments-submissions/submissions/batch",
+        content=packb({"SubmissionIDs": [found_id]}),
+        headers={"Content-Type": MSGPACK_MEDIA_TYPE, "Accept": MSGPACK_MEDIA_TYPE}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    data = unpackb(response.content)
+    assert data["Submissions"][found_id]["SubmissionTimestamp"] == timestamp.isoformat()
+    assert data["Missing"] == []
+
+# UT-SYS-027
+@patch('AssignmentSubmission.main.s3_config.get_s3_client')
+@patch('AssignmentSubmission.main.get_db')
+def test_collect_orphan_blobs(mock_get_db, mock_get_s3_client):
+    """Test that only the old content-addressed files without references are deleted."""
+    from datetime import timedelta, timezone
+    mock_db = MagicMock()
+    mock_collection = MagicMock()
+    mock_db.__getitem__.return_value = mock_collection
+    mock_get_db.return_value = mock_db
+
+    old, recent = datetime.now(timezone.utc) - timedelta(days=2), datetime.now(timezone.utc)
+    referenced_hash, orphan_hash, recent_hash = "a" * 64, "b" * 64, "c" * 64
+    reuploaded_hash, rereferenced_hash = "d" * 64, "e" * 64
+    s3_client = MagicMock()
+    s3_client.get_paginator.return_value.paginate.return_value = [{"Contents": [
+        {"Key": f"blobs/{content_hash}", "LastModified": old}
+        for content_hash in [referenced_hash, orphan_hash, reuploaded_hash, rereferenced_hash]
+    ] + [{"Key": f"blobs/{recent_hash}", "LastModified": recent}]}]
+    # uploaded again by a submit request after the listing
+    s3_client.head_object.side_effect = lambda Bucket, Key: {
+        "LastModified": recent if Key == f"blobs/{reuploaded_hash}" else old
+    }
+    mock_get_s3_client.return_value = s3_client
+    # referenced by a submission saved after the HEAD requests
+    mock_collection.find.side_effect = [[{"_id": referenced_hash}], [{"_id": rereferenced_hash}]]
+
+    response = client.post("/assignments-submissions/attachments/collect-orphans")
+    assert response.status_code == 200
+    assert response.json() == {"Deleted": 1}
+    assert mock_collection.find.call_args_list[0].args[0]["_id"] == {
+        "$in": [referenced_hash, orphan_hash, reuploaded_hash, rereferenced_hash]
+    }
+    assert mock_collection.find.call_args_list[1].args[0]["_id"] == {"$in": [orphan_hash, rereferenced_hash]}
+    s3_client.delete_objects.assert_called_once_with(
+        Bucket="assignment-submissions",
+        Delete={"Objects": [{"Key": f"blobs/{orphan_hash}"}], "Quiet": True}
+    )
+
+# UT-SYS-030
+@patch('AssignmentSubmission.main.get_db')
+def test_similar_submissions_reads_text_of_legacy_submissions_only(mock_get_db):
+    """Test that the text content is only read for the submissions without a stored MinHash signature."""
+    from near_duplicates import minhash_signature
+    mock_db = MagicMock()
+    mock_collection = MagicMock()
+    mock_db.__getitem__.return_value = mock_collection
+    mock_get_db.return_value = mock_db
+
+    signed_id, legacy_id = ObjectId("507f1f77bcf86cd799439011"), ObjectId("507f1f77bcf86cd799439012")
+    text = "The same essay, written twice by two different students."
+    mock_collection.find.side_effect = [
+        [
+            {"_id": signed_id, "StudentID": "student1", "MinHash": minhash_signature(text)},
+            {"_id": legacy_id, "StudentID": "student2"},
+        ],
+        [{"_id": legacy_id, "TextContent": text}],
+    ]
+
+    response = client.get("/assignments-submissions/submissions/assignment/assignment123/similar")
+    assert response.status_code == 200
+    assert response.json()["Pairs"][0]["StudentIDs"] == ["student1", "student2"]
+
+    assert mock_collection.find.call_args_list[0].args[1] == {"StudentID": 1, "MinHash": 1}
+    assert mock_collection.find.call_args_list[1].args == ({"_id": {"$in": [legacy_id]}}, {"TextContent": 1})
+    assert len(mock_collection.bulk_write.call_args.args[0]) == 1
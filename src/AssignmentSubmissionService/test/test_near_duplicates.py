@@ -0,0 +1,42 @@
+"""
+Unit tests for the near-duplicate detection of submissions.
+"""
+import numpy as np
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+from near_duplicates import minhash_signature, similar_pairs, MINHASH_PERMUTATIONS
+
+ESSAY = (
+    "Peer review improves the quality of student work because reviewers must read critically, "
+    "compare the submission with the rubric and explain their judgement in writing."
+)
+
+
+# UT-SYS-022
+def test_minhash_signature():
+    """Test that signatures ignore case and whitespace, and that empty texts have no signature."""
+    signature = minhash_signature(ESSAY)
+
+    assert len(signature) == MINHASH_PERMUTATIONS
+    assert minhash_signature(ESSAY.upper().replace(" ", "  ")) == signature
+    assert minhash_signature("   ") == []
+
+
+# UT-SYS-023
+def test_similar_pairs_finds_near_duplicates_only():
+    """Test that a lightly edited copy is paired with its original and unrelated texts are not."""
+    texts = [
+        ESSAY,
+        "A completely different answer about the history of the printing press in Europe.",
+        ESSAY.replace("critically", "carefully") + " Thanks.",
+        "Yet another unrelated text discussing the water cycle and evaporation.",
+    ]
+    signatures = np.array([minhash_signature(text) for text in texts], dtype=np.uint64)
+
+    pairs = similar_pairs(signatures, threshold=0.6)
+
+    assert [(i, j) for i, j, _ in pairs] == [(0, 2)]
+    assert pairs[0][2] >= 0.6
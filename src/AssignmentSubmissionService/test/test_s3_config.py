@@ -0,0 +1,29 @@
+"""
+Unit tests for the shared S3 client and bucket provisioning.
+"""
+from unittest.mock import patch
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import s3_config
+
+
+# UT-SYS-016
+def test_s3_client_is_shared_and_bucket_provisioned_once():
+    """Test that the S3 client is created once and the bucket is created only on first use."""
+    with patch.object(s3_config, "_s3_client", None), \
+         patch.object(s3_config, "_provisioned_buckets", set()), \
+         patch("s3_config.create_bucket") as mock_create_bucket:
+        client = s3_config.get_s3_client()
+        assert s3_config.get_s3_client() is client
+        assert client.meta.config.max_pool_connections == s3_config.S3_MAX_POOL_CONNECTIONS
+
+        s3_config.ensure_bucket("test-bucket")
+        s3_config.ensure_bucket("test-bucket")
+
+        mock_create_bucket.assert_called_once_with(client, "test-bucket")
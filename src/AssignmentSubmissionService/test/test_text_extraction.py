@@ -0,0 +1,114 @@
+"""
+Unit tests for the text extraction of the submission attachments.
+"""
+from unittest.mock import MagicMock, patch
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import text_extraction
+from text_extraction import extract_text, get_extraction_executor, resume_pending_extractions, run_extraction, shutdown_extraction_executor
+
+
+def _pdf_with_text(text: str) -> bytes:
+    """Build a minimal one-page PDF showing the given text."""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    pdf += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF".encode()
+    return pdf
+
+
+# UT-SYS-020
+def test_extract_text_from_pdf_and_txt():
+    """Test the text extraction of PDF and TXT attachments."""
+    assert "Peer review essay" in extract_text(_pdf_with_text("Peer review essay"), "PDF")
+    assert extract_text("plain text".encode("utf-8"), "TXT") == "plain text"
+
+
+# UT-SYS-021
+@patch('text_extraction.get_db')
+async def test_run_extraction_reuses_text_of_known_content(mock_get_db):
+    """Test that the text already extracted from the same content is not computed again."""
+    mock_db = MagicMock()
+    mock_submissions = MagicMock()
+    mock_blobs = MagicMock()
+    mock_texts = MagicMock()
+    mock_db.__getitem__.side_effect = lambda name: {
+        "attachment_blobs": mock_blobs, "attachment_texts": mock_texts
+    }.get(name, mock_submissions)
+    mock_get_db.return_value = mock_db
+
+    mock_submissions.find_one_and_update.return_value = {
+        "_id": "507f1f77bcf86cd799439011",
+        "Attachments": [
+            {"FileName": "essay.pdf", "FileType": "PDF", "FileReference": "bucket/blobs/abc", "ContentHash": "abc"},
+            {"FileName": "photo.jpg", "FileType": "JPG", "FileReference": "bucket/blobs/def", "ContentHash": "def"},
+        ]
+    }
+    mock_blobs.find_one.return_value = {"_id": "abc", "ExtractedText": "cached text"}
+
+    with patch('text_extraction.get_extraction_executor') as mock_executor:
+        await run_extraction("507f1f77bcf86cd799439011")
+        mock_executor.assert_not_called()
+
+    # the texts are stored in their own documents, not in the submission
+    mock_texts.insert_one.assert_called_once_with({
+        "SubmissionID": "507f1f77bcf86cd799439011", "Position": 0, "FileName": "essay.pdf", "Text": "cached text"
+    })
+    update_filter, update = mock_submissions.update_one.call_args.args
+    assert update_filter["Extraction.Owner"] == text_extraction.EXTRACTION_OWNER
+    assert update["$set"]["Extraction"]["Status"] == "completed"
+    assert update["$set"]["Extraction"]["FileNames"] == ["essay.pdf"]
+
+
+# UT-SYS-028
+@patch('text_extraction.get_db')
+async def test_extractions_are_claimed_once(mock_get_db):
+    """Test that an extraction claimed by another replica is not run, and resumed ones are claimed first."""
+    mock_submissions = MagicMock()
+    mock_get_db.return_value.__getitem__.return_value = mock_submissions
+
+    mock_submissions.find_one_and_update.return_value = None
+    with patch('text_extraction.extract_submission_texts') as mock_extract:
+        await run_extraction("507f1f77bcf86cd799439011")
+        mock_extract.assert_not_called()
+
+    claimed = [{"_id": "1", "Attachments": []}, {"_id": "2", "Attachments": []}, None]
+    mock_submissions.find_one_and_update.side_effect = claimed
+    with patch('text_extraction._schedule') as mock_schedule, \
+         patch('text_extraction.extract_submission_texts', MagicMock()) as mock_extract:
+        await resume_pending_extractions()
+    assert mock_schedule.call_count == 2
+    assert [call.args[0] for call in mock_extract.call_args_list] == claimed[:2]
+    claim_update = mock_submissions.find_one_and_update.call_args.args[1]
+    assert claim_update["$set"]["Extraction.Status"] == "running"
+
+
+# UT-SYS-029
+def test_extraction_workers_are_spawned():
+    """Test that the workers are spawned with their own S3 client instead of forked from the service."""
+    try:
+        executor = get_extraction_executor()
+        assert executor._mp_context.get_start_method() == "spawn"
+        assert executor._initializer is text_extraction.init_extraction_worker
+    finally:
+        shutdown_extraction_executor()
@@ -1,12 +1,14 @@
 import os
 from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from json_codec import JSONResponse, MessagePackRoute
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 from db_config import get_db, ObjectId
 from . import pyd_models
-from token_management import create_access_token, verify_access_token
+from password_hashing import get_pwd_context
+from admission_control import AdmissionRejected, get_login_admission_controller
+from token_management import create_access_token, verify_access_token, profile_claims, EMBED_PROFILE_CLAIMS, PROFILE_CLAIMS
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="authentication/login")
@@ -14,6 +16,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="authentication/login")
 authentication_router = APIRouter(
     prefix="/authentication",
     tags=["Authentication"],
+    route_class=MessagePackRoute
 )
 
 if not os.getenv("JWT_ACC_EXPIRATION_MINUTES"):
@@ -38,7 +41,7 @@ async def signup(user_data: pyd_models.UserSignup):
             detail="User with this email already exists."
         )
     
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = get_pwd_context()
     
     user = user_data.model_dump()
     del user["password"]  # Remove password from the user data to avoid storing it in plain text
@@ -62,23 +65,44 @@ async def login(user_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
     db = get_db()
     users_collection = db["users"]
     
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = get_pwd_context()
     
     user = users_collection.find_one({"email": user_data.username})
     
-    if not user or not pwd_context.verify(user_data.password, user["password_hash"]):
+    if not user:
         raise HTTPException(
             status_code=401,
             detail="Invalid email or password."
         )
+    # bcrypt is CPU bound: bound the concurrent verifications and keep them off the event loop
+    try:
+        async with get_login_admission_controller().admit():
+            valid, new_hash = await run_in_threadpool(
+                pwd_context.verify_and_update, user_data.password, user["password_hash"]
+            )
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many login attempts in progress. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    if not valid:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid email or password."
+        )
+    if new_hash:
+        # the hash was made with a different bcrypt cost than the calibrated one
+        users_collection.update_one({"_id": user["_id"]}, {"$set": {"password_hash": new_hash}})
     user["id"] = str(user["_id"])  # Convert ObjectId to string
+    claims = profile_claims(user)
     
     acc_token = create_access_token(
-        data={"id": user["id"], "role": user.get("role", "user"), "token_type": "access"},
+        data={"id": user["id"], "role": user.get("role", "user"), "token_type": "access", **claims},
         expires_delta=JWT_ACC_EXP
     )
     ref_token = create_access_token(
-        data={"id": user["id"], "role": user.get("role", "user"), "token_type": "refresh"},
+        data={"id": user["id"], "role": user.get("role", "user"), "token_type": "refresh", **claims},
         expires_delta=JWT_REF_EXP
     )
     
@@ -90,7 +114,15 @@ async def login(user_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
         "refresh_token": ref_token,
         "token_type": "bearer"
     }, status_code=200)
-    
+
+
+@authentication_router.get("/login/metrics")
+def login_metrics():
+    """
+    Report in-flight/queued logins, rejections and the queue-wait and service-time histograms.
+    """
+    return JSONResponse(get_login_admission_controller().stats(), status_code=200)
+
     
 @authentication_router.post("/refresh")
 def refresh_token(token: str = Depends(oauth2_scheme)):
@@ -105,12 +137,26 @@ def refresh_token(token: str = Depends(oauth2_scheme)):
             status_code=401,
             detail="Invalid token type. Refresh token required."
         )
+    claims = {}
+    if EMBED_PROFILE_CLAIMS:
+        # the profile may have changed since the refresh token was issued
+        db = get_db()
+        user = db["users"].find_one(
+            {"_id": ObjectId(payload["id"])},
+            {claim: 1 for claim in (*PROFILE_CLAIMS, "profile_version")}
+        )
+        if not user:
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid token"
+            )
+        claims = profile_claims(user)
     new_acc_token = create_access_token(
-        data={"id": payload["id"], "role": payload["role"], "token_type": "access"},
+        data={"id": payload["id"], "role": payload["role"], "token_type": "access", **claims},
         expires_delta=JWT_ACC_EXP
     )
     new_ref_token = create_access_token(
-        data={"id": payload["id"], "role": payload["role"], "token_type": "refresh"},
+        data={"id": payload["id"], "role": payload["role"], "token_type": "refresh", **claims},
         expires_delta=JWT_REF_EXP
     )
     return JSONResponse({
@@ -1,24 +1,52 @@
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from json_codec import JSONResponse, MessagePackRoute
 from fastapi.security import OAuth2PasswordBearer
+from pymongo import ReturnDocument
 from db_config import get_db, ObjectId
 from Authentication import pyd_models as auth_pyd_models
 from . import pyd_models
 from token_management import verify_access_token
+from profile_cache import get_profile_cache
 
 users_router = APIRouter(
     prefix="/api/v1/users",
     tags=["users"],
+    route_class=MessagePackRoute
 )
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/authentication/login")
 
+# the password hash never leaves the database
+PROFILE_PROJECTION = {"password_hash": 0}
+
+
+def get_profiles(user_ids: list[str]) -> dict[str, dict]:
+    """
+    Return the profiles of the given users keyed by user ID, serving them from the
+    profile cache when possible. All cache misses are loaded with a single $in query.
+    Users that do not exist are simply absent from the result.
+    """
+    profile_cache = get_profile_cache()
+    profiles, missing_ids = profile_cache.get_many(list(dict.fromkeys(user_ids)))
+
+    if missing_ids:
+        db = get_db()
+        users_collection = db["users"]
+        users = users_collection.find(
+            {"_id": {"$in": [ObjectId(user_id) for user_id in missing_ids]}},
+            PROFILE_PROJECTION
+        )
+        for user in users:
+            user["id"] = str(user["_id"])  # Convert ObjectId to string
+            profile = auth_pyd_models.UserResponse.model_validate(user).model_dump()
+            profile_cache.put(profile["id"], profile, user.get("profile_version", 0))
+            profiles[profile["id"]] = profile
+
+    return profiles
+
 
 @users_router.get("/me", response_model=auth_pyd_models.UserResponse)
 def get_current_user(token: str = Depends(oauth2_scheme)):
-    db = get_db()
-    users_collection = db["users"]
-    
     # Verify the token and extract user data
     try:
         payload = verify_access_token(token)
@@ -27,15 +55,28 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         if not user_id:
             return HTTPException(status_code=401, detail="Invalid token or user not found.")
 
-        user = users_collection.find_one({"_id": ObjectId(user_id)})
+        # answer from the verified claims while the cached profile version says they are current
+        if "pv" in payload and get_profile_cache().get_version(user_id) == payload["pv"]:
+            return JSONResponse(
+                content={
+                    "user": auth_pyd_models.UserResponse.model_validate({**payload, "id": user_id}).model_dump()
+                },
+                status_code=200
+            )
+
+        db = get_db()
+        users_collection = db["users"]
+        user = users_collection.find_one({"_id": ObjectId(user_id)}, PROFILE_PROJECTION)
         
         if not user:
             return HTTPException(status_code=404, detail="User not found.")
         
         user["id"] = str(user["_id"])  # Convert ObjectId to string
+        profile = auth_pyd_models.UserResponse.model_validate(user).model_dump()
+        get_profile_cache().put(user_id, profile, user.get("profile_version", 0))
         return JSONResponse(
             content={
-                "user": auth_pyd_models.UserResponse.model_validate(user).model_dump()
+                "user": profile
             },
             status_code=200
         )
@@ -66,18 +107,40 @@ def get_students():
     except ValueError as e:
         raise HTTPException(status_code=401, detail=str(e))
     
-@users_router.get("/{user_id}")
-def get_user_by_id(user_id: str):
+@users_router.patch("/me", response_model=auth_pyd_models.UserResponse)
+def update_current_user(updates: pyd_models.ProfileUpdateRequest, token: str = Depends(oauth2_scheme)):
+    try:
+        payload = verify_access_token(token)
+    except ValueError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    user_id = payload.get("id")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid token or user not found.")
+
     db = get_db()
     users_collection = db["users"]
-    
-    user = users_collection.find_one({"_id": ObjectId(user_id)})
-    
+
+    update_data = updates.model_dump(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No profile fields to update.")
+
+    if "email" in update_data and users_collection.find_one(
+        {"email": update_data["email"], "_id": {"$ne": ObjectId(user_id)}}, {"_id": 1}
+    ):
+        raise HTTPException(status_code=400, detail="User with this email already exists.")
+
+    user = users_collection.find_one_and_update(
+        {"_id": ObjectId(user_id)},
+        {"$set": update_data, "$inc": {"profile_version": 1}},
+        projection=PROFILE_PROJECTION,
+        return_document=ReturnDocument.AFTER
+    )
     if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
+        raise HTTPException(status_code=404, detail="User not found.")
+
+    get_profile_cache().invalidate(user_id)
+
     user["id"] = str(user["_id"])
-    
     return JSONResponse(
         content={
             "user": auth_pyd_models.UserResponse.model_validate(user).model_dump()
@@ -85,22 +148,36 @@ def get_user_by_id(user_id: str):
         status_code=200
     )
 
-@users_router.post("/batch")
-def get_users_by_ids(user_ids: pyd_models.BatchUserDetailsRequest):
-    db = get_db()
-    users_collection = db["users"]
 
-    # Convert string IDs to ObjectId
-    object_ids = [ObjectId(user_id) for user_id in user_ids.userIds]
+@users_router.get("/cache/stats")
+def get_profile_cache_stats():
+    """
+    Report size and hit ratio of the user profile cache.
+    """
+    return JSONResponse(content=get_profile_cache().stats(), status_code=200)
 
-    users = list(users_collection.find({"_id": {"$in": object_ids}}))
 
-    for user in users:
-        user["id"] = str(user["_id"])  # Convert ObjectId to string
+@users_router.get("/{user_id}")
+def get_user_by_id(user_id: str):
+    user = get_profiles([user_id]).get(user_id)
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return JSONResponse(
+        content={
+            "user": user
+        },
+        status_code=200
+    )
+
+@users_router.post("/batch")
+def get_users_by_ids(user_ids: pyd_models.BatchUserDetailsRequest):
+    profiles = get_profiles(user_ids.userIds)
 
     return JSONResponse(
         content={
-            "users": [auth_pyd_models.UserResponse.model_validate(user).model_dump() for user in users]
+            "users": [profiles[user_id] for user_id in dict.fromkeys(user_ids.userIds) if user_id in profiles]
         },
         status_code=200
     )
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel, Field
 
 
@@ -13,4 +14,12 @@ class BatchUserDetailsRequest(BaseModel):
             "example": {
                 "userIds": ["user_id_1", "user_id_2", "user_id_3"]
             }
-        }
\ No newline at end of file
+        }
+
+class ProfileUpdateRequest(BaseModel):
+    """
+    Represents the profile fields a user can change on their own account.
+    """
+    name: Optional[str] = None
+    surname: Optional[str] = None
+    email: Optional[str] = Field(None, pattern=r"^[\w\.-]+@[\w\.-]+\.\w+$", examples=["user@testmail.com"])
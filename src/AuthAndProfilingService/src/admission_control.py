@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager
+from os import cpu_count, getenv
+from typing import Optional
+
+
+# concurrent password verifications; bcrypt is CPU bound, so more than the cores only adds latency
+LOGIN_MAX_IN_FLIGHT = int(getenv("LOGIN_MAX_IN_FLIGHT", str(cpu_count() or 1)))
+# logins allowed to wait for a slot before new ones are rejected
+LOGIN_MAX_QUEUE = int(getenv("LOGIN_MAX_QUEUE", "100"))
+# hint sent in the Retry-After header of rejected logins
+LOGIN_RETRY_AFTER_SECONDS = int(getenv("LOGIN_RETRY_AFTER_SECONDS", "2"))
+
+DEFAULT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """
+    Minimal cumulative histogram of durations in milliseconds, exported in Prometheus style.
+    """
+
+    def __init__(self, buckets_ms: tuple = DEFAULT_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self._counts = [0] * (len(buckets_ms) + 1)
+        self._sum_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value_ms: float):
+        index = next((i for i, bound in enumerate(self.buckets_ms) if value_ms <= bound), len(self.buckets_ms))
+        with self._lock:
+            self._counts[index] += 1
+            self._sum_ms += value_ms
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            sum_ms = self._sum_ms
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip((*map(str, self.buckets_ms), "+Inf"), counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {"buckets": buckets, "count": cumulative, "sumMs": sum_ms}
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when both the in-flight slots and the wait queue are full.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many concurrent requests.")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounds the number of concurrent executions of an expensive section, with a bounded wait queue.
+    Requests beyond the queue are rejected immediately instead of piling up and timing out.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, retry_after: int):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.queue_wait = Histogram()
+        self.service_time = Histogram()
+
+    @asynccontextmanager
+    async def admit(self):
+        if self.in_flight >= self.max_in_flight and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(self.retry_after)
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        started_at = time.perf_counter()
+        self.queue_wait.observe((started_at - queued_at) * 1000)
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            self.service_time.observe((time.perf_counter() - started_at) * 1000)
+
+    def stats(self) -> dict:
+        return {
+            "maxInFlight": self.max_in_flight,
+            "maxQueue": self.max_queue,
+            "inFlight": self.in_flight,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "queueWaitMs": self.queue_wait.snapshot(),
+            "serviceTimeMs": self.service_time.snapshot(),
+        }
+
+
+_login_admission_controller: Optional[AdmissionController] = None
+
+
+def get_login_admission_controller() -> AdmissionController:
+    global _login_admission_controller
+    if _login_admission_controller is None:
+        _login_admission_controller = AdmissionController(
+            LOGIN_MAX_IN_FLIGHT, LOGIN_MAX_QUEUE, LOGIN_RETRY_AFTER_SECONDS
+        )
+    return _login_admission_controller
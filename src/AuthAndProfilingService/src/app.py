@@ -5,16 +5,24 @@ try:
 except Exception as e:
     print(f"Error loading .env file: {e}")
     
-from key_pair import generate_ecdsa_key_pair, get_public_key
-# TODO might check if keys already exist
-generate_ecdsa_key_pair()
+from key_pair import generate_key_pairs, get_public_key, get_public_keys
+# existing keys are kept, only missing ones are generated
+generate_key_pairs()
+
+from password_hashing import init_pwd_context
+# pick the bcrypt cost for this node before serving logins
+init_pwd_context()
 
 from fastapi import FastAPI
+from json_codec import JSONResponse, MessagePackMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 from Authentication import authentication_router
 from Users import users_router
 
-app = FastAPI()
+app = FastAPI(default_response_class=JSONResponse)
+# MessagePack for the internal calls of the orchestrator
+app.add_middleware(MessagePackMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  
@@ -46,4 +54,11 @@ async def public_key():
     except FileNotFoundError as e:
         return {"error": str(e)}, 404
     except Exception as e:
-        return {"error": "An unexpected error occurred."}, 500
\ No newline at end of file
+        return {"error": "An unexpected error occurred."}, 500
+
+@app.get("/public-keys")
+async def public_keys():
+    """
+    Endpoint to retrieve every public key used for JWT verification, with its key ID ('kid') and algorithm.
+    """
+    return {"keys": get_public_keys()}
\ No newline at end of file
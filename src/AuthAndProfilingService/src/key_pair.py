@@ -1,6 +1,7 @@
 from os import getenv, path, makedirs
+from hashlib import sha256
 from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
 from cryptography.hazmat.backends import default_backend
 
 
@@ -11,26 +12,74 @@ if getenv("PRIVATE_KEY_PASSWORD") is None:
 if getenv("PUBLIC_KEY_PATH") is None:
     raise ValueError("PUBLIC_KEY_PATH environment variable is not set")
 
+# algorithm used to sign new tokens; keys of the other algorithm are still published for verification
+JWT_ALGORITHM = getenv("JWT_ALGORITHM", "ES256")
+SUPPORTED_ALGORITHMS = ("ES256", "EdDSA")
+if JWT_ALGORITHM not in SUPPORTED_ALGORITHMS:
+    raise ValueError(f"JWT_ALGORITHM must be one of {SUPPORTED_ALGORITHMS}")
+
+# Ed25519 keys are stored next to the ES256 ones unless configured otherwise
+EDDSA_PRIVATE_KEY_PATH = getenv(
+    "EDDSA_PRIVATE_KEY_PATH",
+    path.join(path.dirname(getenv("PRIVATE_KEY_PATH")), "private_ed25519.pem")
+)
+EDDSA_PUBLIC_KEY_PATH = getenv(
+    "EDDSA_PUBLIC_KEY_PATH",
+    path.join(path.dirname(getenv("PUBLIC_KEY_PATH")), "public_ed25519.pem")
+)
+
+KEY_PATHS = {
+    "ES256": (getenv("PRIVATE_KEY_PATH"), getenv("PUBLIC_KEY_PATH")),
+    "EdDSA": (EDDSA_PRIVATE_KEY_PATH, EDDSA_PUBLIC_KEY_PATH),
+}
+
 # check if paths exist, if not create them
-if not path.exists(path.dirname(getenv("PRIVATE_KEY_PATH"))):
-    makedirs(path.dirname(getenv("PRIVATE_KEY_PATH")))
-if not path.exists(path.dirname(getenv("PUBLIC_KEY_PATH"))):
-    makedirs(path.dirname(getenv("PUBLIC_KEY_PATH")))
+for _private_path, _public_path in KEY_PATHS.values():
+    if not path.exists(path.dirname(_private_path)):
+        makedirs(path.dirname(_private_path))
+    if not path.exists(path.dirname(_public_path)):
+        makedirs(path.dirname(_public_path))
     
-def get_public_key() -> bytes:
+def get_public_key(algorithm: str = "ES256") -> bytes:
     """
-    Reads the public key from the file specified in the PUBLIC_KEY_PATH environment variable.
+    Reads the public key of the given algorithm from its PEM file.
+    The ES256 key is read from the file specified in the PUBLIC_KEY_PATH environment variable.
 
     Returns:
         bytes: The public key in PEM format.
     """
-    if not path.exists(getenv("PUBLIC_KEY_PATH")):
-        raise FileNotFoundError(f"Public key file not found at {getenv('PUBLIC_KEY_PATH')}")
+    public_key_path = KEY_PATHS[algorithm][1]
+    if not path.exists(public_key_path):
+        raise FileNotFoundError(f"Public key file not found at {public_key_path}")
     
-    with open(getenv("PUBLIC_KEY_PATH"), "rb") as public_file:
+    with open(public_key_path, "rb") as public_file:
         public_key = public_file.read()
     return public_key
 
+def get_key_id(algorithm: str, public_key: bytes) -> str:
+    """
+    Derives the key ID ('kid' header) of a public key: the algorithm plus a fingerprint of the key,
+    so verifiers can select both the key and the algorithm before checking the signature.
+    """
+    return f"{algorithm}-{sha256(public_key).hexdigest()[:16]}"
+
+def get_public_keys() -> list[dict]:
+    """
+    Returns every available public key along with its key ID and algorithm.
+    """
+    keys = []
+    for algorithm in SUPPORTED_ALGORITHMS:
+        try:
+            public_key = get_public_key(algorithm)
+        except FileNotFoundError:
+            continue
+        keys.append({
+            "kid": get_key_id(algorithm, public_key),
+            "alg": algorithm,
+            "public_key": public_key.decode("utf-8"),
+        })
+    return keys
+
 def generate_ecdsa_key_pair(overwrite: bool = False) -> tuple[bytes, bytes]:
     """
     Generates an ECDSA P-256 key pair suitable for ES256 algorithm.
@@ -70,4 +119,43 @@ def generate_ecdsa_key_pair(overwrite: bool = False) -> tuple[bytes, bytes]:
         private_file.write(private_pem)
     with open(getenv("PUBLIC_KEY_PATH"), "wb") as public_file:
         public_file.write(public_pem)
-    return private_pem, public_pem
\ No newline at end of file
+    return private_pem, public_pem
+
+def generate_ed25519_key_pair(overwrite: bool = False) -> tuple[bytes, bytes]:
+    """
+    Generates an Ed25519 key pair suitable for EdDSA algorithm.
+    Signing and, above all, verifying Ed25519 signatures is much cheaper than ES256.
+
+    Returns:
+        tuple: (private_key_pem, public_key_pem) as byte strings.
+    """
+    if not overwrite and path.exists(EDDSA_PRIVATE_KEY_PATH) and path.exists(EDDSA_PUBLIC_KEY_PATH):
+        return
+    private_key = ed25519.Ed25519PrivateKey.generate()
+
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.BestAvailableEncryption(
+            getenv("PRIVATE_KEY_PASSWORD").encode()
+        )
+    )
+    public_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+    with open(EDDSA_PRIVATE_KEY_PATH, "wb") as private_file:
+        private_file.write(private_pem)
+    with open(EDDSA_PUBLIC_KEY_PATH, "wb") as public_file:
+        public_file.write(public_pem)
+    return private_pem, public_pem
+
+def generate_key_pairs():
+    """
+    Generates the missing key pairs. The ES256 pair is always kept, so tokens signed before
+    switching JWT_ALGORITHM to EdDSA remain verifiable until they expire.
+    """
+    generate_ecdsa_key_pair()
+    if JWT_ALGORITHM == "EdDSA":
+        generate_ed25519_key_pair()
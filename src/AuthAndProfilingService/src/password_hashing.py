@@ -0,0 +1,71 @@
+import time
+from os import getenv
+from typing import Optional
+from passlib.context import CryptContext
+from passlib.hash import bcrypt
+
+
+# latency budget of a single password hash on this node
+BCRYPT_TARGET_MS = float(getenv("BCRYPT_TARGET_MS", "100"))
+# bounds of the calibrated cost; 4 and 31 are the limits of bcrypt itself
+BCRYPT_MIN_ROUNDS = int(getenv("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = int(getenv("BCRYPT_MAX_ROUNDS", "16"))
+# a fixed cost skips the calibration
+BCRYPT_ROUNDS = int(getenv("BCRYPT_ROUNDS")) if getenv("BCRYPT_ROUNDS") else None
+
+if not 4 <= BCRYPT_MIN_ROUNDS <= BCRYPT_MAX_ROUNDS <= 31:
+    raise ValueError("BCRYPT_MIN_ROUNDS and BCRYPT_MAX_ROUNDS must satisfy 4 <= min <= max <= 31")
+
+_pwd_context: Optional[CryptContext] = None
+
+
+def _hash_duration_ms(rounds: int) -> float:
+    start = time.perf_counter()
+    bcrypt.using(rounds=rounds).hash("peerflow-calibration")
+    return (time.perf_counter() - start) * 1000
+
+
+def calibrate_bcrypt_rounds(
+    target_ms: float = BCRYPT_TARGET_MS,
+    min_rounds: int = BCRYPT_MIN_ROUNDS,
+    max_rounds: int = BCRYPT_MAX_ROUNDS,
+) -> int:
+    """
+    Benchmark bcrypt on the current node and return the highest cost whose hashing time
+    stays within the latency budget. Every extra round doubles the work, so the benchmark
+    stops at the first cost over budget. The result is never lower than min_rounds.
+    """
+    rounds = min_rounds
+    while rounds < max_rounds:
+        # best of two runs to smooth out scheduling noise
+        duration_ms = min(_hash_duration_ms(rounds + 1), _hash_duration_ms(rounds + 1))
+        if duration_ms > target_ms:
+            break
+        rounds += 1
+    return rounds
+
+
+def init_pwd_context(rounds: Optional[int] = None) -> CryptContext:
+    """
+    Configure the shared password context with the given bcrypt cost, calibrating it when not given.
+    Hashes made with a lower cost are flagged by needs_update, so they get rehashed on login.
+    There is no upper bound: nodes calibrating to different costs only ever upgrade a hash,
+    never downgrade one made stronger by a faster node.
+    """
+    global _pwd_context
+    if rounds is None:
+        rounds = BCRYPT_ROUNDS or calibrate_bcrypt_rounds()
+    _pwd_context = CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+    )
+    print(f"Password hashing configured with bcrypt cost {rounds}")
+    return _pwd_context
+
+
+def get_pwd_context() -> CryptContext:
+    if _pwd_context is None:
+        return init_pwd_context()
+    return _pwd_context
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+from os import getenv
+from typing import Optional
+
+
+USER_CACHE_MAX_SIZE = int(getenv("USER_CACHE_MAX_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = int(getenv("USER_CACHE_TTL_SECONDS", "300"))
+
+
+class UserProfileCache:
+    """
+    Singleton, bounded LRU cache for user profiles (the UserResponse fields).
+    Entries expire after a TTL so that replicas converge even without explicit invalidation.
+    """
+
+    _instance: Optional['UserProfileCache'] = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, max_size: int = USER_CACHE_MAX_SIZE, ttl_seconds: int = USER_CACHE_TTL_SECONDS):
+        # do not reinitialize if already initialized
+        if self._initialized:
+            return
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict, int]] = OrderedDict()
+        # endpoints using the cache are sync, so they run concurrently in the threadpool
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._initialized = True
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return time.monotonic() - stored_at > self.ttl_seconds
+
+    def _lookup(self, user_id: str) -> Optional[tuple[float, dict, int]]:
+        # caller must hold the lock
+        entry = self._entries.get(user_id)
+        if entry is not None and not self._is_expired(entry[0]):
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry
+        if entry is not None:
+            del self._entries[user_id]
+        self.misses += 1
+        return None
+
+    def get(self, user_id: str) -> Optional[dict]:
+        """
+        Return the cached profile of the user, or None on a miss.
+        """
+        found, _ = self.get_many([user_id])
+        return found.get(user_id)
+
+    def get_many(self, user_ids: list[str]) -> tuple[dict[str, dict], list[str]]:
+        """
+        Look up several profiles at once.
+
+        :return: (profiles found in cache keyed by user ID, list of missing user IDs)
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._lookup(user_id)
+                if entry is not None:
+                    found[user_id] = entry[1]
+                else:
+                    missing.append(user_id)
+        return found, missing
+
+    def get_version(self, user_id: str) -> Optional[int]:
+        """
+        Return the cached profile version of the user, or None on a miss.
+        """
+        with self._lock:
+            entry = self._lookup(user_id)
+        return entry[2] if entry is not None else None
+
+    def put(self, user_id: str, profile: dict, version: int = 0):
+        """
+        Store a profile and its version, evicting the least recently used entries if the cache is full.
+        """
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), profile, version)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        """
+        Drop the cached profile of a user. Must be called whenever a profile changes.
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxSize": self.max_size,
+                "ttlSeconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def get_profile_cache() -> UserProfileCache:
+    return UserProfileCache()
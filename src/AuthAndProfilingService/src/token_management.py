@@ -1,10 +1,18 @@
 from os import getenv, path
+from functools import lru_cache
 import jwt
 from datetime import datetime, timedelta
 from pydantic import BaseModel, Field
 from cryptography.hazmat.primitives import serialization
+from key_pair import JWT_ALGORITHM, KEY_PATHS, SUPPORTED_ALGORITHMS, get_key_id, get_public_key
 
-ALGORITHM = "ES256"
+ALGORITHM = JWT_ALGORITHM
+# tokens issued before key IDs were introduced carry no 'kid' and are always ES256
+LEGACY_ALGORITHM = "ES256"
+
+# opt-in: embed the non-sensitive profile fields in the tokens so /users/me can skip the database
+EMBED_PROFILE_CLAIMS = getenv("JWT_EMBED_PROFILE", "false").lower() == "true"
+PROFILE_CLAIMS = ("name", "surname", "email")
 
 # check if environment variables are set
 if getenv("PRIVATE_KEY_PATH") is None:
@@ -23,6 +31,38 @@ if not path.exists(getenv("PRIVATE_KEY_PATH")):
     raise FileNotFoundError(f"Private key file not found at {getenv('PRIVATE_KEY_PATH')}")
 if not path.exists(getenv("PUBLIC_KEY_PATH")):
     raise FileNotFoundError(f"Public key file not found at {getenv('PUBLIC_KEY_PATH')}")
+if not path.exists(KEY_PATHS[ALGORITHM][0]):
+    raise FileNotFoundError(f"Private key file for {ALGORITHM} not found at {KEY_PATHS[ALGORITHM][0]}")
+
+
+@lru_cache(maxsize=None)
+def _load_signing_key(algorithm: str):
+    """
+    Load and decrypt the private key of the algorithm once, instead of on every token.
+    """
+    with open(KEY_PATHS[algorithm][0], "rb") as key_file:
+        private_key = serialization.load_pem_private_key(
+            key_file.read(),
+            password=getenv("PRIVATE_KEY_PASSWORD").encode()
+        )
+    return get_key_id(algorithm, get_public_key(algorithm)), private_key
+
+@lru_cache(maxsize=None)
+def _load_verification_keys() -> dict:
+    """
+    Load every available public key, keyed by key ID, along with its algorithm.
+    Tokens without a key ID map to the ES256 key under the None key.
+    """
+    keys = {}
+    for algorithm in SUPPORTED_ALGORITHMS:
+        try:
+            public_pem = get_public_key(algorithm)
+        except FileNotFoundError:
+            continue
+        keys[get_key_id(algorithm, public_pem)] = (algorithm, serialization.load_pem_public_key(public_pem))
+        if algorithm == LEGACY_ALGORITHM:
+            keys[None] = keys[get_key_id(algorithm, public_pem)]
+    return keys
 
 class Token(BaseModel):
     access_token: str
@@ -33,6 +73,17 @@ class TokenData(BaseModel):
     id: str | None = None
     role: str | None = None
 
+def profile_claims(user: dict) -> dict:
+    """
+    Build the profile claims of a user document, or an empty dict if profile embedding is disabled.
+    The profile version ('pv') lets verifiers detect claims made stale by a profile change.
+    """
+    if not EMBED_PROFILE_CLAIMS:
+        return {}
+    claims = {claim: user.get(claim) for claim in PROFILE_CLAIMS}
+    claims["pv"] = user.get("profile_version", 0)
+    return claims
+
 def create_access_token(data: dict, expires_delta: int = None) -> str:
     """
     Create a JWT access token with the given data and expiration time.
@@ -51,27 +102,25 @@ def create_access_token(data: dict, expires_delta: int = None) -> str:
         "iss": "auth_service",
     })
         
-    with open(getenv("PRIVATE_KEY_PATH"), "r") as key_file:
-        private_key = serialization.load_pem_private_key(
-            key_file.read().encode(),
-            password=getenv("PRIVATE_KEY_PASSWORD").encode()
-        )
-    return jwt.encode(to_encode, private_key, algorithm=ALGORITHM)
+    key_id, private_key = _load_signing_key(ALGORITHM)
+    return jwt.encode(to_encode, private_key, algorithm=ALGORITHM, headers={"kid": key_id})
 
 def verify_access_token(token: str) -> dict:
-    # Load your public key
-    with open(getenv("PUBLIC_KEY_PATH"), "rb") as key_file:
-        public_key = serialization.load_pem_public_key(
-            key_file.read(),
-        )
-
     try:
+        # The key ID selects both the public key and the algorithm, so ES256 tokens
+        # issued before a switch to EdDSA keep verifying until they expire
+        key_id = jwt.get_unverified_header(token).get("kid")
+        verification_keys = _load_verification_keys()
+        if key_id not in verification_keys:
+            raise jwt.InvalidTokenError(f"Unknown key ID {key_id}")
+        algorithm, public_key = verification_keys[key_id]
+
         # The audience ('aud') and issuer ('iss') claims should also be verified
         # and could be part of your token's payload and verification options
         payload = jwt.decode(
             token, 
             public_key, 
-            algorithms=[ALGORITHM], 
+            algorithms=[algorithm], 
             audience="peerflow_api", 
             issuer="auth_service"
         )
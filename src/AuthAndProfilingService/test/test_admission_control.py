@@ -0,0 +1,55 @@
+"""
+Unit tests for the login admission controller.
+"""
+import pytest
+import asyncio
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+from admission_control import AdmissionController, AdmissionRejected, Histogram
+
+
+def test_histogram_snapshot():
+    """Test that observations are exported as cumulative buckets."""
+    # UT-SYS-038
+    histogram = Histogram(buckets_ms=(10, 100))
+    histogram.observe(5)
+    histogram.observe(50)
+    histogram.observe(500)
+    
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {"10": 1, "100": 2, "+Inf": 3}
+    assert snapshot["count"] == 3
+    assert snapshot["sumMs"] == 555
+
+
+async def test_admission_controller_queues_and_rejects():
+    """Test that requests beyond in-flight slots wait, and beyond the queue are rejected."""
+    # UT-SYS-039
+    controller = AdmissionController(max_in_flight=1, max_queue=1, retry_after=3)
+    release = asyncio.Event()
+    
+    async def hold_slot():
+        async with controller.admit():
+            await release.wait()
+    
+    first = asyncio.create_task(hold_slot())
+    second = asyncio.create_task(hold_slot())
+    await asyncio.sleep(0)
+    assert controller.in_flight == 1
+    assert controller.waiting == 1
+    
+    with pytest.raises(AdmissionRejected) as rejected:
+        async with controller.admit():
+            pass
+    assert rejected.value.retry_after == 3
+    
+    release.set()
+    await asyncio.gather(first, second)
+    stats = controller.stats()
+    assert stats["rejected"] == 1
+    assert stats["inFlight"] == 0
+    assert stats["queueWaitMs"]["count"] == 2
+    assert stats["serviceTimeMs"]["count"] == 2
@@ -5,9 +5,13 @@ Simple tests for JWT authentication methods.
 import sys
 sys.path.append('/app/src')
 
-from key_pair import generate_ecdsa_key_pair
+from key_pair import generate_ecdsa_key_pair, generate_ed25519_key_pair
 generate_ecdsa_key_pair()
-from token_management import create_access_token, verify_access_token
+generate_ed25519_key_pair()
+import jwt as pyjwt
+from unittest.mock import patch
+import token_management
+from token_management import create_access_token, verify_access_token, profile_claims
 
 def test_jwt():
     # UT-SYS-017
@@ -30,4 +34,41 @@ def test_jwt():
         assert isinstance(payload, dict)
         assert payload["sub"] == "test_user"
     except ValueError as e:
-        assert False, f"Token verification failed: {e}"
\ No newline at end of file
+        assert False, f"Token verification failed: {e}"
+
+
+def test_jwt_profile_claims():
+    # UT-SYS-033
+    user = {"name": "Test", "surname": "User", "email": "test@example.com", "profile_version": 2, "password_hash": "x"}
+    
+    with patch("token_management.EMBED_PROFILE_CLAIMS", False):
+        assert profile_claims(user) == {}
+    
+    with patch("token_management.EMBED_PROFILE_CLAIMS", True):
+        claims = profile_claims(user)
+    assert claims == {"name": "Test", "surname": "User", "email": "test@example.com", "pv": 2}
+    
+    payload = verify_access_token(create_access_token(data={"sub": "test_user", **claims}, expires_delta=60))
+    assert payload["pv"] == 2
+    assert payload["email"] == "test@example.com"
+
+def test_jwt_eddsa_and_legacy_es256():
+    # UT-SYS-035
+    token_management._load_verification_keys.cache_clear()
+    es256_token = create_access_token(data={"sub": "test_user"}, expires_delta=60)
+    
+    with patch("token_management.ALGORITHM", "EdDSA"):
+        eddsa_token = create_access_token(data={"sub": "test_user"}, expires_delta=60)
+    assert pyjwt.get_unverified_header(eddsa_token)["alg"] == "EdDSA"
+    assert pyjwt.get_unverified_header(eddsa_token)["kid"].startswith("EdDSA-")
+    
+    # tokens of both algorithms verify, selected by their key ID
+    assert verify_access_token(eddsa_token)["sub"] == "test_user"
+    assert verify_access_token(es256_token)["sub"] == "test_user"
+    
+    # legacy tokens without a key ID are verified as ES256
+    _, private_key = token_management._load_signing_key("ES256")
+    legacy_token = pyjwt.encode(
+        {"sub": "test_user", "aud": "peerflow_api", "iss": "auth_service"}, private_key, algorithm="ES256"
+    )
+    assert verify_access_token(legacy_token)["sub"] == "test_user"
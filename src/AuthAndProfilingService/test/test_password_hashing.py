@@ -0,0 +1,49 @@
+"""
+Unit tests for the bcrypt cost calibration.
+"""
+import pytest
+from unittest.mock import patch
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+import password_hashing
+from password_hashing import calibrate_bcrypt_rounds, init_pwd_context
+
+
+def test_calibrate_bcrypt_rounds_within_budget():
+    """Test that the highest cost within the latency budget is picked."""
+    # UT-SYS-036
+    # each round doubles the work: cost 10 takes 64 ms, cost 11 takes 128 ms
+    with patch("password_hashing._hash_duration_ms", side_effect=lambda rounds: 2 ** (rounds - 4)):
+        assert calibrate_bcrypt_rounds(target_ms=100, min_rounds=8, max_rounds=16) == 10
+        assert calibrate_bcrypt_rounds(target_ms=100, min_rounds=8, max_rounds=9) == 9
+        # a slow node never goes below the minimum cost
+        assert calibrate_bcrypt_rounds(target_ms=1, min_rounds=8, max_rounds=16) == 8
+
+
+def test_pwd_context_rehashes_lower_costs():
+    """Test that hashes made with a lower cost are upgraded on successful verification, and higher ones kept."""
+    # UT-SYS-037
+    old_hash = init_pwd_context(rounds=4).hash("securepassword123")
+    stronger_hash = init_pwd_context(rounds=6).hash("securepassword123")
+    pwd_context = init_pwd_context(rounds=5)
+    try:
+        assert pwd_context.needs_update(old_hash)
+        assert not pwd_context.needs_update(stronger_hash)
+        
+        valid, new_hash = pwd_context.verify_and_update("securepassword123", old_hash)
+        assert valid
+        assert new_hash.startswith("$2b$05$")
+        assert not pwd_context.needs_update(new_hash)
+        
+        valid, new_hash = pwd_context.verify_and_update("securepassword123", stronger_hash)
+        assert valid
+        assert new_hash is None
+        
+        valid, new_hash = pwd_context.verify_and_update("wrongpassword", old_hash)
+        assert not valid
+        assert new_hash is None
+    finally:
+        password_hashing._pwd_context = None
@@ -0,0 +1,86 @@
+"""
+Unit tests for the user profile cache.
+"""
+import pytest
+from unittest.mock import patch
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+from profile_cache import UserProfileCache, get_profile_cache
+
+
+@pytest.fixture
+def cache():
+    cache = get_profile_cache()
+    cache.clear()
+    yield cache
+    cache.clear()
+
+
+def test_profile_cache_is_singleton():
+    """Test that the profile cache is shared across callers."""
+    # UT-SYS-027
+    assert get_profile_cache() is UserProfileCache()
+
+
+def test_profile_cache_hit_and_miss(cache):
+    """Test lookups of cached and uncached profiles."""
+    # UT-SYS-028
+    cache.put("user1", {"id": "user1", "name": "Test"})
+
+    found, missing = cache.get_many(["user1", "user2"])
+
+    assert found == {"user1": {"id": "user1", "name": "Test"}}
+    assert missing == ["user2"]
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hitRatio"] == 0.5
+
+
+def test_profile_cache_invalidate(cache):
+    """Test that an invalidated profile is no longer served."""
+    # UT-SYS-029
+    cache.put("user1", {"id": "user1"})
+    cache.invalidate("user1")
+
+    assert cache.get("user1") is None
+
+
+def test_profile_cache_ttl_expiration(cache):
+    """Test that expired profiles are treated as misses."""
+    # UT-SYS-030
+    with patch("profile_cache.time.monotonic", return_value=1000.0):
+        cache.put("user1", {"id": "user1"})
+    with patch("profile_cache.time.monotonic", return_value=1000.0 + cache.ttl_seconds + 1):
+        assert cache.get("user1") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_profile_cache_lru_eviction(cache):
+    """Test that the least recently used profile is evicted when the cache is full."""
+    # UT-SYS-031
+    original_max_size = cache.max_size
+    cache.max_size = 2
+    try:
+        cache.put("user1", {"id": "user1"})
+        cache.put("user2", {"id": "user2"})
+        cache.get("user1")  # user2 becomes the least recently used
+        cache.put("user3", {"id": "user3"})
+
+        found, missing = cache.get_many(["user1", "user2", "user3"])
+        assert set(found) == {"user1", "user3"}
+        assert missing == ["user2"]
+    finally:
+        cache.max_size = original_max_size
+
+
+def test_profile_cache_version(cache):
+    """Test that the profile version is stored alongside the profile."""
+    # UT-SYS-032
+    cache.put("user1", {"id": "user1"}, version=3)
+
+    assert cache.get_version("user1") == 3
+    assert cache.get_version("user2") is None
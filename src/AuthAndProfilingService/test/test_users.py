@@ -8,8 +8,11 @@ import uuid
 import sys
 sys.path.append('/app/src')
 
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 from app import app  # Import your FastAPI app
+from token_management import create_access_token
+from profile_cache import get_profile_cache
 
 client = TestClient(app)
 
@@ -156,3 +159,29 @@ def test_get_users_by_ids_missing_body():
     # UT-SYS-026
     response = client.post("/api/v1/users/batch")
     assert response.status_code == 422  # Validation error
+
+def test_get_current_user_from_token_claims():
+    """Test that /me answers from embedded profile claims without touching the database."""
+    # UT-SYS-034
+    user_id = "507f1f77bcf86cd799439011"
+    token = create_access_token(
+        data={
+            "id": user_id, "role": "Student", "token_type": "access",
+            "name": "Test", "surname": "User", "email": "test@example.com", "pv": 1
+        },
+        expires_delta=60
+    )
+    get_profile_cache().put(user_id, {"id": user_id}, version=1)
+    
+    with patch("Users.main.get_db") as mock_get_db:
+        response = client.get(
+            "/api/v1/users/me",
+            headers={"Authorization": f"Bearer {token}"}
+        )
+    get_profile_cache().invalidate(user_id)
+    
+    assert response.status_code == 200
+    assert response.json()["user"] == {
+        "id": user_id, "name": "Test", "surname": "User", "email": "test@example.com", "role": "Student"
+    }
+    mock_get_db.assert_not_called()
@@ -1,19 +1,56 @@
+import asyncio
+import posixpath
+import re
+import uuid
+from collections import deque
 from os import getenv
 from datetime import datetime
+from email.utils import parsedate_to_datetime
 from typing import List, Union
 import httpx
 from pydantic import BaseModel
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, Form
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, Form, Request
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
+from JsonCodec import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
+from botocore.exceptions import ClientError
 from AuthPublicKeyCache import get_auth_cache
+from ZipStream import ZipStreamWriter
+from UpstreamCache import service_body, service_client
+from AttachmentValidation import (
+    ATTACHMENT_CONTENT_TYPES, ATTACHMENT_SIZE_LIMITS, INSPECTION_CHUNK_SIZE, AttachmentRejected, get_attachment_metrics,
+    inspect_attachment, sniff_file_type
+)
 from . import pyd_models
-from s3_config import create_s3_client, create_bucket, upload_fileobj, delete_file
+from s3_config import (
+    get_s3_client, get_s3_presign_client, ensure_bucket, upload_fileobj, delete_file, head_file, copy_file,
+    create_presigned_post, create_presigned_url, get_file, create_multipart_upload, upload_part,
+    complete_multipart_upload, abort_multipart_upload, content_disposition, BUCKET_NAME, S3_MULTIPART_CHUNK_SIZE_MB
+)
 from dateutil.parser import isoparse
 import json
 
 
-BUCKET_NAME = 'assignment-submissions'
+# files of a single submission uploaded to S3 at the same time
+S3_UPLOAD_CONCURRENCY = int(getenv("S3_UPLOAD_CONCURRENCY", "4"))
+# validity of the presigned upload policies and download URLs
+S3_PRESIGNED_EXPIRATION_SECONDS = int(getenv("S3_PRESIGNED_EXPIRATION_SECONDS", "900"))
+# size of the chunks streamed to the clients when downloading attachments
+S3_DOWNLOAD_CHUNK_SIZE = int(getenv("S3_DOWNLOAD_CHUNK_SIZE", str(64 * 1024)))
+# attachments fetched from S3 ahead of the one being written to a submissions export
+EXPORT_S3_CONCURRENCY = int(getenv("EXPORT_S3_CONCURRENCY", "8"))
+# parts of the resumable uploads, S3 requires at least 5 MB for all parts but the last one
+UPLOAD_PART_SIZE = max(S3_MULTIPART_CHUNK_SIZE_MB, 5) * 1024 * 1024
+MAX_UPLOAD_PARTS = 10000
+# prefix of the content-addressed attachments, stored by SHA-256
+BLOBS_PREFIX = "blobs"
+# students read per request when collecting the roster of an assignment
+ROSTER_PAGE_SIZE = int(getenv("ROSTER_PAGE_SIZE", "5000"))
+# IDs sent in a single batch lookup to the services
+SERVICE_BATCH_SIZE = int(getenv("SERVICE_BATCH_SIZE", "500"))
+# names of the directly uploaded files, the same rule as AttachmentUploadFile.fileName
+ATTACHMENT_FILE_NAME_PATTERN = re.compile(r"^[^/\\]{1,255}$")
 
 
 assignments_router = APIRouter(
@@ -36,6 +73,18 @@ REVIEW_PROCESSING_SERVICE_URL = getenv("REVIEW_PROCESSING_SERVICE_URL")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/authentication/login")
 
 
+@assignments_router.get(
+    "/attachments/metrics",
+    summary="Get attachment upload metrics",
+    description="Counters of the accepted and rejected submission attachments, and of the rejected bytes."
+)
+async def get_attachment_upload_metrics():
+    """
+    Endpoint to report how many attachments and bytes were accepted or rejected, by rejection reason.
+    """
+    return JSONResponse(get_attachment_metrics().stats(), status_code=200)
+
+
 @assignments_router.get(
     "/", 
     response_model=pyd_models.AssignmentListResponse,
@@ -74,7 +123,7 @@ async def get_assignments_of_user(token: str = Depends(oauth2_scheme)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Invalid user role."
         )
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         assignments = await client.get(url)
         if assignments.status_code != 200:
             print(f"Failed to fetch assignments: {assignments.text}")
@@ -86,10 +135,10 @@ async def get_assignments_of_user(token: str = Depends(oauth2_scheme)):
     assignments = assignments.json().get('assignments', [])
     
     # for each assignment, check if there are peer reviews created
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         peer_review_assignments = await client.post(
             f"{REVIEW_ASSIGNMENT_SERVICE_URL}/api/v1/review-assignment/batch",
-            json=[assignment['id'] for assignment in assignments]
+            **service_body([assignment['id'] for assignment in assignments])
         )
         if peer_review_assignments.status_code != 200:
             print(f"Failed to fetch peer review assignments: {peer_review_assignments.text}")
@@ -157,7 +206,7 @@ async def create_assignment(
         "teacherId": teacher_id
     }
         
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         response = await client.post(
             f"{ASSIGNMENT_SERIVICE_URL}/assignments/",
             json=assignment_payload
@@ -174,6 +223,29 @@ async def create_assignment(
     }, status_code=201)
     
     
+async def get_assignment_student_ids(client: httpx.AsyncClient, assignment_id: str) -> list[str]:
+    """
+    Collect the IDs of the students involved in an assignment, reading its roster page by page.
+    """
+    student_ids = []
+    params = {"limit": ROSTER_PAGE_SIZE}
+    while True:
+        response = await client.get(
+            f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}/students", params=params
+        )
+        if response.status_code != 200:
+            print(f"Failed to fetch the students of the assignment: {response.text}")
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Failed to fetch the students of the assignment. {response.text}"
+            )
+        roster = response.json()["roster"]
+        student_ids.extend(roster["studentIds"])
+        if roster["nextAfter"] is None:
+            return student_ids
+        params["after"] = roster["nextAfter"]
+
+
 @assignments_router.get(
     "/{assignment_id}", 
     response_model=pyd_models.AssignmentCreateResponse, 
@@ -198,7 +270,7 @@ async def get_assignment_details(assignment_id: str, token: str = Depends(oauth2
             detail="Invalid token or user not found."
         )
 
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         response = await client.get(
             f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}"
         )
@@ -217,25 +289,27 @@ async def get_assignment_details(assignment_id: str, token: str = Depends(oauth2
 
         assignment_data = response.json().get("assignment", {})
 
-        # Fetch details of involved students
-        involved_student_ids = assignment_data.get("involvedStudentIds", [])
-        user_details = []
-        if involved_student_ids:
-            # Ensure involved_student_ids is a valid list
-            if not isinstance(involved_student_ids, list):
-                print("involved_student_ids is not a list:", involved_student_ids)
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="involved_student_ids must be a list."
-                )
+    # students only see the number of students involved, kept in studentCount, not the whole roster
+    if payload.get('role') == 'Student':
+        return JSONResponse({
+            "message": "Assignment retrieved",
+            "assignment": assignment_data,
+        }, status_code=200)
 
+    # then is a Teacher
+    async with service_client() as client:
+        # Fetch details of involved students, a batch of profiles at a time
+        involved_student_ids = await get_assignment_student_ids(client, assignment_id)
+        assignment_data["involvedStudentIds"] = involved_student_ids
+        user_details = []
+        for start in range(0, len(involved_student_ids), SERVICE_BATCH_SIZE):
             user_response = await client.post(
                 f"{AUTH_SERVICE_URL}/api/v1/users/batch",
-                json={"userIds": involved_student_ids}  # Corrected field name to match API expectations
+                **service_body({"userIds": involved_student_ids[start:start + SERVICE_BATCH_SIZE]})
             )
 
             if user_response.status_code == 200:
-                user_details = user_response.json().get("users", [])
+                user_details.extend(user_response.json().get("users", []))
             else:
                 print(f"Failed to fetch user details: {user_response.text}")
                 raise HTTPException(
@@ -243,160 +317,1123 @@ async def get_assignment_details(assignment_id: str, token: str = Depends(oauth2
                     detail=f"Failed to fetch user details. {user_response.text}"
                 )
         assignment_data["involvedStudents"] = user_details
+
+        # Fetch peer review assignment if it exists
+        pr_response = await client.get(
+            f"{REVIEW_ASSIGNMENT_SERVICE_URL}/api/v1/review-assignment/assignment/{assignment_id}"
+        )
         
-    if payload.get('role') == 'Student':
+        if pr_response.status_code == 200:
+            pr_assignment_data = pr_response.json()['peer_review']
+            pr_assignment_data['Rubric'] = pr_response.json()['rubric']
+        elif pr_response.status_code == 404:
+            pr_assignment_data = None
+        else:
+            print(f"Failed to fetch peer review assignment: {pr_response.text}")
+            raise HTTPException(
+                status_code=pr_response.status_code,
+                detail=f"Failed to fetch peer review assignment. {pr_response.text}"
+            )
+        
+        subms_response = await client.get(
+            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/submissions/assignment/{assignment_id}"
+        )
+
+        if subms_response.status_code == 200:
+            submissions_data = subms_response.json()
+        elif subms_response.status_code == 404:
+            submissions_data = []
+        else:
+            print(f"Failed to fetch submissions: {subms_response.text}")
+            raise HTTPException(
+                status_code=subms_response.status_code,
+                detail=f"Failed to fetch submissions. {subms_response.text}"
+            )
+
         return JSONResponse({
             "message": "Assignment retrieved",
             "assignment": assignment_data,
+            "peerReviewAssignment": pr_assignment_data,
+            "submissions": submissions_data
         }, status_code=200)
     
-    # then is a Teacher
-    async with httpx.AsyncClient() as client:
-        # Fetch peer review assignment if it exists
-        pr_response = await client.get(
-            f"{REVIEW_ASSIGNMENT_SERVICE_URL}/api/v1/review-assignment/assignment/{assignment_id}"
+
+
+@assignments_router.get(
+    "/{assignment_id}/submissions",
+)
+async def get_assignment_submissions(assignment_id: str, token: str = Depends(oauth2_scheme)):
+    """
+    Endpoint to get all submissions for a specific assignment.
+    """
+    auth_cache = get_auth_cache()
+    payload = await auth_cache.verify_token(token)
+
+    if not payload.get('id'):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token or user not found."
+        )
+    
+    if not payload.get('role') and payload['role'] != 'Teacher':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only teachers can get assignment submissions."
+        )
+
+    async with service_client() as client:
+        response = await client.get(
+            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/submissions/assignment/{assignment_id}"
+        )
+    
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Failed to fetch submissions. {response.text}"
+        )
+
+    submissions = response.json()
+    
+    return JSONResponse({
+        "message": "Submissions retrieved successfully.",
+        "submissions": submissions
+    }, status_code=200)
+
+
+@assignments_router.get(
+    "/{assignment_id}/submission"
+)
+async def get_assignment_submission(token: str = Depends(oauth2_scheme), assignment_id: str = None):
+    """
+    Endpoint to get the student's submission of an assignment. It uses the JWT token to identify the student.
+    """
+    auth_cache = get_auth_cache()
+    payload = await auth_cache.verify_token(token)
+
+    if not payload.get('id'):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token or user not found."
+        )
+    if not payload.get('role') and payload['role'] != 'Student':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only students can get assignment submissions."
+        )
+
+    user_id = payload['id']
+    
+    async with service_client() as client:
+        response = await client.get(
+            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/submission",
+            params={
+                "assignment_id": assignment_id,
+                "student_id": user_id
+            }
+        )
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Failed to fetch submission. {response.text}"
+        )
+
+    submission = response.json()
+    if not submission:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Submission not found."
+        )
+
+    return JSONResponse({
+        "message": "Submission retrieved successfully.",
+        "submission": submission
+    }, status_code=200)
+
+
+async def get_accessible_submission(payload: dict, assignment_id: str, submission_id: str) -> dict:
+    """
+    Return the submission if the user can access it: the teacher of the assignment,
+    the student who submitted it or one of its reviewers.
+    """
+    user_id, user_role = payload['id'], payload.get('role')
+    async with service_client() as client:
+        response = await client.get(
+            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/by-submission-id/{submission_id}"
+        )
+        if response.status_code == 404:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Submission not found."
+            )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Failed to fetch submission. {response.text}"
+            )
+        submission = response.json()
+        if submission['AssignmentID'] != assignment_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Submission not found."
+            )
+
+        if user_role == 'Teacher':
+            assignment_response = await client.get(f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}")
+            if assignment_response.status_code != 200:
+                raise HTTPException(
+                    status_code=assignment_response.status_code,
+                    detail=f"Failed to fetch assignment. {assignment_response.text}"
+                )
+            if assignment_response.json().get("assignment", {}).get("teacherId") == user_id:
+                return submission
+        elif user_role == 'Student':
+            if submission['StudentID'] == user_id:
+                return submission
+            pr_response = await client.get(
+                f"{REVIEW_ASSIGNMENT_SERVICE_URL}/api/v1/review-assignment/assignment/{assignment_id}"
+            )
+            if pr_response.status_code == 200 and any(
+                pairing['ReviewerStudentID'] == user_id and pairing['RevieweeSubmissionID'] == submission_id
+                for pairing in pr_response.json()['peer_review']['PeerReviewPairings']
+            ):
+                return submission
+
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="You are not allowed to view this submission."
+    )
+
+
+@assignments_router.get(
+    "/{assignment_id}/submissions/{submission_id}/attachments/{file_name}",
+    summary="Download a submission attachment",
+    description="Streams an attachment of a submission from the submission storage. Supports Range requests and "
+                "ETag validation (If-None-Match, If-Range). With redirect=true, answers with a redirect to a "
+                "presigned URL of the storage instead."
+)
+async def download_submission_attachment(
+    assignment_id: str,
+    submission_id: str,
+    file_name: str,
+    request: Request,
+    redirect: bool = False,
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Endpoint to download an attachment, available to the teacher, the submitter and the reviewers.
+    """
+    auth_cache = get_auth_cache()
+    payload = await auth_cache.verify_token(token)
+
+    if not payload.get('id'):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token or user not found."
+        )
+
+    submission = await get_accessible_submission(payload, assignment_id, submission_id)
+    attachment = next((a for a in submission['Attachments'] if a['FileName'] == file_name), None)
+    if attachment is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment not found."
+        )
+    bucket, object_name = attachment['FileReference'].split('/', 1)
+
+    if redirect:
+        url = create_presigned_url(
+            get_s3_presign_client(), bucket, object_name, S3_PRESIGNED_EXPIRATION_SECONDS, file_name
+        )
+        if url is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to generate the download URL."
+            )
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    byte_range = request.headers.get("range")
+    if_none_match = request.headers.get("if-none-match")
+    # a range is only valid for the version of the file identified by If-Range, an entity tag or a date
+    if_range = request.headers.get("if-range") if byte_range else None
+    if_match = if_unmodified_since = None
+    if if_range and if_range.startswith(('"', 'W/"')):
+        if_match = if_range
+    elif if_range:
+        try:
+            if_unmodified_since = parsedate_to_datetime(if_range)
+        except (TypeError, ValueError):
+            # not a validator we can check, send the whole file
+            byte_range = None
+    s3_client = get_s3_client()
+    try:
+        try:
+            s3_object = await run_in_threadpool(
+                get_file, s3_client, bucket, object_name, byte_range=byte_range,
+                if_none_match=if_none_match, if_match=if_match, if_unmodified_since=if_unmodified_since
+            )
+        except ClientError as e:
+            if not (if_match or if_unmodified_since) or e.response['Error']['Code'] not in ('412', 'PreconditionFailed'):
+                raise
+            # the file changed since the client cached it, send it entirely
+            s3_object = await run_in_threadpool(
+                get_file, s3_client, bucket, object_name, if_none_match=if_none_match
+            )
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        if error_code in ('304', 'NotModified'):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": if_none_match})
+        if error_code in ('416', 'InvalidRange'):
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail="Requested range not satisfiable."
+            )
+        if error_code in ('404', 'NoSuchKey'):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Attachment not found in the submission storage."
+            )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error downloading file {file_name}: {str(e)}"
+        )
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(s3_object["ContentLength"]),
+        "ETag": s3_object["ETag"],
+        "Last-Modified": s3_object["LastModified"].strftime("%a, %d %b %Y %H:%M:%S GMT"),
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": content_disposition("inline", file_name),
+    }
+    if s3_object.get("ContentRange"):
+        headers["Content-Range"] = s3_object["ContentRange"]
+
+    def read_chunks():
+        # the body is read chunk by chunk while the client consumes the response
+        try:
+            yield from s3_object["Body"].iter_chunks(S3_DOWNLOAD_CHUNK_SIZE)
+        finally:
+            s3_object["Body"].close()
+
+    return StreamingResponse(
+        iterate_in_threadpool(read_chunks()),
+        status_code=status.HTTP_206_PARTIAL_CONTENT if s3_object.get("ContentRange") else status.HTTP_200_OK,
+        media_type=s3_object.get("ContentType", "application/octet-stream"),
+        headers=headers
+    )
+
+
+def archive_entry_name(name: str, used_names: set) -> str:
+    """
+    Reduce a client supplied name to a plain name for an entry of the export, so it cannot be extracted
+    outside its folder, and make it unique among the names already used in the folder.
+    """
+    name = posixpath.basename(name.replace("\\", "/"))
+    if name in ("", ".", ".."):
+        name = "attachment"
+    stem, extension = posixpath.splitext(name)
+    unique_name, copy = name, 1
+    while unique_name in used_names:
+        copy += 1
+        unique_name = f"{stem} ({copy}){extension}"
+    used_names.add(unique_name)
+    return unique_name
+
+
+async def stream_submissions_archive(submissions: list[dict]):
+    """
+    Stream a ZIP archive with the text content and the attachments of the submissions, one folder per student.
+    Up to EXPORT_S3_CONCURRENCY attachments are requested from S3 ahead of the one being written,
+    while their bodies are copied to the archive chunk by chunk, so memory stays bounded.
+    Attachments that cannot be fetched are listed in export_errors.txt.
+    """
+    archive = ZipStreamWriter()
+    s3_client = get_s3_client()
+    failed = []
+
+    # the entry names of every student folder, to keep the attachments from overwriting each other
+    folders = []
+    used_folders = {"export_errors.txt"}
+    for submission in submissions:
+        folder = archive_entry_name(str(submission['StudentID']), used_folders)
+        folders.append((folder, {"submission.txt"}))
+        archive.write_file(f"{folder}/submission.txt", submission['TextContent'].encode("utf-8"))
+        yield archive.read()
+
+    async def add_attachment(name: str, s3_object_task: asyncio.Task):
+        try:
+            s3_object = await s3_object_task
+        except Exception as e:
+            print(f"Error fetching {name} for the export: {e}")
+            failed.append(name)
+            return
+        body = s3_object["Body"]
+        try:
+            with archive.open_file(name, s3_object["ContentLength"]) as entry:
+                while chunk := await run_in_threadpool(body.read, S3_DOWNLOAD_CHUNK_SIZE):
+                    entry.write(chunk)
+                    yield archive.read()
+        except Exception as e:
+            print(f"Error reading {name} for the export: {e}")
+            failed.append(name)
+        finally:
+            body.close()
+        yield archive.read()
+
+    def close_body(s3_object_task: asyncio.Task):
+        if not s3_object_task.cancelled() and s3_object_task.exception() is None:
+            s3_object_task.result()["Body"].close()
+
+    window = deque()
+    try:
+        for submission, (folder, used_names) in zip(submissions, folders):
+            for attachment in submission['Attachments']:
+                bucket, object_name = attachment['FileReference'].split('/', 1)
+                window.append((
+                    f"{folder}/{archive_entry_name(attachment['FileName'], used_names)}",
+                    asyncio.ensure_future(run_in_threadpool(get_file, s3_client, bucket, object_name))
+                ))
+                if len(window) > EXPORT_S3_CONCURRENCY:
+                    async for data in add_attachment(*window.popleft()):
+                        yield data
+        while window:
+            async for data in add_attachment(*window.popleft()):
+                yield data
+    finally:
+        # the client went away: do not wait for the attachments requested ahead, but close their bodies
+        # once they arrive, cancelling the task would not stop the request running in its thread
+        for _, s3_object_task in window:
+            s3_object_task.add_done_callback(close_body)
+
+    if failed:
+        archive.write_file("export_errors.txt", ("Files that could not be exported:\n" + "\n".join(failed)).encode("utf-8"))
+    yield archive.close()
+
+
+@assignments_router.get(
+    "/{assignment_id}/submissions/similar",
+    summary="Find near-duplicate submissions",
+    description="Returns the pairs of submissions of the assignment whose text contents are near duplicates, "
+                "most similar first. Only the teacher of the assignment can see them."
+)
+async def get_similar_submissions(
+    assignment_id: str,
+    threshold: float = 0.5,
+    limit: int = 100,
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Endpoint to flag possibly copied submissions, by estimated Jaccard similarity of their text.
+    """
+    auth_cache = get_auth_cache()
+    payload = await auth_cache.verify_token(token)
+
+    if not payload.get('id'):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token or user not found."
+        )
+    if payload.get('role') != 'Teacher':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only teachers can compare assignment submissions."
+        )
+
+    async with service_client() as client:
+        response = await client.get(f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}")
+        if response.status_code == 404:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Assignment not found."
+            )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Failed to fetch assignment. {response.text}"
+            )
+        if response.json().get("assignment", {}).get("teacherId") != payload['id']:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You are not the creator of this assignment."
+            )
+
+        similar_response = await client.get(
+            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/submissions/assignment/{assignment_id}/similar",
+            params={"threshold": threshold, "limit": limit},
+            timeout=60
+        )
+    if similar_response.status_code != 200:
+        raise HTTPException(
+            status_code=similar_response.status_code,
+            detail=f"Failed to compare submissions. {similar_response.text}"
+        )
+
+    return JSONResponse({
+        "message": "Similar submissions retrieved successfully.",
+        **similar_response.json()
+    }, status_code=200)
+
+
+@assignments_router.get(
+    "/{assignment_id}/submissions/export",
+    summary="Export the submissions of an assignment",
+    description="Streams a ZIP archive with the text content and the attachments of all the submissions of the "
+                "assignment. Only the teacher of the assignment can export it."
+)
+async def export_assignment_submissions(assignment_id: str, token: str = Depends(oauth2_scheme)):
+    """
+    Endpoint to download all the submissions of an assignment as a ZIP archive built on the fly.
+    """
+    auth_cache = get_auth_cache()
+    payload = await auth_cache.verify_token(token)
+
+    if not payload.get('id'):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token or user not found."
+        )
+    if payload.get('role') != 'Teacher':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only teachers can export assignment submissions."
+        )
+
+    async with service_client() as client:
+        response = await client.get(f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}")
+        if response.status_code == 404:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Assignment not found."
+            )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"Failed to fetch assignment. {response.text}"
+            )
+        if response.json().get("assignment", {}).get("teacherId") != payload['id']:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You are not the creator of this assignment."
+            )
+
+        subms_response = await client.get(
+            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/submissions/assignment/{assignment_id}"
+        )
+        if subms_response.status_code == 200:
+            submissions = subms_response.json()
+        elif subms_response.status_code == 404:
+            submissions = []
+        else:
+            raise HTTPException(
+                status_code=subms_response.status_code,
+                detail=f"Failed to fetch submissions. {subms_response.text}"
+            )
+
+    return StreamingResponse(
+        stream_submissions_archive(submissions),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="assignment_{assignment_id}_submissions.zip"'}
+    )
+
+
+async def get_known_blobs(content_hashes: List[str]) -> dict[str, str]:
+    """
+    Return the file reference of the contents already stored, keyed by their SHA-256.
+    """
+    async with service_client() as client:
+        response = await client.post(
+            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/attachments/lookup",
+            json={"ContentHashes": content_hashes}
+        )
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Failed to look up attachments. {response.text}"
+        )
+    return {blob["ContentHash"]: blob["FileReference"] for blob in response.json()["Known"]}
+
+
+async def upload_attachments(s3_client, files: List[UploadFile]) -> list[dict]:
+    """
+    Store the submission files content-addressed, under the SHA-256 of their bytes, so identical files
+    are stored once: contents already known to AssignmentSubmissionService are not transferred again.
+    The other files are uploaded to S3 concurrently, in worker threads so the event loop is never blocked.
+    At most S3_UPLOAD_CONCURRENCY files of the request are transferred at the same time.
+    If any upload fails, a 500 error is raised. The files already uploaded are not deleted: their keys are
+    shared with any other submission of the same content, which may be saving a reference to them right now.
+    Unreferenced files are collected later by AssignmentSubmissionService.
+    Every file is first inspected: its type is detected from its magic bytes and its size is checked
+    against the cap of that type, so nothing is sent to S3 if one of the files is rejected.
+    """
+    try:
+        inspections = await asyncio.gather(
+            *(run_in_threadpool(inspect_attachment, file.file, file.filename) for file in files)
+        )
+    except AttachmentRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    known_blobs = await get_known_blobs(list({content_hash for _, content_hash, _ in inspections}))
+
+    # the same content is uploaded once, even if it appears twice in the submission
+    uploads = {}
+    for file, (_, content_hash, _) in zip(files, inspections):
+        if content_hash not in known_blobs:
+            uploads.setdefault(content_hash, file)
+
+    semaphore = asyncio.Semaphore(S3_UPLOAD_CONCURRENCY)
+
+    async def upload(content_hash: str, file: UploadFile) -> str:
+        s3_path = f"{BLOBS_PREFIX}/{content_hash}"
+        async with semaphore:
+            upload_success = await run_in_threadpool(
+                upload_fileobj, s3_client, file.file, BUCKET_NAME, object_name=s3_path
+            )
+        if not upload_success:
+            raise RuntimeError(f"Failed to upload file {file.filename}.")
+        return s3_path
+
+    results = await asyncio.gather(
+        *(upload(content_hash, file) for content_hash, file in uploads.items()), return_exceptions=True
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error uploading files: {errors[0]}"
+        )
+    return [
+        {
+            "FileName": file.filename,
+            "FileType": file_type,
+            "FileReference": known_blobs.get(content_hash, f"{BUCKET_NAME}/{BLOBS_PREFIX}/{content_hash}"),
+            "ContentHash": content_hash,
+            "Size": size
+        }
+        for file, (file_type, content_hash, size) in zip(files, inspections)
+    ]
+
+
+async def get_open_student_assignment(user_id: str, assignment_id: str) -> dict:
+    """
+    Return the membership of the student in the assignment, if the submission deadline has not passed.
+    """
+    # check the enrollment of the user with a single lookup, instead of listing all of their assignments
+    async with service_client() as client:
+        response = await client.get(
+            f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}/students/{user_id}"
+        )
+    if response.status_code == 404:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assignment not found."
+        )
+    if response.status_code != 200:
+        print(f"Failed to check the assignment membership: {response.text}")
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Failed to check the assignment membership of the user. {response.text}"
+        )
+    assignment = response.json()['membership']
+
+    if assignment['status'] != "Open Submission":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Submission deadline has passed."
+        )
+    return assignment
+
+
+def check_attachment_file_names(file_names: List[str]):
+    """
+    Reject file names that are not a plain name, so they cannot address an object outside the
+    student's prefix once joined to it, and names given more than once.
+    """
+    for file_name in file_names:
+        if not ATTACHMENT_FILE_NAME_PATTERN.match(file_name) or file_name in (".", ".."):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid file name {file_name}."
+            )
+    if len(set(file_names)) != len(file_names):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File names must be unique."
+        )
+
+
+def sniff_stored_file_type(s3_client, bucket: str, object_name: str, etag: str = None) -> Union[str, None]:
+    """
+    Detect the FileType of a file already in the storage from its magic bytes, reading only its first chunk,
+    since the content type of the files uploaded directly is declared by the client.
+    With an ETag, only that version of the file is read.
+    """
+    try:
+        s3_object = get_file(
+            s3_client, bucket, object_name, byte_range=f"bytes=0-{INSPECTION_CHUNK_SIZE - 1}", if_match=etag
+        )
+    except ClientError as e:
+        print(f"Error reading the start of {object_name}: {e}")
+        return None
+    try:
+        return sniff_file_type(s3_object["Body"].read())
+    finally:
+        s3_object["Body"].close()
+
+
+async def verify_uploaded_attachments(s3_client, file_names: List[str], assignment_id: str, user_id: str) -> list[dict]:
+    """
+    Check with a HEAD request that the files uploaded directly to the storage exist and respect the limits,
+    and that their first bytes match the declared type, then return their attachment references.
+    The upload keys can be written again with a new upload policy or session, so the checked version of
+    each file, pinned by its ETag, is copied to a key of its own that is never reused, which is referenced instead.
+    """
+    check_attachment_file_names(file_names)
+    semaphore = asyncio.Semaphore(S3_UPLOAD_CONCURRENCY)
+    submitted_prefix = f"{assignment_id}/{user_id}/submitted/{uuid.uuid4().hex}"
+
+    async def verify(file_name: str) -> dict:
+        s3_path = f"{assignment_id}/{user_id}/{file_name}"
+        async with semaphore:
+            metadata = await run_in_threadpool(head_file, s3_client, BUCKET_NAME, s3_path)
+        if metadata is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File {file_name} has not been uploaded."
+            )
+        file_type = ATTACHMENT_CONTENT_TYPES.get(metadata.get("ContentType"))
+        if file_type is None or not 0 < metadata.get("ContentLength", 0) <= ATTACHMENT_SIZE_LIMITS[file_type]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File {file_name} has an unsupported type, is empty or exceeds the maximum size."
+            )
+        async with semaphore:
+            sniffed_type = await run_in_threadpool(
+                sniff_stored_file_type, s3_client, BUCKET_NAME, s3_path, metadata["ETag"]
+            )
+        if sniffed_type != file_type:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail=f"File {file_name} is not a {file_type} file."
+            )
+        submitted_path = f"{submitted_prefix}/{file_name}"
+        async with semaphore:
+            copied = await run_in_threadpool(
+                copy_file, s3_client, BUCKET_NAME, s3_path, submitted_path, metadata["ETag"]
+            )
+        if not copied:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"File {file_name} changed while it was being checked."
+            )
+        return {
+            "FileName": file_name,
+            "FileType": file_type,
+            "FileReference": f"{BUCKET_NAME}/{submitted_path}"
+        }
+
+    results = await asyncio.gather(*(verify(file_name) for file_name in file_names), return_exceptions=True)
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        # the copies are only referenced by this request
+        await delete_attachments(s3_client, [result for result in results if not isinstance(result, BaseException)])
+        raise errors[0]
+    return results
+
+
+async def delete_attachments(s3_client, attachments: list[dict]):
+    """Delete the stored files of attachments that no submission references."""
+    await asyncio.gather(*(
+        run_in_threadpool(delete_file, s3_client, BUCKET_NAME, attachment["FileReference"].split('/', 1)[1])
+        for attachment in attachments
+    ))
+
+
+@assignments_router.post(
+    '/{assignment_id}/submit/upload-urls',
+    summary="Get presigned upload policies for submission attachments",
+    description="Returns, for each file, a presigned POST policy to upload it directly to the submission storage. "
+                "The uploaded files are then referenced by name in the submit request."
+)
+async def get_submission_upload_urls(
+    assignment_id: str,
+    upload_request: pyd_models.AttachmentUploadUrlsRequest,
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Endpoint to obtain presigned POST policies limited to the student's prefix, the file type and size.
+    """
+    auth_cache = get_auth_cache()
+    payload = await auth_cache.verify_token(token)
+
+    if not payload.get('id'):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token or user not found."
+        )
+    if payload.get('role') != 'Student':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only students can submit assignments."
+        )
+    user_id = payload['id']
+
+    check_attachment_file_names([file.fileName for file in upload_request.files])
+    for file in upload_request.files:
+        if file.contentType not in ATTACHMENT_CONTENT_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported content type {file.contentType} for file {file.fileName}."
+            )
+        size_limit = ATTACHMENT_SIZE_LIMITS[ATTACHMENT_CONTENT_TYPES[file.contentType]]
+        if file.size > size_limit:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File {file.fileName} exceeds the maximum size of {size_limit // (1024 * 1024)} MB."
+            )
+
+    await get_open_student_assignment(user_id, assignment_id)
+
+    presign_client = get_s3_presign_client()
+    uploads = []
+    for file in upload_request.files:
+        presigned_post = create_presigned_post(
+            presign_client,
+            BUCKET_NAME,
+            f"{assignment_id}/{user_id}/{file.fileName}",
+            file.contentType,
+            ATTACHMENT_SIZE_LIMITS[ATTACHMENT_CONTENT_TYPES[file.contentType]],
+            S3_PRESIGNED_EXPIRATION_SECONDS
+        )
+        if presigned_post is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to generate the upload policy for file {file.fileName}."
+            )
+        uploads.append({
+            "fileName": file.fileName,
+            "url": presigned_post["url"],
+            "fields": presigned_post["fields"]
+        })
+
+    return JSONResponse({
+        "message": "Upload policies generated successfully.",
+        "expiresIn": S3_PRESIGNED_EXPIRATION_SECONDS,
+        "uploads": uploads
+    }, status_code=200)
+
+
+async def get_student_upload_session(user_id: str, assignment_id: str, session_id: str) -> dict:
+    """
+    Return the upload session if it belongs to the student and the assignment, and it is still in progress.
+    """
+    async with service_client() as client:
+        response = await client.get(
+            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/upload-sessions/{session_id}"
+        )
+    if response.status_code == 404:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found."
+        )
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Failed to fetch upload session. {response.text}"
+        )
+    session = response.json()
+    if session['StudentID'] != user_id or session['AssignmentID'] != assignment_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found."
+        )
+    if session['Status'] != 'in_progress':
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload session is {session['Status']}."
+        )
+    return session
+
+
+def upload_session_summary(session: dict) -> dict:
+    """Describe an upload session to the client, with the parts still to be sent."""
+    part_count = -(-session['Size'] // session['PartSize'])
+    uploaded_parts = [part['PartNumber'] for part in session['Parts']]
+    return {
+        "sessionId": session['id'],
+        "fileName": session['FileName'],
+        "size": session['Size'],
+        "partSize": session['PartSize'],
+        "partCount": part_count,
+        "uploadedParts": uploaded_parts,
+        "missingParts": sorted(set(range(1, part_count + 1)) - set(uploaded_parts)),
+        "status": session['Status']
+    }
+
+
+async def get_upload_user_id(token: str) -> str:
+    """Return the ID of the student uploading, from the JWT token."""
+    auth_cache = get_auth_cache()
+    payload = await auth_cache.verify_token(token)
+
+    if not payload.get('id'):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token or user not found."
+        )
+    if payload.get('role') != 'Student':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only students can submit assignments."
+        )
+    return payload['id']
+
+
+@assignments_router.post(
+    '/{assignment_id}/submit/uploads',
+    summary="Start a resumable upload of a submission attachment",
+    description="Starts a multipart upload of a large attachment. The parts can then be sent in any order and in "
+                "parallel, and only the missing ones need to be sent again after a dropped connection. "
+                "Once completed, the file is referenced by name in the submit request."
+)
+async def start_upload_session(
+    assignment_id: str,
+    upload_file: pyd_models.AttachmentUploadFile,
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Endpoint to start a resumable upload session, tracked by AssignmentSubmissionService.
+    """
+    user_id = await get_upload_user_id(token)
+
+    check_attachment_file_names([upload_file.fileName])
+    if upload_file.contentType not in ATTACHMENT_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported content type {upload_file.contentType} for file {upload_file.fileName}."
         )
-        
-        if pr_response.status_code == 200:
-            pr_assignment_data = pr_response.json()['peer_review']
-            pr_assignment_data['Rubric'] = pr_response.json()['rubric']
-        elif pr_response.status_code == 404:
-            pr_assignment_data = None
-        else:
-            print(f"Failed to fetch peer review assignment: {pr_response.text}")
-            raise HTTPException(
-                status_code=pr_response.status_code,
-                detail=f"Failed to fetch peer review assignment. {pr_response.text}"
-            )
-        
-        subms_response = await client.get(
-            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/submissions/assignment/{assignment_id}"
+    size_limit = ATTACHMENT_SIZE_LIMITS[ATTACHMENT_CONTENT_TYPES[upload_file.contentType]]
+    if upload_file.size > size_limit or upload_file.size > UPLOAD_PART_SIZE * MAX_UPLOAD_PARTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File {upload_file.fileName} exceeds the maximum size of {size_limit // (1024 * 1024)} MB."
         )
 
-        if subms_response.status_code == 200:
-            submissions_data = subms_response.json()
-        elif subms_response.status_code == 404:
-            submissions_data = []
-        else:
-            print(f"Failed to fetch submissions: {subms_response.text}")
-            raise HTTPException(
-                status_code=subms_response.status_code,
-                detail=f"Failed to fetch submissions. {subms_response.text}"
-            )
+    await get_open_student_assignment(user_id, assignment_id)
 
-        return JSONResponse({
-            "message": "Assignment retrieved",
-            "assignment": assignment_data,
-            "peerReviewAssignment": pr_assignment_data,
-            "submissions": submissions_data
-        }, status_code=200)
-    
+    object_name = f"{assignment_id}/{user_id}/{upload_file.fileName}"
+    await run_in_threadpool(ensure_bucket, BUCKET_NAME)
+    upload_id = await run_in_threadpool(
+        create_multipart_upload, get_s3_client(), BUCKET_NAME, object_name, upload_file.contentType
+    )
+    if upload_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start the upload of file {upload_file.fileName}."
+        )
+
+    async with service_client() as client:
+        response = await client.post(
+            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/upload-sessions",
+            json={
+                "AssignmentID": assignment_id,
+                "StudentID": user_id,
+                "FileName": upload_file.fileName,
+                "ContentType": upload_file.contentType,
+                "Size": upload_file.size,
+                "PartSize": UPLOAD_PART_SIZE,
+                "ObjectKey": object_name,
+                "UploadID": upload_id
+            }
+        )
+    if response.status_code != 201:
+        await run_in_threadpool(abort_multipart_upload, get_s3_client(), BUCKET_NAME, object_name, upload_id)
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Failed to save upload session. {response.text}"
+        )
+
+    return JSONResponse(upload_session_summary(response.json()), status_code=201)
 
 
 @assignments_router.get(
-    "/{assignment_id}/submissions",
+    '/{assignment_id}/submit/uploads/{session_id}',
+    summary="Get the state of a resumable upload",
+    description="Returns the parts already uploaded and the ones still missing."
 )
-async def get_assignment_submissions(assignment_id: str, token: str = Depends(oauth2_scheme)):
+async def get_upload_session(assignment_id: str, session_id: str, token: str = Depends(oauth2_scheme)):
     """
-    Endpoint to get all submissions for a specific assignment.
+    Endpoint to resume an upload: only the missing parts need to be sent.
     """
-    auth_cache = get_auth_cache()
-    payload = await auth_cache.verify_token(token)
+    user_id = await get_upload_user_id(token)
+    session = await get_student_upload_session(user_id, assignment_id, session_id)
+    return JSONResponse(upload_session_summary(session), status_code=200)
 
-    if not payload.get('id'):
+
+@assignments_router.put(
+    '/{assignment_id}/submit/uploads/{session_id}/parts/{part_number}',
+    summary="Upload a part of a resumable upload",
+    description="The request body is the raw content of the part. Every part but the last one must be exactly "
+                "partSize bytes long. Parts can be sent in parallel and sent again."
+)
+async def upload_session_part(
+    assignment_id: str,
+    session_id: str,
+    part_number: int,
+    request: Request,
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Endpoint to upload a part to the storage and record it in the upload session.
+    """
+    user_id = await get_upload_user_id(token)
+    session = await get_student_upload_session(user_id, assignment_id, session_id)
+
+    part_count = -(-session['Size'] // session['PartSize'])
+    if not 1 <= part_number <= part_count:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token or user not found."
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Part number must be between 1 and {part_count}."
         )
-    
-    if not payload.get('role') and payload['role'] != 'Teacher':
+    expected_size = session['PartSize'] if part_number < part_count else session['Size'] - session['PartSize'] * (part_count - 1)
+
+    # the part is read up to its expected size, a longer body is rejected without reading it all
+    data = bytearray()
+    async for chunk in request.stream():
+        data += chunk
+        if len(data) > expected_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Part {part_number} must be {expected_size} bytes long."
+            )
+    if len(data) != expected_size:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only teachers can get assignment submissions."
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Part {part_number} must be {expected_size} bytes long."
         )
 
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/submissions/assignment/{assignment_id}"
+    etag = await run_in_threadpool(
+        upload_part, get_s3_client(), BUCKET_NAME, session['ObjectKey'], session['UploadID'], part_number, bytes(data)
+    )
+    if etag is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload part {part_number}."
+        )
+
+    async with service_client() as client:
+        response = await client.put(
+            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/upload-sessions/{session_id}/parts/{part_number}",
+            json={"ETag": etag, "Size": expected_size}
         )
-    
     if response.status_code != 200:
         raise HTTPException(
             status_code=response.status_code,
-            detail=f"Failed to fetch submissions. {response.text}"
+            detail=f"Failed to record part {part_number}. {response.text}"
         )
 
-    submissions = response.json()
-    
-    return JSONResponse({
-        "message": "Submissions retrieved successfully.",
-        "submissions": submissions
-    }, status_code=200)
+    return JSONResponse(upload_session_summary(response.json()), status_code=200)
 
 
-@assignments_router.get(
-    "/{assignment_id}/submission"
+@assignments_router.post(
+    '/{assignment_id}/submit/uploads/{session_id}/complete',
+    summary="Complete a resumable upload",
+    description="Assembles the uploaded parts into the file, which can then be referenced by name in the submit request."
 )
-async def get_assignment_submission(token: str = Depends(oauth2_scheme), assignment_id: str = None):
+async def complete_upload_session(assignment_id: str, session_id: str, token: str = Depends(oauth2_scheme)):
     """
-    Endpoint to get the student's submission of an assignment. It uses the JWT token to identify the student.
+    Endpoint to complete a resumable upload once all its parts have been uploaded.
     """
-    auth_cache = get_auth_cache()
-    payload = await auth_cache.verify_token(token)
-
-    if not payload.get('id'):
+    user_id = await get_upload_user_id(token)
+    session = await get_student_upload_session(user_id, assignment_id, session_id)
+    summary = upload_session_summary(session)
+    if summary['missingParts']:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token or user not found."
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Parts {summary['missingParts']} have not been uploaded yet."
         )
-    if not payload.get('role') and payload['role'] != 'Student':
+
+    completed = await run_in_threadpool(
+        complete_multipart_upload, get_s3_client(), BUCKET_NAME, session['ObjectKey'], session['UploadID'],
+        [(part['PartNumber'], part['ETag']) for part in session['Parts']]
+    )
+    if not completed:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only students can get assignment submissions."
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to complete the upload of file {session['FileName']}."
+        )
+
+    # the content type was declared by the client, the assembled file is discarded if it does not match
+    file_type = ATTACHMENT_CONTENT_TYPES[session['ContentType']]
+    sniffed_type = await run_in_threadpool(sniff_stored_file_type, get_s3_client(), BUCKET_NAME, session['ObjectKey'])
+    if sniffed_type != file_type:
+        await run_in_threadpool(delete_file, get_s3_client(), BUCKET_NAME, session['ObjectKey'])
+        async with service_client() as client:
+            await client.patch(
+                f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/upload-sessions/{session_id}",
+                json={"Status": "aborted"}
+            )
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"File {session['FileName']} is not a {file_type} file."
         )
 
-    user_id = payload['id']
-    
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/submission",
-            params={
-                "assignment_id": assignment_id,
-                "student_id": user_id
-            }
+    async with service_client() as client:
+        response = await client.patch(
+            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/upload-sessions/{session_id}",
+            json={"Status": "completed"}
         )
     if response.status_code != 200:
         raise HTTPException(
             status_code=response.status_code,
-            detail=f"Failed to fetch submission. {response.text}"
+            detail=f"Failed to close upload session. {response.text}"
         )
 
-    submission = response.json()
-    if not submission:
+    return JSONResponse(upload_session_summary(response.json()), status_code=200)
+
+
+@assignments_router.delete(
+    '/{assignment_id}/submit/uploads/{session_id}',
+    summary="Abort a resumable upload",
+    description="Discards the parts uploaded so far."
+)
+async def abort_upload_session(assignment_id: str, session_id: str, token: str = Depends(oauth2_scheme)):
+    """
+    Endpoint to abort a resumable upload.
+    """
+    user_id = await get_upload_user_id(token)
+    session = await get_student_upload_session(user_id, assignment_id, session_id)
+
+    await run_in_threadpool(
+        abort_multipart_upload, get_s3_client(), BUCKET_NAME, session['ObjectKey'], session['UploadID']
+    )
+    async with service_client() as client:
+        response = await client.patch(
+            f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/upload-sessions/{session_id}",
+            json={"Status": "aborted"}
+        )
+    if response.status_code != 200:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Submission not found."
+            status_code=response.status_code,
+            detail=f"Failed to close upload session. {response.text}"
         )
 
-    return JSONResponse({
-        "message": "Submission retrieved successfully.",
-        "submission": submission
-    }, status_code=200)
+    return JSONResponse(upload_session_summary(response.json()), status_code=200)
 
 
 @assignments_router.post(
     '/{assignment_id}/submit',
     summary="Submit an assignment",
-    description="Submit an assignment with real files instead of references."
+    description="Submit an assignment with real files, or with the names of the files already uploaded "
+                "through the presigned upload policies."
 )
 async def submit_assignment(
     assignment_id: str,
     text_content: str = Form(...),
     files: List[UploadFile] = Form(None),  # Reso opzionale per testare il problema
+    uploaded_files: List[str] = Form(None),
     token: str = Depends(oauth2_scheme)
 ):
     """
-    Endpoint to submit an assignment with real files.
+    Endpoint to submit an assignment with real files or with references to directly uploaded files.
     """
 
     auth_cache = get_auth_cache()
@@ -417,35 +1454,7 @@ async def submit_assignment(
         )
 
 
-    # get assignments of the user
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            f"{ASSIGNMENT_SERIVICE_URL}/assignments/student/{user_id}"
-        )
-        if response.status_code != 200:
-            print(f"Failed to fetch assignments: {response.text}")
-            raise HTTPException(
-                status_code=response.status_code,
-                detail=f"Failed to fetch assignments of the user. {response.text}"
-            )
-        ass_list = response.json()['assignments']
-        # check that assignment_id is the id of one of the objects in the list
-        assignment = None
-        for a in ass_list:
-            if a['id'] == assignment_id:
-                assignment = a
-                break
-        if assignment is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Assignment not found."
-            )
-
-    if 'submissionDeadline' in assignment and isoparse(assignment['submissionDeadline']) < datetime.now():
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Submission deadline has passed."
-        )
+    await get_open_student_assignment(user_id, assignment_id)
         
     # Prepare the payload for AssignmentSubmissionService
     submission_payload = {
@@ -454,51 +1463,33 @@ async def submit_assignment(
         "StudentID": user_id
     }
 
+    attachments = []
+    uploaded_attachments = []
+    if uploaded_files:
+        # the files were uploaded directly to the storage, only check and copy them and record their references
+        uploaded_attachments = await verify_uploaded_attachments(get_s3_client(), uploaded_files, assignment_id, user_id)
+        attachments += uploaded_attachments
+
     if files:
         # Process files and upload them to submission file storage
-        client = create_s3_client()
-        create_bucket(client, BUCKET_NAME)
-        attachments = []
-        for file in files:
-            s3_path = f"{assignment_id}/{user_id}/{file.filename}"
-            file_reference = f"{BUCKET_NAME}/{s3_path}"
-            try:
-                # Upload the file to S3
-                upload_success = upload_fileobj(
-                    client,
-                    file.file,
-                    BUCKET_NAME,
-                    object_name=s3_path
-                )
-                attachments.append({
-                    "FileName": file.filename,
-                    "FileType": file.content_type.split('/')[-1].upper(),
-                    "FileReference": file_reference
-                })
-                if not upload_success:
-                    # delete the already uploaded file(s)
-                    for attachment in attachments:
-                        delete_file(client, BUCKET_NAME, attachment["FileName"])
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail=f"Failed to upload file {file.filename}."
-                    )
-            except Exception as e:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Error uploading file {file.filename}: {str(e)}"
-                )
+        # no-op once the bucket has been provisioned at startup
+        await run_in_threadpool(ensure_bucket, BUCKET_NAME)
+        attachments += await upload_attachments(get_s3_client(), files)
+
+    if attachments:
         submission_payload["Attachments"] = attachments
 
 
     # Send the data to AssignmentSubmissionService
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         response = await client.post(
             f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/",
             json=submission_payload
         )
 
         if response.status_code != 201:
+            if uploaded_attachments:
+                await delete_attachments(get_s3_client(), uploaded_attachments)
             raise HTTPException(
                 status_code=response.status_code,
                 detail=f"Failed to submit assignment. {response.text}"
@@ -541,7 +1532,7 @@ async def peer_review_get(
     user_id, user_role = payload['id'], payload['role']
     
     # get Peer Review data
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         pr_response = await client.get(
             f"{REVIEW_ASSIGNMENT_SERVICE_URL}/api/v1/review-assignment/assignment/{assignment_id}"
         )
@@ -559,7 +1550,7 @@ async def peer_review_get(
     rubric_data = pr_response.json()['rubric']
     
     # get assignment data
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         assignment_response = await client.get(
             f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}"
         )
@@ -592,7 +1583,7 @@ async def peer_review_get(
         
         # If submission_id is provided, check if the student is allowed to see it
         if submission_id:
-            async with httpx.AsyncClient() as client:
+            async with service_client() as client:
                 submission_response = await client.get(
                     f"{ASSIGNMENT_SUBM_SERVICE_URL}/assignments-submissions/by-submission-id/{submission_id}"
                 )
@@ -658,7 +1649,7 @@ async def peer_review_create(
     
     # check if peer review already exists for this assignment
 
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         pr_exists_response = await client.get(
             f"{REVIEW_ASSIGNMENT_SERVICE_URL}/api/v1/review-assignment/assignment/{assignment_id}"
         )
@@ -724,7 +1715,7 @@ async def peer_review_create(
         "Rubric": pr_new.Rubric.model_dump(mode="json")
     }
     
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         response = await client.post(f"{REVIEW_ASSIGNMENT_SERVICE_URL}/api/v1/review-assignment/",
                                      json=peer_review_payload)
         if response.status_code != 201:
@@ -759,7 +1750,7 @@ async def peer_review_create(
             detail="Only Students can have pairings in Peer Reviews" 
         )
     
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         peer_review_resp = await client.get(
             f"{REVIEW_ASSIGNMENT_SERVICE_URL}/api/v1/review-assignment/assignment/{assignment_id}"
         )
@@ -825,7 +1816,7 @@ async def submit_peer_review(
         )
         
     # send pairing to the ReviewAssignmentService
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         resp = await client.post(
             f"{REVIEW_ASSIGNMENT_SERVICE_URL}/api/v1/review-assignment/submit",
             json=peer_review_data.model_dump(mode="json")
@@ -871,7 +1862,7 @@ async def update_assignment(
     teacher_id = payload['id']
 
     # Fetch the assignment to verify ownership
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         response = await client.get(f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}")
         if response.status_code == 404:
             raise HTTPException(
@@ -893,7 +1884,7 @@ async def update_assignment(
         )
 
     # Forward the PATCH request to the AssignmentService
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         patch_response = await client.patch(
             f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}",
             json=updates.model_dump(exclude_unset=True, mode="json")
@@ -914,6 +1905,137 @@ async def update_assignment(
     )
     
 
+async def check_assignment_owner(token: str, assignment_id: str):
+    """
+    Check that the token belongs to the teacher who created the assignment.
+    """
+    auth_cache = get_auth_cache()
+    payload = await auth_cache.verify_token(token)
+
+    if not payload.get('id') or payload.get('role') != 'Teacher':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only teachers can update assignments."
+        )
+
+    async with service_client() as client:
+        response = await client.get(f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}")
+    if response.status_code == 404:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Assignment not found."
+        )
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Failed to fetch assignment. {response.text}"
+        )
+    if response.json().get("assignment", {}).get("teacherId") != payload['id']:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not the creator of this assignment."
+        )
+
+
+def forward_roster_change(response: httpx.Response) -> JSONResponse:
+    if response.status_code != 200:
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"Failed to update the students of the assignment. {response.text}"
+        )
+    return JSONResponse(response.json(), status_code=200)
+
+
+@assignments_router.post(
+    "/{assignment_id}/students",
+    summary="Add students to an assignment",
+    description="Allows the teacher who created an assignment to enroll more students, skipping the ones already enrolled.",
+    responses={
+        200: {"description": "Students enrolled"},
+        403: {"model": pyd_models.ErrorResponse, "description": "Only the creator of the assignment can update it."},
+        404: {"model": pyd_models.ErrorResponse, "description": "Assignment not found."}
+    }
+)
+async def add_assignment_students(
+    assignment_id: str,
+    request: pyd_models.StudentIdsRequest,
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Enroll students in an assignment, sending only the students to add instead of the whole roster.
+    """
+    await check_assignment_owner(token, assignment_id)
+    async with service_client() as client:
+        response = await client.post(
+            f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}/students",
+            json=request.model_dump(mode="json")
+        )
+    return forward_roster_change(response)
+
+
+@assignments_router.post(
+    "/{assignment_id}/students/remove",
+    summary="Remove students from an assignment",
+    description="Allows the teacher who created an assignment to remove students from it.",
+    responses={
+        200: {"description": "Students removed"},
+        403: {"model": pyd_models.ErrorResponse, "description": "Only the creator of the assignment can update it."},
+        404: {"model": pyd_models.ErrorResponse, "description": "Assignment not found."}
+    }
+)
+async def remove_assignment_students(
+    assignment_id: str,
+    request: pyd_models.StudentIdsRequest,
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Remove students from an assignment, sending only the students to remove instead of the whole roster.
+    """
+    await check_assignment_owner(token, assignment_id)
+    async with service_client() as client:
+        response = await client.post(
+            f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}/students/remove",
+            json=request.model_dump(mode="json")
+        )
+    return forward_roster_change(response)
+
+
+@assignments_router.post(
+    "/{assignment_id}/students/csv",
+    summary="Add or remove students from a CSV file",
+    description="Allows the teacher who created an assignment to enroll (action=add) or remove (action=remove) "
+                "the students listed in a CSV body, with one student ID in the first column of each row.",
+    responses={
+        200: {"description": "Students enrolled or removed"},
+        403: {"model": pyd_models.ErrorResponse, "description": "Only the creator of the assignment can update it."},
+        404: {"model": pyd_models.ErrorResponse, "description": "Assignment not found."}
+    }
+)
+async def update_assignment_students_from_csv(
+    assignment_id: str,
+    request: Request,
+    action: str = "add",
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Stream a CSV of student IDs to the Assignment Service as it is received, without buffering the file.
+    """
+    if action not in ("add", "remove"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="The action must be add or remove."
+        )
+    await check_assignment_owner(token, assignment_id)
+    async with service_client(timeout=httpx.Timeout(10.0, read=None, write=None)) as client:
+        response = await client.post(
+            f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}/students/csv",
+            params={"action": action},
+            content=request.stream(),
+            headers={"Content-Type": "text/csv"}
+        )
+    return forward_roster_change(response)
+    
+
 class UpdatePeerReviewRequest(BaseModel):
     AssignmentID: str = None
     NumberOfReviewersPerSubmission: int = None
@@ -943,7 +2065,7 @@ async def close_peer_review(
         )
         
     # check if assignment exists and teacher created it
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         assign_response = await client.get(f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}")
         if assign_response.status_code == 404:
             raise HTTPException(
@@ -963,7 +2085,7 @@ async def close_peer_review(
         )
 
     # check if the peer review exists is of this assignment
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         pr_response = await client.get(
             f"{REVIEW_ASSIGNMENT_SERVICE_URL}/api/v1/review-assignment/assignment/{assignment_id}"
         )
@@ -987,7 +2109,7 @@ async def close_peer_review(
         )
 
     # Forward the request to the ReviewAssignmentService
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         patch_response = await client.patch(
             f"{REVIEW_ASSIGNMENT_SERVICE_URL}/api/v1/review-assignment/{peer_review_data['id']}",
             json=updates.model_dump(exclude_unset=True, mode="json")
@@ -1026,7 +2148,7 @@ async def start_compute_results(
         )
     
     # check if assignment exists and teacher created it
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         assign_response = await client.get(f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}")
         if assign_response.status_code == 404:
             raise HTTPException(
@@ -1047,7 +2169,7 @@ async def start_compute_results(
         )
 
     # check if the peer review exists is of this assignment
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         pr_response = await client.get(
             f"{REVIEW_ASSIGNMENT_SERVICE_URL}/api/v1/review-assignment/assignment/{assignment_id}"
         )
@@ -1081,13 +2203,13 @@ async def start_compute_results(
 
     pairings = {"Pairings": pairings}
 
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         compute_response = await client.post(
             f"{REVIEW_PROCESSING_SERVICE_URL}/api/v1/processing/calculate_statistics/",
             params={
                 "assignment_id": assignment_id
             },
-            json=pairings
+            **service_body(pairings)
         )
 
         if compute_response.status_code != 200:
@@ -1130,7 +2252,7 @@ async def get_peer_review_results(
         )
 
     # check if assignment exists and student is enrolled in it
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         assign_response = await client.get(f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}")
         if assign_response.status_code == 404:
             raise HTTPException(
@@ -1142,16 +2264,23 @@ async def get_peer_review_results(
                 status_code=assign_response.status_code,
                 detail=f"Failed to fetch assignment. {assign_response.text}"
             )
-        assignment_data = assign_response.json().get("assignment", {})
-    
-    if payload['id'] not in assignment_data.get('involvedStudentIds', []):
+        membership_response = await client.get(
+            f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}/students/{payload['id']}"
+        )
+
+    if membership_response.status_code == 404:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not enrolled in this assignment."
         )
+    elif membership_response.status_code != 200:
+        raise HTTPException(
+            status_code=membership_response.status_code,
+            detail=f"Failed to check the enrollment. {membership_response.text}"
+        )
 
     # get pr of this assignment
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         pr_response = await client.get(
             f"{REVIEW_ASSIGNMENT_SERVICE_URL}/api/v1/review-assignment/assignment/{assignment_id}"
         )
@@ -1169,7 +2298,7 @@ async def get_peer_review_results(
     peer_review_data = pr_response.json()['peer_review']
     
     # get results
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         by_submission_results = await client.get(
             f"{REVIEW_PROCESSING_SERVICE_URL}/api/v1/processing/aggregated-by-submission/{submission_id}"
         )
@@ -1185,7 +2314,7 @@ async def get_peer_review_results(
             )
     by_submission_results = by_submission_results.json()
     
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         by_review_results = await client.get(
             f"{REVIEW_PROCESSING_SERVICE_URL}/api/v1/processing/aggregated-by-review/{submission_id}"
         )
@@ -1235,7 +2364,7 @@ async def get_peer_review_results(
         )
 
     # check if assignment exists and teacher is creator of it
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         assign_response = await client.get(f"{ASSIGNMENT_SERIVICE_URL}/assignments/{assignment_id}")
         if assign_response.status_code == 404:
             raise HTTPException(
@@ -1256,7 +2385,7 @@ async def get_peer_review_results(
         )
 
     # get pr of this assignment
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         pr_response = await client.get(
             f"{REVIEW_ASSIGNMENT_SERVICE_URL}/api/v1/review-assignment/assignment/{assignment_id}"
         )
@@ -1287,41 +2416,45 @@ async def get_peer_review_results(
             )
     submissions_ids = [sub['id'] for sub in submissions_data]
     by_sub_data = []
-    # get results
-    async with httpx.AsyncClient() as client:
-        for submission_id in submissions_ids:
-            by_submission_results = await client.get(
-                f"{REVIEW_PROCESSING_SERVICE_URL}/api/v1/processing/aggregated-by-submission/{submission_id}"
+    by_review_results = []
+    # get results and reviews of all the submissions of the assignment, a batch of submissions at a time
+    async with service_client() as client:
+        for start in range(0, len(submissions_ids), SERVICE_BATCH_SIZE):
+            batch_ids = submissions_ids[start:start + SERVICE_BATCH_SIZE]
+            by_submission_results = await client.post(
+                f"{REVIEW_PROCESSING_SERVICE_URL}/api/v1/processing/aggregated-by-submission/batch",
+                **service_body({"SubmissionIDs": batch_ids})
             )
-            if by_submission_results.status_code == 404:
+            if by_submission_results.status_code != 200:
+                raise HTTPException(
+                    status_code=by_submission_results.status_code,
+                    detail=f"Failed to fetch peer review results. {by_submission_results.text}"
+                )
+            if by_submission_results.json()["Missing"]:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="No results by submission found for this assignment."
                 )
-            elif by_submission_results.status_code != 200:
+            results = by_submission_results.json()["Results"]
+            by_sub_data.extend(results[batch_id] for batch_id in dict.fromkeys(batch_ids))
+
+            by_review_batch = await client.post(
+                f"{REVIEW_PROCESSING_SERVICE_URL}/api/v1/processing/aggregated-by-review/batch",
+                **service_body({"SubmissionIDs": batch_ids})
+            )
+            if by_review_batch.status_code != 200:
                 raise HTTPException(
-                    status_code=by_submission_results.status_code,
-                    detail=f"Failed to fetch peer review results. {by_submission_results.text}"
+                    status_code=by_review_batch.status_code,
+                    detail=f"Failed to fetch peer review results. {by_review_batch.text}"
                 )
-            by_sub_data.append(by_submission_results.json())
-    
-    async with httpx.AsyncClient() as client:
-        by_review_results = await client.get(
-            f"{REVIEW_PROCESSING_SERVICE_URL}/api/v1/processing/aggregated-by-review/{submission_id}"
+            by_review_results.extend(by_review_batch.json()["Results"])
+    if not by_review_results:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No review results found for this assignment."
         )
-        if by_review_results.status_code == 404:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No review results found for this assignment."
-            )
-        elif by_review_results.status_code != 200:
-            raise HTTPException(
-                status_code=by_review_results.status_code,
-                detail=f"Failed to fetch peer review results. {by_review_results.text}"
-            )
-    by_review_results = by_review_results.json()
     
-    async with httpx.AsyncClient() as client:
+    async with service_client() as client:
         by_assign_result = await client.get(
             f"{REVIEW_PROCESSING_SERVICE_URL}/api/v1/processing/aggregated-by-assignment/{assignment_id}"
         )
@@ -55,7 +55,7 @@ class AssignmentResponse(BaseModel):
     description: str = Field(..., description="Description of the assignment")
     submissonDeadline: datetime = Field(..., description="Submission deadline for the assignment in ISO format")
     teacherId: str = Field(..., description="ID of the teacher who created the assignment")
-    involvedStudentIds: List[str] = Field(..., description="List of student IDs involved in the assignment")
+    studentCount: int = Field(..., description="Number of students involved in the assignment")
     lastModifiedDate: datetime = Field(..., description="Last modified date for the assignment in ISO format")
     createdDate: datetime = Field(..., description="Creation date for the assignment in ISO format")
     
@@ -67,7 +67,7 @@ class AssignmentResponse(BaseModel):
                 "description": "Students will review each other's code submissions and provide constructive feedback.",
                 "submissonDeadline": "2024-12-31T23:59:59Z",
                 "teacherId": "teacher_id_456",
-                "involvedStudentIds": ["student_id_1", "student_id_2", "student_id_3"],
+                "studentCount": 3,
                 "lastModifiedDate": "2024-01-15T10:30:00Z",
                 "createdDate": "2024-01-15T10:30:00Z"
             }
@@ -91,7 +91,7 @@ class AssignmentCreateResponse(BaseModel):
                     "description": "Students will review each other's code submissions and provide constructive feedback.",
                     "submissonDeadline": "2024-12-31T23:59:59Z",
                     "teacherId": "teacher_id_456",
-                    "involvedStudentIds": ["student_id_1", "student_id_2", "student_id_3"],
+                    "studentCount": 3,
                     "lastModifiedDate": "2024-01-15T10:30:00Z",
                     "createdDate": "2024-01-15T10:30:00Z"
                 }
@@ -117,7 +117,7 @@ class AssignmentListResponse(BaseModel):
                         "description": "Students will review each other's code submissions and provide constructive feedback.",
                         "submissonDeadline": "2024-12-31T23:59:59Z",
                         "teacherId": "teacher_id_456",
-                        "involvedStudentIds": ["student_id_1", "student_id_2", "student_id_3"],
+                        "studentCount": 3,
                         "lastModifiedDate": "2024-01-15T10:30:00Z",
                         "createdDate": "2024-01-15T10:30:00Z"
                     }
@@ -126,6 +126,45 @@ class AssignmentListResponse(BaseModel):
         }
 
 
+class AttachmentUploadFile(BaseModel):
+    """
+    Describes a file the student is going to upload directly to the submission storage.
+    """
+    fileName: str = Field(..., min_length=1, max_length=255, pattern=r"^[^/\\]+$", description="Name of the file, without path")
+    contentType: str = Field(..., description="MIME type of the file")
+    size: int = Field(..., gt=0, description="Size of the file in bytes")
+
+
+class AttachmentUploadUrlsRequest(BaseModel):
+    """
+    Represents the request body for obtaining presigned upload policies for submission attachments.
+    """
+    files: List[AttachmentUploadFile] = Field(..., min_items=1, description="Files to upload")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "files": [
+                    {"fileName": "report.pdf", "contentType": "application/pdf", "size": 120345}
+                ]
+            }
+        }
+
+
+class StudentIdsRequest(BaseModel):
+    """
+    Represents the students to add to or remove from an assignment.
+    """
+    studentIds: List[str] = Field(..., min_items=1, description="List of student IDs")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "studentIds": ["student_id_4", "student_id_5"]
+            }
+        }
+
+
 class ErrorResponse(BaseModel):
     """
     Represents the response structure for error cases.
@@ -0,0 +1,140 @@
+import codecs
+import hashlib
+import threading
+from os import getenv
+from typing import Optional
+
+
+# size cap of the attachments, can be lowered or raised per file type
+MAX_ATTACHMENT_SIZE_MB = int(getenv("MAX_ATTACHMENT_SIZE_MB", "20"))
+ATTACHMENT_SIZE_LIMITS = {
+    "PDF": int(getenv("MAX_PDF_SIZE_MB", str(MAX_ATTACHMENT_SIZE_MB))) * 1024 * 1024,
+    "TXT": int(getenv("MAX_TXT_SIZE_MB", str(MAX_ATTACHMENT_SIZE_MB))) * 1024 * 1024,
+    "JPG": int(getenv("MAX_JPG_SIZE_MB", str(MAX_ATTACHMENT_SIZE_MB))) * 1024 * 1024,
+}
+# content types accepted for the attachments, mapped to the FileType of the submission
+ATTACHMENT_CONTENT_TYPES = {
+    "application/pdf": "PDF",
+    "text/plain": "TXT",
+    "image/jpeg": "JPG",
+}
+# size of the chunks read while inspecting an attachment
+INSPECTION_CHUNK_SIZE = 64 * 1024
+
+MAGIC_NUMBERS = (
+    (b"%PDF-", "PDF"),
+    (b"\xff\xd8\xff", "JPG"),
+)
+
+
+def sniff_file_type(first_chunk: bytes) -> Optional[str]:
+    """
+    Return the FileType matching the magic bytes at the start of a file, or None if it is not supported.
+    Files without a known signature are accepted as TXT if they look like UTF-8 text.
+    """
+    for magic_number, file_type in MAGIC_NUMBERS:
+        if first_chunk.startswith(magic_number):
+            return file_type
+    if b"\x00" in first_chunk:
+        return None
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(first_chunk, final=False)
+    except UnicodeDecodeError:
+        return None
+    return "TXT"
+
+
+class AttachmentRejected(Exception):
+    """
+    Raised when an attachment is empty, has an unsupported type or exceeds the size cap of its type.
+    """
+
+    def __init__(self, status_code: int, reason: str, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.reason = reason
+        self.detail = detail
+
+
+class AttachmentMetrics:
+    """
+    Counters of the inspected attachments, shared by all requests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.accepted_files = 0
+        self.accepted_bytes = 0
+        self.rejected_files: dict[str, int] = {}
+        self.rejected_bytes = 0
+
+    def accepted(self, size: int):
+        with self._lock:
+            self.accepted_files += 1
+            self.accepted_bytes += size
+
+    def rejected(self, reason: str, size: int):
+        with self._lock:
+            self.rejected_files[reason] = self.rejected_files.get(reason, 0) + 1
+            self.rejected_bytes += size
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "acceptedFiles": self.accepted_files,
+                "acceptedBytes": self.accepted_bytes,
+                "rejectedFiles": dict(self.rejected_files),
+                "rejectedBytes": self.rejected_bytes,
+            }
+
+
+_attachment_metrics = AttachmentMetrics()
+
+
+def get_attachment_metrics() -> AttachmentMetrics:
+    return _attachment_metrics
+
+
+def _reject(file_obj, reason: str, status_code: int, detail: str):
+    # the whole file is kept out of the storage, not only the part read so far
+    file_obj.seek(0, 2)
+    _attachment_metrics.rejected(reason, file_obj.tell())
+    raise AttachmentRejected(status_code, reason, detail)
+
+
+def inspect_attachment(file_obj, file_name: str) -> tuple[str, str, int]:
+    """
+    Read an attachment chunk by chunk, detecting its type from the magic bytes of the first chunk
+    and stopping as soon as the size cap of that type is exceeded.
+    Return the FileType, the SHA-256 and the size of the file, which is rewound for the upload.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    file_obj.seek(0)
+    chunk = file_obj.read(INSPECTION_CHUNK_SIZE)
+    if not chunk:
+        _reject(file_obj, "empty", 400, f"File {file_name} is empty.")
+    file_type = sniff_file_type(chunk)
+    if file_type is None:
+        _reject(file_obj, "unsupported_type", 415, f"File {file_name} is not a PDF, TXT or JPG file.")
+    size_limit = ATTACHMENT_SIZE_LIMITS[file_type]
+    text_decoder = codecs.getincrementaldecoder("utf-8")() if file_type == "TXT" else None
+
+    while chunk:
+        size += len(chunk)
+        if size > size_limit:
+            _reject(
+                file_obj, "too_large", 413,
+                f"File {file_name} exceeds the maximum size of {size_limit // (1024 * 1024)} MB for {file_type} files."
+            )
+        if text_decoder is not None:
+            try:
+                text_decoder.decode(chunk, final=False)
+            except UnicodeDecodeError:
+                _reject(file_obj, "unsupported_type", 415, f"File {file_name} is not a PDF, TXT or JPG file.")
+        digest.update(chunk)
+        chunk = file_obj.read(INSPECTION_CHUNK_SIZE)
+
+    file_obj.seek(0)
+    _attachment_metrics.accepted(size)
+    return file_type, digest.hexdigest(), size
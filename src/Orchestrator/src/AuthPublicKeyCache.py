@@ -7,9 +7,16 @@ from cryptography.hazmat.primitives import serialization
 import jwt
 
 
+# tokens issued before key IDs were introduced carry no 'kid' and are always ES256
+LEGACY_ALGORITHM = "ES256"
+# an unknown key ID triggers a refresh at most this often, so forged kids cannot flood the auth service
+MIN_UNKNOWN_KID_REFRESH_INTERVAL = timedelta(seconds=30)
+
+
 class AuthPublicKeyCache:
     """
-    Singleton cache for the public key used in authentication service.
+    Singleton cache for the public keys used in authentication service.
+    Keys are stored already parsed, keyed by key ID ('kid'), along with their algorithm.
     """
     
     
@@ -27,7 +34,7 @@ class AuthPublicKeyCache:
         if self._initialized:
             return
             
-        self.public_key: Optional[str] = None
+        self.public_keys: dict[Optional[str], tuple[str, object]] = {}
         self.last_updated: Optional[datetime] = None
         self.ttl_minutes = ttl_minutes
         self.auth_service_url = getenv("AUTH_SERVICE_URL")
@@ -40,17 +47,17 @@ class AuthPublicKeyCache:
             return True
         return datetime.now() - self.last_updated > timedelta(minutes=self.ttl_minutes)
     
-    async def get_public_key(self) -> Optional[str]:
-        # If key is not expired, return it immediately
+    async def get_public_keys(self) -> dict[Optional[str], tuple[str, object]]:
+        # If keys are not expired, return them immediately
         if not self.is_expired():
-            return self.public_key
+            return self.public_keys
         
         # Use the lock to ensure only one fetch at a time
         # This prevents multiple coroutines from fetching the key simultaneously
         async with self._fetch_lock:
             # Double-check: if the key is still valid after acquiring the lock
             if not self.is_expired():
-                return self.public_key
+                return self.public_keys
             
             # If not fetching and key is expired, fetch the public key
             if not self._fetching:
@@ -60,21 +67,41 @@ class AuthPublicKeyCache:
                 finally:
                     self._fetching = False
         
-        return self.public_key
+        return self.public_keys
     
     async def _fetch_public_key(self):
         try:
             async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.auth_service_url}/public-key")
+                response = await client.get(f"{self.auth_service_url}/public-keys")
                 if response.status_code == 200:
-                    data = response.json()
-                    self.public_key = data.get("public_key")
+                    keys = response.json().get("keys", [])
+                elif response.status_code == 404:
+                    # auth service predating key IDs: a single ES256 key
+                    response = await client.get(f"{self.auth_service_url}/public-key")
+                    keys = [{"kid": None, "alg": LEGACY_ALGORITHM, "public_key": response.json().get("public_key")}] \
+                        if response.status_code == 200 else []
+                if response.status_code == 200:
+                    self.public_keys = self._load_keys(keys)
                     self.last_updated = datetime.now()
-                    print(f"Public key updated at {self.last_updated}")
+                    print(f"Public keys updated at {self.last_updated}")
                 else:
-                    print(f"Failed to fetch public key: {response.status_code}")
+                    print(f"Failed to fetch public keys: {response.status_code}")
         except Exception as e:
-            raise RuntimeError(f"Error fetching public key: {e}") from e
+            raise RuntimeError(f"Error fetching public keys: {e}") from e
+    
+    @staticmethod
+    def _load_keys(keys: list[dict]) -> dict[Optional[str], tuple[str, object]]:
+        """
+        Parse the PEM public keys once, so verifying a token does not re-parse them.
+        Tokens without a key ID are verified with the ES256 key.
+        """
+        public_keys = {}
+        for key in keys:
+            loaded = (key["alg"], serialization.load_pem_public_key(key["public_key"].encode('utf-8')))
+            public_keys[key["kid"]] = loaded
+            if key["alg"] == LEGACY_ALGORITHM:
+                public_keys[None] = loaded
+        return public_keys
     
     async def force_refresh(self):
         """Force a refresh of the public key."""
@@ -87,21 +114,30 @@ class AuthPublicKeyCache:
     
     async def verify_token(self, token: str) -> dict:
         """
-        Verify the provided token using the public key.
+        Verify the provided token using the public key selected by its key ID.
         Raises RuntimeError if the token is invalid or expired.
         """
-        public_key = await self.get_public_key()
-        if not public_key:
+        public_keys = await self.get_public_keys()
+        if not public_keys:
             raise RuntimeError("Public key is not available.")
         
-        public_key = serialization.load_pem_public_key(
-            public_key.encode('utf-8')
-        )
         try:
+            key_id = jwt.get_unverified_header(token).get("kid")
+            if key_id not in public_keys and (
+                self.last_updated is None
+                or datetime.now() - self.last_updated > MIN_UNKNOWN_KID_REFRESH_INTERVAL
+            ):
+                # the auth service may have started signing with a new key
+                await self.force_refresh()
+                public_keys = self.public_keys
+            if key_id not in public_keys:
+                raise jwt.InvalidTokenError(f"Unknown key ID {key_id}")
+            algorithm, public_key = public_keys[key_id]
+            
             payload = jwt.decode(
                 token, 
                 public_key, 
-                algorithms=["ES256"],
+                algorithms=[algorithm],
                 audience="peerflow_api",
                 issuer="auth_service"
             )
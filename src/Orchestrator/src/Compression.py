@@ -0,0 +1,218 @@
+import gzip
+import threading
+import time
+import zlib
+from os import getenv
+from typing import Optional
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# compression of the public responses, off when a proxy in front of the orchestrator already compresses them
+COMPRESSION_ENABLED = getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+# smaller bodies are sent as they are, their compression would not pay off
+COMPRESSION_MIN_SIZE = int(getenv("COMPRESSION_MIN_SIZE", "1024"))
+# the API bodies only, the downloaded files keep their length and strong ETag for ranged resumes
+COMPRESSION_CONTENT_TYPES = tuple(
+    content_type.strip()
+    for content_type in getenv("COMPRESSION_CONTENT_TYPES", "application/json,application/x-ndjson").split(",")
+    if content_type.strip()
+)
+COMPRESSION_GZIP_LEVEL = int(getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+
+class CompressionMetrics:
+    """
+    Counters of the compressed responses, by encoding, shared by all requests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.responses: dict[str, int] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+        self.skipped_responses = 0
+
+    def compressed(self, encoding: str, bytes_in: int, bytes_out: int, seconds: float):
+        with self._lock:
+            self.responses[encoding] = self.responses.get(encoding, 0) + 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.seconds += seconds
+
+    def skipped(self):
+        with self._lock:
+            self.skipped_responses += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "compressedResponses": dict(self.responses),
+                "skippedResponses": self.skipped_responses,
+                "bytesIn": self.bytes_in,
+                "bytesOut": self.bytes_out,
+                "bytesSaved": self.bytes_in - self.bytes_out,
+                "compressionSeconds": round(self.seconds, 6),
+            }
+
+
+_compression_metrics = CompressionMetrics()
+
+
+def get_compression_metrics() -> CompressionMetrics:
+    return _compression_metrics
+
+
+def _accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Return the encoding to use for a request, brotli over gzip, or None.
+    """
+    accepted = set()
+    for coding in accept_encoding.lower().split(","):
+        name, _, params = coding.partition(";")
+        params = params.replace(" ", "")
+        try:
+            quality = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            quality = 0.0
+        if quality > 0:
+            accepted.add(name.strip())
+    if "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """
+    Incremental compressor of a response body with the chosen encoding.
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            # gzip container, as zlib.compressobj gives raw deflate otherwise
+            self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compress a whole body with the chosen encoding.
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """
+    Compress the responses with brotli or gzip, as accepted by the client, when their content type is
+    compressible and their body is at least COMPRESSION_MIN_SIZE bytes. Streamed responses are compressed
+    chunk by chunk. Files, sent with Accept-Ranges or Content-Disposition, are never compressed, as the
+    compression would drop their Content-Length and weaken their ETag, breaking the If-Range resumes. Clients sending Accept-Encoding: identity, or none, such as internal callers not wanting
+    to pay for the compression, get the bodies as they are.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not COMPRESSION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        encoding = _accepted_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        streamed_in = streamed_out = 0
+        streamed_seconds = 0.0
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, compressor, streamed_in, streamed_out, streamed_seconds
+            if message["type"] == "http.response.start":
+                # held until the first chunk of the body tells its size
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                started = time.perf_counter()
+                chunk = compressor.compress(body)
+                if not more_body:
+                    chunk += compressor.finish()
+                streamed_seconds += time.perf_counter() - started
+                streamed_in += len(body)
+                streamed_out += len(chunk)
+                if not more_body:
+                    _compression_metrics.compressed(encoding, streamed_in, streamed_out, streamed_seconds)
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            if start_message is None:
+                await send(message)
+                return
+            start, start_message = start_message, None
+            headers = MutableHeaders(scope=start)
+            content_type = headers.get("content-type", "")
+            if (
+                "content-encoding" in headers or start["status"] < 200 or start["status"] in (204, 206, 304)
+                or "accept-ranges" in headers or "content-disposition" in headers
+                or not content_type.startswith(COMPRESSION_CONTENT_TYPES)
+                or (not more_body and len(body) < self.minimum_size)
+            ):
+                _compression_metrics.skipped()
+                await send(start)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers and not headers["etag"].startswith("W/"):
+                # the compressed body is another representation than the one hashed
+                headers["ETag"] = f"W/{headers['etag']}"
+
+            if more_body:
+                del headers["Content-Length"]
+                compressor = _Compressor(encoding)
+                started = time.perf_counter()
+                chunk = compressor.compress(body)
+                streamed_seconds += time.perf_counter() - started
+                streamed_in += len(body)
+                streamed_out += len(chunk)
+                await send(start)
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                return
+
+            started = time.perf_counter()
+            compressed = compress(body, encoding)
+            _compression_metrics.compressed(encoding, len(body), len(compressed), time.perf_counter() - started)
+            headers["Content-Length"] = str(len(compressed))
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
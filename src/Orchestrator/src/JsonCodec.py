@@ -0,0 +1,60 @@
+from datetime import datetime
+import msgpack
+import orjson
+from bson import ObjectId
+from starlette.responses import JSONResponse as StarletteJSONResponse
+
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _msgpack_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        # same representation as in JSON
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not MessagePack serializable")
+
+
+def dumps(content) -> bytes:
+    """
+    Encode content as compact UTF-8 JSON with orjson. Datetimes become ISO strings and ObjectIds strings.
+    """
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def loads(data):
+    """
+    Decode a JSON document given as bytes or str with orjson.
+    """
+    return orjson.loads(data)
+
+
+def packb(content) -> bytes:
+    """
+    Encode content as MessagePack, with datetimes and ObjectIds as strings like in JSON.
+    """
+    return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+def unpackb(data: bytes):
+    """
+    Decode a MessagePack document.
+    """
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+class JSONResponse(StarletteJSONResponse):
+    """
+    JSON response rendered with orjson instead of json.dumps, the default response class of the service.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
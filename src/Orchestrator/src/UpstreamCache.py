@@ -0,0 +1,159 @@
+from collections import OrderedDict
+from os import getenv
+from typing import Optional
+import httpx
+from JsonCodec import MSGPACK_MEDIA_TYPE, loads, packb, unpackb
+
+
+# responses of the services kept to be revalidated with their ETag
+UPSTREAM_CACHE_MAX_ENTRIES = int(getenv("UPSTREAM_CACHE_MAX_ENTRIES", "1024"))
+UPSTREAM_CACHE_MAX_BODY_SIZE = int(getenv("UPSTREAM_CACHE_MAX_BODY_SIZE", str(1024 * 1024)))
+# MessagePack instead of JSON for the bodies exchanged with the services, the public endpoints stay JSON
+SERVICE_MSGPACK = getenv("SERVICE_MSGPACK", "true").lower() == "true"
+
+
+class UpstreamCache:
+    """
+    Least recently used copies of the GET responses of the services, with their ETag.
+    A copy is only reused when the service confirms it with a 304.
+    """
+
+    def __init__(self, max_entries: int = UPSTREAM_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[str, list, bytes]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(request: httpx.Request) -> tuple:
+        return str(request.url), request.headers.get("accept", "")
+
+    def get(self, request: httpx.Request) -> Optional[tuple[str, list, bytes]]:
+        key = self.key(request)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, request: httpx.Request, etag: str, headers: list, body: bytes):
+        key = self.key(request)
+        self._entries[key] = (etag, headers, body)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, request: httpx.Request):
+        self._entries.pop(self.key(request), None)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class ServiceResponse(httpx.Response):
+    """
+    Response of a service, whose JSON body is parsed with orjson, or MessagePack body with msgpack.
+    """
+
+    def json(self, **kwargs):
+        if self.headers.get("content-type", "").startswith(MSGPACK_MEDIA_TYPE):
+            return unpackb(self.content)
+        if kwargs:
+            return super().json(**kwargs)
+        return loads(self.content)
+
+
+def service_response(response: httpx.Response, request: httpx.Request) -> ServiceResponse:
+    """
+    Wrap the response of the underlying transport, without reading its body.
+    """
+    return ServiceResponse(
+        response.status_code, headers=response.headers, stream=response.stream,
+        request=request, extensions=response.extensions
+    )
+
+
+_upstream_cache = UpstreamCache()
+
+
+def get_upstream_cache() -> UpstreamCache:
+    return _upstream_cache
+
+
+class RevalidatingTransport(httpx.AsyncBaseTransport):
+    """
+    Transport sending the ETag of the cached copy with each GET to a service, so that unchanged data
+    comes back as a 304 with headers only and the cached body is used instead.
+    Its responses parse their JSON body with orjson.
+    """
+
+    def __init__(self, cache: UpstreamCache, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self._cache = cache
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET" or "if-none-match" in request.headers:
+            return service_response(await self._transport.handle_async_request(request), request)
+
+        cached = self._cache.get(request)
+        if cached is not None:
+            request.headers["If-None-Match"] = cached[0]
+        response = await self._transport.handle_async_request(request)
+
+        if response.status_code == 304 and cached is not None:
+            await response.aclose()
+            self._cache.hits += 1
+            _, headers, body = cached
+            return ServiceResponse(200, headers=headers, content=body, request=request)
+
+        self._cache.misses += 1
+        etag = response.headers.get("etag")
+        content_length = response.headers.get("content-length")
+        if (
+            response.status_code != 200 or etag is None or content_length is None
+            or int(content_length) > UPSTREAM_CACHE_MAX_BODY_SIZE
+            or "no-store" in response.headers.get("cache-control", "")
+        ):
+            if cached is not None:
+                self._cache.discard(request)
+            return service_response(response, request)
+
+        body = await response.aread()
+        # the body is kept decoded, so it is described by its own length
+        headers = [
+            (name, value) for name, value in response.headers.multi_items()
+            if name.lower() not in ("content-encoding", "content-length")
+        ]
+        headers.append(("content-length", str(len(body))))
+        self._cache.put(request, etag, headers, body)
+        return ServiceResponse(
+            response.status_code, headers=headers, content=body, request=request, extensions=response.extensions
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def upstream_transport() -> RevalidatingTransport:
+    """
+    Return a transport for a new client of the services, sharing the cache of the responses.
+    """
+    return RevalidatingTransport(_upstream_cache)
+
+
+def service_client(**kwargs) -> httpx.AsyncClient:
+    """
+    Return a client for the calls to the services, revalidating their cached GET responses.
+    The services are asked for MessagePack, which response.json() decodes as well.
+    """
+    if SERVICE_MSGPACK:
+        kwargs.setdefault("headers", {"Accept": f"{MSGPACK_MEDIA_TYPE}, application/json;q=0.9"})
+    return httpx.AsyncClient(transport=upstream_transport(), **kwargs)
+
+
+def service_body(content) -> dict:
+    """
+    Return the arguments sending content as the body of a request to a service, as MessagePack or JSON.
+    """
+    if SERVICE_MSGPACK:
+        return {"content": packb(content), "headers": {"Content-Type": MSGPACK_MEDIA_TYPE}}
+    return {"json": content}
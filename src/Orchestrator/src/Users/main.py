@@ -1,7 +1,7 @@
 from os import getenv
 from httpx import AsyncClient
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from JsonCodec import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
 from AuthPublicKeyCache import get_auth_cache
 
@@ -0,0 +1,61 @@
+import time
+import zipfile
+from typing import IO
+
+
+class _ZipStreamBuffer:
+    """
+    Write-only file object collecting the bytes produced by zipfile until they are sent.
+    It cannot seek, so zipfile writes the sizes of each entry after its data.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ZipStreamWriter:
+    """
+    Builds a ZIP archive on the fly: the bytes of the archive are handed out as soon as they are written,
+    so only the chunk being added is kept in memory and nothing is staged on disk.
+    """
+
+    def __init__(self):
+        self._buffer = _ZipStreamBuffer()
+        self._zip_file = zipfile.ZipFile(self._buffer, mode="w")
+
+    def write_file(self, name: str, data: bytes, compress: bool = True):
+        """Add a file whose whole content is already in memory."""
+        self._zip_file.writestr(
+            name, data, compress_type=zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        )
+
+    def open_file(self, name: str, size: int, compress: bool = False) -> IO[bytes]:
+        """
+        Open an entry to be written chunk by chunk. The size is needed up front to choose the ZIP64 format.
+        Files that are already compressed (PDF, JPG) are stored as they are.
+        """
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        info.file_size = size
+        info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        return self._zip_file.open(info, mode="w")
+
+    def read(self) -> bytes:
+        """Return the bytes of the archive written since the last call."""
+        return self._buffer.pop()
+
+    def close(self) -> bytes:
+        """Write the central directory and return the remaining bytes of the archive."""
+        self._zip_file.close()
+        return self._buffer.pop()
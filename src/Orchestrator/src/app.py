@@ -26,7 +26,9 @@ import s3_config
 # FastAPI startup and shutdown events
 
 from fastapi import FastAPI
+from JsonCodec import JSONResponse
 from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
 from AuthPublicKeyCache import get_auth_cache
 
 @asynccontextmanager
@@ -37,7 +39,13 @@ async def lifespan(app: FastAPI):
     auth_cache = get_auth_cache()
     
     # Ensure the cache is initialized
-    await auth_cache.get_public_key()
+    await auth_cache.get_public_keys()
+    
+    # Provision the submissions bucket once, it is retried on the first upload if the storage is not reachable yet
+    try:
+        await run_in_threadpool(s3_config.ensure_bucket)
+    except Exception as e:
+        print(f"Error provisioning S3 bucket '{s3_config.BUCKET_NAME}': {e}")
     
     # all code above will be executed before app initialization
     yield
@@ -46,13 +54,22 @@ async def lifespan(app: FastAPI):
 # FASTAPI app
 
 from fastapi.middleware.cors import CORSMiddleware
+from ConditionalGet import ConditionalGetMiddleware
+from Compression import CompressionMiddleware, get_compression_metrics
 from Assignments import assignments_router
 from Users import users_router
 
 app = FastAPI(
     lifespan=lifespan,
+    default_response_class=JSONResponse,
 )
 
+# ETags and 304 responses for the read endpoints
+app.add_middleware(ConditionalGetMiddleware)
+
+# gzip or brotli for the large responses, around the ETags computed on the uncompressed bodies
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  
@@ -70,4 +87,11 @@ async def root():
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "message": "PeerFlow Orchestrator Service is running smoothly!"}
\ No newline at end of file
+    return {"status": "healthy", "message": "PeerFlow Orchestrator Service is running smoothly!"}
+
+@app.get("/compression/metrics")
+async def compression_metrics():
+    """
+    Report how many responses were compressed by encoding, the bytes saved and the time spent compressing.
+    """
+    return get_compression_metrics().stats()
\ No newline at end of file
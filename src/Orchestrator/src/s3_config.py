@@ -1,5 +1,9 @@
 import boto3
 import os
+import threading
+from urllib.parse import quote
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 import botocore.errorfactory
 from botocore.exceptions import ClientError
 import botocore
@@ -16,21 +20,73 @@ ACCESS_KEY = os.getenv("S3_ACCESS_KEY")
 SECRET_KEY = os.getenv("S3_SECRET_KEY")
 
 AWS_REGION = os.getenv("AWS_REGION", "us-east-1") # required by boto3, not used for Seaweed
+# connections kept open to SeaweedFS by the shared client; bounds the concurrent S3 requests of the process
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "50"))
+# files larger than the threshold are uploaded in parts of S3_MULTIPART_CHUNK_SIZE_MB, several at a time
+S3_MULTIPART_THRESHOLD_MB = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "8"))
+S3_MULTIPART_CHUNK_SIZE_MB = int(os.getenv("S3_MULTIPART_CHUNK_SIZE_MB", "8"))
+S3_MULTIPART_CONCURRENCY = int(os.getenv("S3_MULTIPART_CONCURRENCY", "4"))
 
-def create_s3_client():
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+    multipart_chunksize=S3_MULTIPART_CHUNK_SIZE_MB * 1024 * 1024,
+    max_concurrency=S3_MULTIPART_CONCURRENCY,
+)
+
+# endpoint reachable by the clients, presigned URLs are signed for this host
+PUBLIC_ENDPOINT_URL = os.getenv("S3_PUBLIC_ENDPOINT_URL", ENDPOINT_URL)
+
+BUCKET_NAME = 'assignment-submissions'
+
+_s3_client = None
+_s3_presign_client = None
+_s3_client_lock = threading.Lock()
+_provisioned_buckets = set()
+
+def create_s3_client(endpoint_url=ENDPOINT_URL):
     """
     Creates a boto3 S3 client configured for SeaweedFS S3-compatible API."""
     s3_client = boto3.client(
         's3',
-        endpoint_url=ENDPOINT_URL,
+        endpoint_url=endpoint_url,
         aws_access_key_id=ACCESS_KEY,
         aws_secret_access_key=SECRET_KEY,
         region_name=AWS_REGION,
+        config=Config(max_pool_connections=S3_MAX_POOL_CONNECTIONS),
         # Optionally disable SSL verification if needed
         # verify=False
     )
     return s3_client
 
+def get_s3_client():
+    """
+    Returns the process-wide S3 client, creating it on first use.
+    boto3 clients are thread-safe, so the client and its connection pool are shared by all requests."""
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                _s3_client = create_s3_client()
+    return _s3_client
+
+def get_s3_presign_client():
+    """
+    Returns the process-wide S3 client used to presign URLs for the public endpoint.
+    Presigning is a local computation, this client never opens a connection."""
+    global _s3_presign_client
+    if _s3_presign_client is None:
+        with _s3_client_lock:
+            if _s3_presign_client is None:
+                _s3_presign_client = create_s3_client(PUBLIC_ENDPOINT_URL)
+    return _s3_presign_client
+
+def ensure_bucket(bucket_name=BUCKET_NAME):
+    """Creates the bucket if needed, only once per process."""
+    if bucket_name in _provisioned_buckets:
+        return
+    create_bucket(get_s3_client(), bucket_name)
+    _provisioned_buckets.add(bucket_name)
+
 def create_bucket(s3_client, bucket_name):
     """Creates an S3 bucket. SeaweedFS creates it dynamically if it does not exist."""
     try:
@@ -52,7 +108,7 @@ def upload_file(s3_client, file_name, bucket, object_name=None):
         object_name = os.path.basename(file_name)
 
     try:
-        s3_client.upload_file(file_name, bucket, object_name)
+        s3_client.upload_file(file_name, bucket, object_name, Config=TRANSFER_CONFIG)
         print(f"File '{file_name}' successfully uploaded to '{bucket}/{object_name}'.")
     except ClientError as e:
         print(f"Error uploading file: {e}")
@@ -65,7 +121,7 @@ def upload_fileobj(s3_client, file_obj, bucket, object_name=None):
         object_name = os.path.basename(file_obj.name)
 
     try:
-        s3_client.upload_fileobj(file_obj, bucket, object_name)
+        s3_client.upload_fileobj(file_obj, bucket, object_name, Config=TRANSFER_CONFIG)
         print(f"File object successfully uploaded to '{bucket}/{object_name}'.")
     except ClientError as e:
         print(f"Error uploading file object: {e}")
@@ -103,4 +159,127 @@ def delete_file(s3_client, bucket, object_name):
     except ClientError as e:
         print(f"Error deleting file: {e}")
         return False
-    return True
\ No newline at end of file
+    return True
+
+def copy_file(s3_client, bucket, source_name, object_name, if_match=None):
+    """Copies an object within the bucket, only if it still has the given ETag."""
+    params = {"Bucket": bucket, "Key": object_name, "CopySource": {"Bucket": bucket, "Key": source_name}}
+    if if_match:
+        params["CopySourceIfMatch"] = if_match
+    try:
+        s3_client.copy_object(**params)
+    except ClientError as e:
+        print(f"Error copying file: {e}")
+        return False
+    return True
+
+def head_file(s3_client, bucket, object_name):
+    """Returns the metadata of an object, or None if it does not exist."""
+    try:
+        return s3_client.head_object(Bucket=bucket, Key=object_name)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        print(f"Error reading file metadata: {e}")
+        raise
+
+def create_presigned_post(s3_client, bucket, object_name, content_type, max_size, expiration):
+    """
+    Generates a presigned POST policy to upload an object directly to the bucket.
+    The policy only accepts the given content type and at most max_size bytes."""
+    try:
+        return s3_client.generate_presigned_post(
+            Bucket=bucket,
+            Key=object_name,
+            Fields={"Content-Type": content_type},
+            Conditions=[
+                {"Content-Type": content_type},
+                ["content-length-range", 1, max_size]
+            ],
+            ExpiresIn=expiration
+        )
+    except ClientError as e:
+        print(f"Error generating presigned POST: {e}")
+        return None
+
+def get_file(s3_client, bucket, object_name, byte_range=None, if_none_match=None, if_match=None,
+             if_unmodified_since=None):
+    """
+    Opens an object of the bucket, the body is returned as a stream and is not read.
+    Conditional and range requests are forwarded to the storage, which raises a ClientError
+    with code 304, 412 or InvalidRange when they cannot be satisfied."""
+    params = {"Bucket": bucket, "Key": object_name}
+    if byte_range:
+        params["Range"] = byte_range
+    if if_none_match:
+        params["IfNoneMatch"] = if_none_match
+    if if_match:
+        params["IfMatch"] = if_match
+    if if_unmodified_since:
+        params["IfUnmodifiedSince"] = if_unmodified_since
+    return s3_client.get_object(**params)
+
+def content_disposition(disposition, file_name):
+    """
+    Builds a Content-Disposition header value for a client supplied file name (RFC 6266): an ASCII
+    filename with quotes and backslashes escaped, and the exact UTF-8 name in filename*."""
+    fallback = "".join(char if " " <= char <= "~" else "_" for char in file_name)
+    fallback = fallback.replace("\\", "\\\\").replace('"', '\\"')
+    return f'{disposition}; filename="{fallback}"; filename*=UTF-8\'\'{quote(file_name, safe="")}'
+
+def create_presigned_url(s3_client, bucket, object_name, expiration, file_name=None):
+    """Generates a presigned URL to download an object directly from the bucket."""
+    params = {"Bucket": bucket, "Key": object_name}
+    if file_name:
+        params["ResponseContentDisposition"] = content_disposition("inline", file_name)
+    try:
+        return s3_client.generate_presigned_url("get_object", Params=params, ExpiresIn=expiration)
+    except ClientError as e:
+        print(f"Error generating presigned URL: {e}")
+        return None
+
+def create_multipart_upload(s3_client, bucket, object_name, content_type):
+    """Starts a multipart upload and returns its ID."""
+    try:
+        response = s3_client.create_multipart_upload(Bucket=bucket, Key=object_name, ContentType=content_type)
+    except ClientError as e:
+        print(f"Error starting multipart upload: {e}")
+        return None
+    return response["UploadId"]
+
+def upload_part(s3_client, bucket, object_name, upload_id, part_number, data):
+    """Uploads a part of a multipart upload and returns its ETag."""
+    try:
+        response = s3_client.upload_part(
+            Bucket=bucket, Key=object_name, UploadId=upload_id, PartNumber=part_number, Body=data
+        )
+    except ClientError as e:
+        print(f"Error uploading part {part_number}: {e}")
+        return None
+    return response["ETag"]
+
+def complete_multipart_upload(s3_client, bucket, object_name, upload_id, parts):
+    """Assembles the uploaded parts, given as (part number, ETag) pairs, into the object."""
+    try:
+        s3_client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=object_name,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": [
+                {"PartNumber": part_number, "ETag": etag} for part_number, etag in sorted(parts)
+            ]}
+        )
+        print(f"Multipart upload of '{bucket}/{object_name}' completed.")
+    except ClientError as e:
+        print(f"Error completing multipart upload: {e}")
+        return False
+    return True
+
+def abort_multipart_upload(s3_client, bucket, object_name, upload_id):
+    """Aborts a multipart upload, the uploaded parts are discarded."""
+    try:
+        s3_client.abort_multipart_upload(Bucket=bucket, Key=object_name, UploadId=upload_id)
+    except ClientError as e:
+        print(f"Error aborting multipart upload: {e}")
+        return False
+    return True
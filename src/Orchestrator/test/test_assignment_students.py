@@ -0,0 +1,73 @@
+"""
+Unit tests for the bulk enrollment endpoints.
+"""
+import httpx
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+from app import app
+from fastapi.testclient import TestClient
+
+client = TestClient(app)
+
+
+def test_students_csv_is_streamed_to_the_assignment_service():
+    """Test that the CSV body is forwarded unchanged, with the action, after checking the owner."""
+    received = {}
+
+    async def handler(request: httpx.Request):
+        received["url"] = str(request.url)
+        received["body"] = await request.aread()
+        return httpx.Response(200, json={"message": "Students enrolled", "processed": 2, "enrolled": 2})
+
+    with patch("Assignments.main.check_assignment_owner", AsyncMock()) as check_owner, \
+            patch("Assignments.main.service_client",
+                  lambda **kwargs: httpx.AsyncClient(transport=httpx.MockTransport(handler), **kwargs)):
+        response = client.post(
+            "/api/v1/assignments/assignment1/students/csv?action=add",
+            content=b"studentId\nstudent1\nstudent2\n",
+            headers={"Authorization": "Bearer token"}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["enrolled"] == 2
+    check_owner.assert_awaited_once_with("token", "assignment1")
+    assert received["url"].endswith("/assignments/assignment1/students/csv?action=add")
+    assert received["body"] == b"studentId\nstudent1\nstudent2\n"
+
+
+def test_add_students_requires_the_creator():
+    """Test that only the teacher who created the assignment can add students."""
+    auth_cache = MagicMock()
+    auth_cache.verify_token = AsyncMock(return_value={"id": "student1", "role": "Student"})
+    with patch("Assignments.main.get_auth_cache", return_value=auth_cache):
+        response = client.post(
+            "/api/v1/assignments/assignment1/students",
+            json={"studentIds": ["student2"]},
+            headers={"Authorization": "Bearer token"}
+        )
+
+    assert response.status_code == 403
+
+
+def test_student_assignment_details_skip_the_roster():
+    """Test that a student opening an assignment gets the student count without the roster and profiles."""
+    requested = []
+
+    async def handler(request: httpx.Request):
+        requested.append(request.url.path)
+        return httpx.Response(200, json={"assignment": {"id": "assignment1", "studentCount": 50000}})
+
+    auth_cache = MagicMock()
+    auth_cache.verify_token = AsyncMock(return_value={"id": "student1", "role": "Student"})
+    with patch("Assignments.main.get_auth_cache", return_value=auth_cache), \
+            patch("Assignments.main.service_client",
+                  lambda **kwargs: httpx.AsyncClient(transport=httpx.MockTransport(handler), **kwargs)):
+        response = client.get("/api/v1/assignments/assignment1", headers={"Authorization": "Bearer token"})
+
+    assert response.status_code == 200
+    assert response.json()["assignment"] == {"id": "assignment1", "studentCount": 50000}
+    assert requested == ["/assignments/assignment1"]
@@ -0,0 +1,128 @@
+"""
+Unit tests for the streaming attachment download endpoint.
+"""
+from datetime import datetime, timezone
+from io import BytesIO
+from unittest.mock import AsyncMock, MagicMock, patch
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+from app import app
+from fastapi.testclient import TestClient
+
+client = TestClient(app)
+
+URL = "/api/v1/assignments/assignment1/submissions/submission1/attachments/report.pdf"
+SUBMISSION = {
+    "id": "submission1",
+    "AssignmentID": "assignment1",
+    "StudentID": "student1",
+    "Attachments": [{
+        "FileName": "report.pdf",
+        "FileType": "PDF",
+        "FileReference": "assignment-submissions/assignment1/student1/report.pdf"
+    }]
+}
+
+
+def _patches(s3_client):
+    auth_cache = MagicMock()
+    auth_cache.verify_token = AsyncMock(return_value={"id": "student1", "role": "Student"})
+    return (
+        patch("Assignments.main.get_auth_cache", return_value=auth_cache),
+        patch("Assignments.main.get_accessible_submission", AsyncMock(return_value=SUBMISSION)),
+        patch("Assignments.main.get_s3_client", return_value=s3_client),
+    )
+
+
+def test_download_attachment_range():
+    """Test that a Range request is forwarded to the storage and streamed as partial content."""
+    s3_client = MagicMock()
+    s3_client.get_object.return_value = {
+        "Body": StreamingBody(BytesIO(b"0123"), 4),
+        "ContentLength": 4,
+        "ContentRange": "bytes 0-3/10",
+        "ContentType": "application/pdf",
+        "ETag": '"etag1"',
+        "LastModified": datetime(2025, 1, 1, tzinfo=timezone.utc),
+    }
+    auth_patch, submission_patch, s3_patch = _patches(s3_client)
+    with auth_patch, submission_patch, s3_patch:
+        response = client.get(URL, headers={"Authorization": "Bearer token", "Range": "bytes=0-3"})
+
+    assert response.status_code == 206
+    assert response.content == b"0123"
+    assert response.headers["content-range"] == "bytes 0-3/10"
+    assert response.headers["etag"] == '"etag1"'
+    s3_client.get_object.assert_called_once_with(
+        Bucket="assignment-submissions", Key="assignment1/student1/report.pdf", Range="bytes=0-3"
+    )
+
+
+def test_download_attachment_not_modified():
+    """Test that a matching If-None-Match is answered with 304 without a body."""
+    s3_client = MagicMock()
+    s3_client.get_object.side_effect = ClientError({"Error": {"Code": "304"}}, "GetObject")
+    auth_patch, submission_patch, s3_patch = _patches(s3_client)
+    with auth_patch, submission_patch, s3_patch:
+        response = client.get(URL, headers={"Authorization": "Bearer token", "If-None-Match": '"etag1"'})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == '"etag1"'
+
+
+def test_download_attachment_if_range_date():
+    """Test that an If-Range date is checked against the modification date instead of the ETag."""
+    s3_client = MagicMock()
+    s3_client.get_object.return_value = {
+        "Body": StreamingBody(BytesIO(b"0123"), 4),
+        "ContentLength": 4,
+        "ContentRange": "bytes 0-3/10",
+        "ContentType": "application/pdf",
+        "ETag": '"etag1"',
+        "LastModified": datetime(2025, 1, 1, tzinfo=timezone.utc),
+    }
+    auth_patch, submission_patch, s3_patch = _patches(s3_client)
+    with auth_patch, submission_patch, s3_patch:
+        response = client.get(URL, headers={
+            "Authorization": "Bearer token",
+            "Range": "bytes=0-3",
+            "If-Range": "Wed, 01 Jan 2025 00:00:00 GMT"
+        })
+
+    assert response.status_code == 206
+    s3_client.get_object.assert_called_once_with(
+        Bucket="assignment-submissions", Key="assignment1/student1/report.pdf", Range="bytes=0-3",
+        IfUnmodifiedSince=datetime(2025, 1, 1, tzinfo=timezone.utc)
+    )
+
+
+def test_download_attachment_non_ascii_file_name():
+    """Test that a file name outside latin-1 or with quotes is sent as an ASCII fallback and an encoded filename*."""
+    from s3_config import content_disposition
+    assert content_disposition("inline", '报告 "v2".pdf') == (
+        'inline; filename="__ \\"v2\\".pdf"; filename*=UTF-8\'\'%E6%8A%A5%E5%91%8A%20%22v2%22.pdf'
+    )
+
+    s3_client = MagicMock()
+    s3_client.get_object.return_value = {
+        "Body": StreamingBody(BytesIO(b"0123"), 4),
+        "ContentLength": 4,
+        "ContentType": "application/pdf",
+        "ETag": '"etag1"',
+        "LastModified": datetime(2025, 1, 1, tzinfo=timezone.utc),
+    }
+    submission = {**SUBMISSION, "Attachments": [{**SUBMISSION["Attachments"][0], "FileName": "报告.pdf"}]}
+    auth_patch, _, s3_patch = _patches(s3_client)
+    with auth_patch, s3_patch, patch("Assignments.main.get_accessible_submission", AsyncMock(return_value=submission)):
+        response = client.get(
+            "/api/v1/assignments/assignment1/submissions/submission1/attachments/报告.pdf",
+            headers={"Authorization": "Bearer token"}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'inline; filename="__.pdf"; filename*=UTF-8\'\'%E6%8A%A5%E5%91%8A.pdf'
@@ -0,0 +1,55 @@
+"""
+Unit tests for the inspection of the submission attachments.
+"""
+import pytest
+from io import BytesIO
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+from AttachmentValidation import (
+    ATTACHMENT_SIZE_LIMITS, AttachmentRejected, get_attachment_metrics, inspect_attachment, sniff_file_type
+)
+
+
+def test_sniff_file_type():
+    """Test that the file type is detected from the magic bytes and not from the declared content type."""
+    assert sniff_file_type(b"%PDF-1.7\n...") == "PDF"
+    assert sniff_file_type(b"\xff\xd8\xff\xe0 JFIF") == "JPG"
+    assert sniff_file_type("plain text, àccented".encode("utf-8")) == "TXT"
+    assert sniff_file_type(b"\x89PNG\r\n\x1a\n\x00\x00") is None
+    assert sniff_file_type(b"MZ\x90\x00\x03\x00") is None
+
+
+def test_inspect_attachment_rejects_unsupported_and_oversized_files():
+    """Test that bad files are rejected and counted in the rejected bytes."""
+    metrics = get_attachment_metrics()
+    rejected_bytes = metrics.stats()["rejectedBytes"]
+
+    with pytest.raises(AttachmentRejected) as exc_info:
+        inspect_attachment(BytesIO(b"\x89PNG\r\n\x1a\n\x00\x00"), "image.png")
+    assert exc_info.value.status_code == 415
+
+    oversized = b"%PDF-" + b"0" * ATTACHMENT_SIZE_LIMITS["PDF"]
+    with pytest.raises(AttachmentRejected) as exc_info:
+        inspect_attachment(BytesIO(oversized), "huge.pdf")
+    assert exc_info.value.status_code == 413
+
+    with pytest.raises(AttachmentRejected) as exc_info:
+        inspect_attachment(BytesIO(b""), "empty.txt")
+    assert exc_info.value.status_code == 400
+
+    assert metrics.stats()["rejectedBytes"] == rejected_bytes + 10 + len(oversized)
+
+
+def test_inspect_attachment_accepts_valid_file():
+    """Test that a valid file is hashed and rewound for the upload."""
+    file_obj = BytesIO(b"%PDF-1.4 content")
+
+    file_type, content_hash, size = inspect_attachment(file_obj, "report.pdf")
+
+    assert file_type == "PDF"
+    assert len(content_hash) == 64
+    assert size == 16
+    assert file_obj.tell() == 0
@@ -0,0 +1,69 @@
+"""
+Unit tests for the public key cache used to verify JWTs.
+"""
+import pytest
+from datetime import datetime, timedelta
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+from AuthPublicKeyCache import AuthPublicKeyCache, get_auth_cache
+
+
+def _public_pem(private_key) -> str:
+    return private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode("utf-8")
+
+
+def _token(private_key, algorithm, kid=None) -> str:
+    return jwt.encode(
+        {
+            "id": "user1",
+            "aud": "peerflow_api",
+            "iss": "auth_service",
+            "exp": datetime.now() + timedelta(minutes=5)
+        },
+        private_key,
+        algorithm=algorithm,
+        headers={"kid": kid} if kid else None
+    )
+
+
+@pytest.fixture
+def keys():
+    es256_key = ec.generate_private_key(ec.SECP256R1())
+    eddsa_key = ed25519.Ed25519PrivateKey.generate()
+    cache = get_auth_cache()
+    cache.public_keys = AuthPublicKeyCache._load_keys([
+        {"kid": "ES256-test", "alg": "ES256", "public_key": _public_pem(es256_key)},
+        {"kid": "EdDSA-test", "alg": "EdDSA", "public_key": _public_pem(eddsa_key)},
+    ])
+    cache.last_updated = datetime.now()
+    yield es256_key, eddsa_key
+    cache.public_keys = {}
+    cache.last_updated = None
+
+
+async def test_verify_token_selects_key_by_kid(keys):
+    """Test that EdDSA, ES256 and legacy (no kid) tokens are all verified."""
+    es256_key, eddsa_key = keys
+    cache = get_auth_cache()
+
+    assert (await cache.verify_token(_token(eddsa_key, "EdDSA", "EdDSA-test")))["id"] == "user1"
+    assert (await cache.verify_token(_token(es256_key, "ES256", "ES256-test")))["id"] == "user1"
+    assert (await cache.verify_token(_token(es256_key, "ES256")))["id"] == "user1"
+
+
+async def test_verify_token_rejects_unknown_kid(keys):
+    """Test that a token signed with an unknown key ID is rejected."""
+    _, eddsa_key = keys
+    cache = get_auth_cache()
+
+    with pytest.raises(RuntimeError):
+        await cache.verify_token(_token(eddsa_key, "EdDSA", "EdDSA-unknown"))
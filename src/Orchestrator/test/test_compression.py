@@ -0,0 +1,86 @@
+"""
+Unit tests for the compression of the responses.
+"""
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+from Compression import CompressionMiddleware, get_compression_metrics
+
+
+large_content = {"Pairings": [{"ReviewerStudentID": f"student-{i}", "Status": "Completed"} for i in range(200)]}
+
+compressed_app = FastAPI()
+compressed_app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+@compressed_app.get("/large")
+async def large():
+    return large_content
+
+@compressed_app.get("/small")
+async def small():
+    return {"message": "ok"}
+
+@compressed_app.get("/stream")
+async def stream():
+    return StreamingResponse((f'{{"line": {i}}}\n' for i in range(100)), media_type="application/x-ndjson")
+
+@compressed_app.get("/binary")
+async def binary():
+    return PlainTextResponse("x" * 4096, media_type="application/zip")
+
+@compressed_app.get("/download")
+async def download():
+    return StreamingResponse(
+        iter(["line\n"] * 1024), media_type="application/json",
+        headers={"Accept-Ranges": "bytes", "Content-Disposition": 'inline; filename="notes.txt"',
+                 "Content-Length": "5120", "ETag": '"abc"'}
+    )
+
+client = TestClient(compressed_app)
+
+
+def test_large_json_is_compressed_with_the_accepted_encoding():
+    """Test that a large JSON body is compressed with brotli when accepted, gzip otherwise, and counted."""
+    before = get_compression_metrics().stats()
+
+    brotli_response = client.get("/large", headers={"Accept-Encoding": "gzip, br"})
+    gzip_response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+    assert brotli_response.headers["content-encoding"] == "br"
+    assert gzip_response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in gzip_response.headers["vary"]
+    assert brotli_response.json() == gzip_response.json() == large_content
+    after = get_compression_metrics().stats()
+    assert after["bytesSaved"] > before["bytesSaved"]
+    assert after["compressedResponses"]["gzip"] == before["compressedResponses"].get("gzip", 0) + 1
+
+
+def test_small_identity_and_binary_responses_are_not_compressed():
+    """Test that small bodies, clients refusing compression and other content types get the body as it is."""
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/large", headers={"Accept-Encoding": "identity"}).headers
+    assert "content-encoding" not in client.get("/large", headers={"Accept-Encoding": "gzip;q=0"}).headers
+    assert "content-encoding" not in client.get("/binary", headers={"Accept-Encoding": "gzip"}).headers
+
+
+def test_streamed_response_is_compressed_chunk_by_chunk():
+    """Test that a streamed NDJSON response is compressed without a content length."""
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text.splitlines()[99] == '{"line": 99}'
+
+
+def test_downloaded_files_are_not_compressed():
+    """Test that a streamed file keeps its length and strong ETag, so that its download can be resumed."""
+    response = client.get("/download", headers={"Accept-Encoding": "gzip, br"})
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["content-length"] == "5120"
+    assert response.headers["etag"] == '"abc"'
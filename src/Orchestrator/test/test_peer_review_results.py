@@ -0,0 +1,53 @@
+"""
+Unit tests for the peer review results of an assignment.
+"""
+import httpx
+from unittest.mock import AsyncMock, MagicMock, patch
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+from app import app
+from JsonCodec import unpackb
+from fastapi.testclient import TestClient
+
+client = TestClient(app)
+
+
+def test_teacher_results_include_the_reviews_of_every_submission():
+    """Test that the review results of the teacher cover all the submissions of the assignment."""
+    review_batches = []
+
+    async def handler(request: httpx.Request):
+        path = request.url.path
+        if path.endswith("/assignments/assignment1"):
+            return httpx.Response(200, json={"assignment": {"id": "assignment1", "teacherId": "teacher1"}})
+        if path.endswith("/review-assignment/assignment/assignment1"):
+            return httpx.Response(200, json={"peer_review": {}, "rubric": {}})
+        if path.endswith("/submissions/assignment/assignment1"):
+            return httpx.Response(200, json=[{"id": "subm1"}, {"id": "subm2"}])
+        if path.endswith("/aggregated-by-submission/batch"):
+            ids = unpackb(await request.aread())["SubmissionIDs"]
+            return httpx.Response(200, json={"Results": {i: {"SubmissionID": i} for i in ids}, "Missing": []})
+        if path.endswith("/aggregated-by-review/batch"):
+            ids = unpackb(await request.aread())["SubmissionIDs"]
+            review_batches.append(ids)
+            return httpx.Response(200, json={"Results": [{"RevieweeSubmissionID": i} for i in ids]})
+        if path.endswith("/aggregated-by-assignment/assignment1"):
+            return httpx.Response(200, json={"AssignmentID": "assignment1"})
+        return httpx.Response(404)
+
+    auth_cache = MagicMock()
+    auth_cache.verify_token = AsyncMock(return_value={"id": "teacher1", "role": "Teacher"})
+    with patch("Assignments.main.get_auth_cache", return_value=auth_cache), \
+            patch("Assignments.main.SERVICE_BATCH_SIZE", 1), \
+            patch("Assignments.main.service_client",
+                  lambda **kwargs: httpx.AsyncClient(transport=httpx.MockTransport(handler), **kwargs)):
+        response = client.get(
+            "/api/v1/assignments/assignment1/peer-review/results/teacher", headers={"Authorization": "Bearer token"}
+        )
+
+    assert response.status_code == 200
+    assert review_batches == [["subm1"], ["subm2"]]
+    assert [r["RevieweeSubmissionID"] for r in response.json()["resultsByReview"]] == ["subm1", "subm2"]
@@ -0,0 +1,190 @@
+"""
+Unit tests for the concurrent upload of submission attachments.
+"""
+import base64
+import hashlib
+import json
+import pytest
+from io import BytesIO
+from unittest.mock import AsyncMock, MagicMock, patch
+from botocore.exceptions import ClientError
+from fastapi import HTTPException, UploadFile
+from starlette.datastructures import Headers
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from Assignments.main import upload_attachments, verify_uploaded_attachments, upload_session_summary, BUCKET_NAME
+from s3_config import create_presigned_post, get_s3_presign_client
+
+
+def _upload_file(filename: str, content: bytes = b"content") -> UploadFile:
+    return UploadFile(
+        file=BytesIO(content),
+        filename=filename,
+        headers=Headers({"content-type": "application/pdf"})
+    )
+
+
+def _sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+async def test_upload_attachments_stores_each_content_once():
+    """Test that files are stored under their content hash and identical or known contents are not uploaded."""
+    s3_client = MagicMock()
+    files = [
+        _upload_file("a.pdf", b"%PDF-first"),
+        _upload_file("copy_of_a.pdf", b"%PDF-first"),
+        _upload_file("template.pdf", b"%PDF-template"),
+    ]
+    known_reference = f"{BUCKET_NAME}/blobs/{_sha256(b'%PDF-template')}"
+
+    with patch("Assignments.main.upload_fileobj", return_value=True) as mock_upload, \
+         patch("Assignments.main.get_known_blobs", AsyncMock(return_value={_sha256(b"%PDF-template"): known_reference})):
+        attachments = await upload_attachments(s3_client, files)
+
+    mock_upload.assert_called_once()
+    assert mock_upload.call_args.kwargs["object_name"] == f"blobs/{_sha256(b'%PDF-first')}"
+    assert [a["FileName"] for a in attachments] == ["a.pdf", "copy_of_a.pdf", "template.pdf"]
+    assert attachments[0] == {
+        "FileName": "a.pdf",
+        "FileType": "PDF",
+        "FileReference": f"{BUCKET_NAME}/blobs/{_sha256(b'%PDF-first')}",
+        "ContentHash": _sha256(b"%PDF-first"),
+        "Size": 10
+    }
+    assert attachments[1]["FileReference"] == attachments[0]["FileReference"]
+    assert attachments[2]["FileReference"] == known_reference
+
+
+async def test_upload_attachments_keeps_shared_blobs_on_failure():
+    """Test that a failed upload does not delete the content-addressed files, shared with other submissions."""
+    s3_client = MagicMock()
+    files = [_upload_file("ok.pdf", b"%PDF-ok"), _upload_file("broken.pdf", b"%PDF-broken")]
+
+    def upload(client, file_obj, bucket, object_name):
+        return object_name != f"blobs/{_sha256(b'%PDF-broken')}"
+
+    with patch("Assignments.main.upload_fileobj", side_effect=upload), \
+         patch("Assignments.main.get_known_blobs", AsyncMock(return_value={})):
+        with pytest.raises(HTTPException) as exc_info:
+            await upload_attachments(s3_client, files)
+
+    assert exc_info.value.status_code == 500
+    s3_client.delete_object.assert_not_called()
+
+
+async def test_verify_uploaded_attachments():
+    """Test that directly uploaded files are referenced only if they exist with an accepted type."""
+    s3_client = MagicMock()
+    metadata = {
+        "assignment1/student1/report.pdf": {"ContentType": "application/pdf", "ContentLength": 1024, "ETag": '"v1"'},
+        "assignment1/student1/script.sh": {"ContentType": "application/x-sh", "ContentLength": 1024, "ETag": '"v1"'},
+    }
+
+    s3_client.get_object.side_effect = lambda **kwargs: {"Body": BytesIO(b"%PDF-1.4 report")}
+
+    with patch("Assignments.main.head_file", side_effect=lambda client, bucket, key: metadata.get(key)):
+        attachments = await verify_uploaded_attachments(s3_client, ["report.pdf"], "assignment1", "student1")
+        submitted_key = s3_client.copy_object.call_args.kwargs["Key"]
+        assert attachments == [{
+            "FileName": "report.pdf",
+            "FileType": "PDF",
+            "FileReference": f"{BUCKET_NAME}/{submitted_key}"
+        }]
+        assert submitted_key.startswith("assignment1/student1/submitted/")
+        assert submitted_key.endswith("/report.pdf")
+
+        for file_name in ["missing.pdf", "script.sh"]:
+            with pytest.raises(HTTPException) as exc_info:
+                await verify_uploaded_attachments(s3_client, [file_name], "assignment1", "student1")
+            assert exc_info.value.status_code == 400
+
+
+async def test_verify_uploaded_attachments_copies_the_checked_version():
+    """Test that only the checked version of an uploaded file is copied, to a key that is never reused."""
+    s3_client = MagicMock()
+    s3_client.get_object.side_effect = lambda **kwargs: {"Body": BytesIO(b"%PDF-1.4 report")}
+    metadata = {"ContentType": "application/pdf", "ContentLength": 1024, "ETag": '"v1"'}
+
+    with patch("Assignments.main.head_file", return_value=metadata):
+        first = await verify_uploaded_attachments(s3_client, ["report.pdf"], "assignment1", "student1")
+        second = await verify_uploaded_attachments(s3_client, ["report.pdf"], "assignment1", "student1")
+
+    assert first[0]["FileReference"] != second[0]["FileReference"]
+    assert s3_client.get_object.call_args.kwargs["IfMatch"] == '"v1"'
+    copy_params = s3_client.copy_object.call_args.kwargs
+    assert copy_params["CopySource"] == {"Bucket": BUCKET_NAME, "Key": "assignment1/student1/report.pdf"}
+    assert copy_params["CopySourceIfMatch"] == '"v1"'
+
+    # the file was overwritten after the check
+    s3_client.copy_object.side_effect = ClientError({"Error": {"Code": "PreconditionFailed"}}, "CopyObject")
+    with patch("Assignments.main.head_file", return_value=metadata):
+        with pytest.raises(HTTPException) as exc_info:
+            await verify_uploaded_attachments(s3_client, ["report.pdf"], "assignment1", "student1")
+    assert exc_info.value.status_code == 409
+
+
+async def test_verify_uploaded_attachments_sniffs_declared_type():
+    """Test that a directly uploaded file whose first bytes do not match its declared type is rejected."""
+    s3_client = MagicMock()
+    s3_client.get_object.return_value = {"Body": BytesIO(b"MZ\x90\x00\x03\x00")}
+    metadata = {"ContentType": "application/pdf", "ContentLength": 1024, "ETag": '"v1"'}
+
+    with patch("Assignments.main.head_file", return_value=metadata):
+        with pytest.raises(HTTPException) as exc_info:
+            await verify_uploaded_attachments(s3_client, ["report.pdf"], "assignment1", "student1")
+
+    assert exc_info.value.status_code == 415
+    assert s3_client.get_object.call_args.kwargs["Range"] == "bytes=0-65535"
+
+
+async def test_verify_uploaded_attachments_rejects_paths_and_duplicates():
+    """Test that uploaded file names cannot leave the student's prefix and are not given twice."""
+    s3_client = MagicMock()
+
+    with patch("Assignments.main.head_file") as mock_head:
+        for file_names in [["../student2/report.pdf"], ["dir\\report.pdf"], [".."], ["report.pdf", "report.pdf"]]:
+            with pytest.raises(HTTPException) as exc_info:
+                await verify_uploaded_attachments(s3_client, file_names, "assignment1", "student1")
+            assert exc_info.value.status_code == 400
+
+    mock_head.assert_not_called()
+
+
+def test_presigned_post_is_limited_to_type_and_size():
+    """Test that the presigned POST policy restricts the key, content type and size."""
+    presigned_post = create_presigned_post(
+        get_s3_presign_client(), BUCKET_NAME, "assignment1/student1/report.pdf", "application/pdf", 1024, 60
+    )
+
+    assert presigned_post["fields"]["key"] == "assignment1/student1/report.pdf"
+    assert presigned_post["fields"]["Content-Type"] == "application/pdf"
+    policy = json.loads(base64.b64decode(presigned_post["fields"]["policy"]))
+    assert ["content-length-range", 1, 1024] in policy["conditions"]
+
+
+def test_upload_session_summary_lists_missing_parts():
+    """Test that a resumed upload only has to send the parts not recorded in the session."""
+    session = {
+        "id": "session1",
+        "FileName": "dataset.txt",
+        "Size": 25 * 1024 * 1024,
+        "PartSize": 8 * 1024 * 1024,
+        "Parts": [
+            {"PartNumber": 1, "ETag": '"etag1"', "Size": 8 * 1024 * 1024},
+            {"PartNumber": 3, "ETag": '"etag3"', "Size": 8 * 1024 * 1024},
+        ],
+        "Status": "in_progress"
+    }
+
+    summary = upload_session_summary(session)
+
+    assert summary["partCount"] == 4
+    assert summary["uploadedParts"] == [1, 3]
+    assert summary["missingParts"] == [2, 4]
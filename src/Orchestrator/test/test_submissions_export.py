@@ -0,0 +1,92 @@
+"""
+Unit tests for the streaming ZIP export of the submissions of an assignment.
+"""
+import asyncio
+import zipfile
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from Assignments.main import archive_entry_name, stream_submissions_archive
+
+
+async def test_stream_submissions_archive():
+    """Test that the archive contains the text contents and the attachments, and lists the missing files."""
+    contents = {"a1/s1/report.pdf": b"%PDF-1.4 report", "a1/s2/photo.jpg": b"\xff\xd8\xff photo"}
+
+    def get_object(Bucket, Key):
+        if Key not in contents:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": StreamingBody(BytesIO(contents[Key]), len(contents[Key])), "ContentLength": len(contents[Key])}
+
+    s3_client = MagicMock()
+    s3_client.get_object.side_effect = get_object
+    submissions = [
+        {"StudentID": "s1", "TextContent": "first", "Attachments": [
+            {"FileName": "report.pdf", "FileReference": "assignment-submissions/a1/s1/report.pdf"},
+            {"FileName": "lost.txt", "FileReference": "assignment-submissions/a1/s1/lost.txt"},
+        ]},
+        {"StudentID": "s2", "TextContent": "second", "Attachments": [
+            {"FileName": "photo.jpg", "FileReference": "assignment-submissions/a1/s2/photo.jpg"},
+        ]},
+    ]
+
+    with patch("Assignments.main.get_s3_client", return_value=s3_client):
+        data = b"".join([chunk async for chunk in stream_submissions_archive(submissions)])
+
+    with zipfile.ZipFile(BytesIO(data)) as archive:
+        assert archive.read("s1/submission.txt") == b"first"
+        assert archive.read("s2/submission.txt") == b"second"
+        assert archive.read("s1/report.pdf") == contents["a1/s1/report.pdf"]
+        assert archive.read("s2/photo.jpg") == contents["a1/s2/photo.jpg"]
+        assert b"s1/lost.txt" in archive.read("export_errors.txt")
+        assert archive.testzip() is None
+
+
+def test_archive_entry_name_is_plain_and_unique():
+    """Test that client supplied names cannot leave their folder and do not overwrite each other."""
+    used_names = {"submission.txt"}
+    assert archive_entry_name("../../x.pdf", used_names) == "x.pdf"
+    assert archive_entry_name("/etc/x.pdf", used_names) == "x (2).pdf"
+    assert archive_entry_name("..\\..\\x.pdf", used_names) == "x (3).pdf"
+    assert archive_entry_name("..", used_names) == "attachment"
+    assert archive_entry_name("submission.txt", used_names) == "submission (2).txt"
+
+
+async def test_stream_submissions_archive_closes_prefetched_bodies():
+    """Test that the attachments requested ahead are closed when the client goes away."""
+    streams = []
+
+    def get_object(Bucket, Key):
+        stream = BytesIO(b"content")
+        streams.append(stream)
+        return {"Body": StreamingBody(stream, 7), "ContentLength": 7}
+
+    s3_client = MagicMock()
+    s3_client.get_object.side_effect = get_object
+    submissions = [{"StudentID": "s1", "TextContent": "first", "Attachments": [
+        {"FileName": f"{i}.txt", "FileReference": f"assignment-submissions/a1/s1/{i}.txt"} for i in range(4)
+    ]}]
+
+    with patch("Assignments.main.get_s3_client", return_value=s3_client), \
+         patch("Assignments.main.EXPORT_S3_CONCURRENCY", 2):
+        export = stream_submissions_archive(submissions)
+        async for chunk in export:
+            if streams:
+                break
+        await export.aclose()
+        for _ in range(100):
+            if len(streams) == 3 and all(stream.closed for stream in streams):
+                break
+            await asyncio.sleep(0.01)
+
+    assert len(streams) == 3
+    assert all(stream.closed for stream in streams)
@@ -0,0 +1,80 @@
+"""
+Unit tests for the revalidation of the responses of the services.
+"""
+import asyncio
+import httpx
+
+# add os path to include the src directory
+import sys
+sys.path.append('/app/src')
+
+from JsonCodec import MSGPACK_MEDIA_TYPE, packb, unpackb
+from UpstreamCache import RevalidatingTransport, ServiceResponse, UpstreamCache, service_body
+
+
+def test_unchanged_response_is_revalidated():
+    """Test that a GET repeated with an unchanged ETag gets a 304 from the service and the cached body."""
+    requests = []
+
+    def handler(request: httpx.Request):
+        requests.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, headers={"ETag": '"v1"'}, json={"assignment": {"id": "assignment1"}})
+
+    async def fetch_twice():
+        cache = UpstreamCache()
+        responses = []
+        for _ in range(2):
+            transport = RevalidatingTransport(cache, httpx.MockTransport(handler))
+            async with httpx.AsyncClient(transport=transport) as client:
+                responses.append(await client.get("http://assignments/assignments/assignment1"))
+        return responses, cache
+
+    (first, second), cache = asyncio.run(fetch_twice())
+
+    assert "if-none-match" not in requests[0].headers
+    assert requests[1].headers["if-none-match"] == '"v1"'
+    assert second.status_code == 200
+    assert second.json() == first.json() == {"assignment": {"id": "assignment1"}}
+    assert cache.stats()["hits"] == 1
+
+
+def test_service_responses_are_parsed_with_orjson():
+    """Test that uncached responses, including streamed and non-GET ones, are wrapped to be parsed with orjson."""
+    def handler(request: httpx.Request):
+        return httpx.Response(201, json={"message": "Assignment created", "ids": ["a", "b"]})
+
+    async def post():
+        transport = RevalidatingTransport(UpstreamCache(), httpx.MockTransport(handler))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.post("http://assignments/assignments/", json={"title": "Essay"})
+
+    response = asyncio.run(post())
+
+    assert isinstance(response, ServiceResponse)
+    assert response.status_code == 201
+    assert response.json() == {"message": "Assignment created", "ids": ["a", "b"]}
+
+
+def test_msgpack_bodies_are_exchanged_with_the_services():
+    """Test that request bodies are sent as MessagePack and MessagePack responses are decoded by json()."""
+    received = []
+
+    def handler(request: httpx.Request):
+        received.append(request)
+        pairings = unpackb(request.content)["Pairings"]
+        return httpx.Response(200, headers={"Content-Type": MSGPACK_MEDIA_TYPE}, content=packb({"count": len(pairings)}))
+
+    async def post():
+        transport = RevalidatingTransport(UpstreamCache(), httpx.MockTransport(handler))
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.post(
+                "http://processing/api/v1/processing/calculate_statistics/",
+                **service_body({"Pairings": [{"ReviewerStudentID": "student-1"}]})
+            )
+
+    response = asyncio.run(post())
+
+    assert received[0].headers["content-type"] == MSGPACK_MEDIA_TYPE
+    assert response.json() == {"count": 1}
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse
+from json_codec import JSONResponse, MessagePackRoute
 from typing import List
 from pydantic import BaseModel
 from db_config import get_db, ObjectId
+from trusted_serialization import TrustedSerializer
 from . import pyd_models
 
 review_ass_router = APIRouter(
@@ -11,9 +12,44 @@ review_ass_router = APIRouter(
     responses={
         404: {"model": pyd_models.ErrorResponse, "description": "Not found"},
         500: {"model": pyd_models.ErrorResponse, "description": "Internal server error"}
-    }
+    },
+    route_class=MessagePackRoute
 )
 
+# the stored peer reviews and rubrics were validated when written, they are read back without validating them again
+PEER_REVIEW_SERIALIZER = TrustedSerializer(
+    pyd_models.PeerReviewAssignmentDB,
+    nested={"PeerReviewPairings": TrustedSerializer(pyd_models.PeerReviewPairing, nested={"ReviewResults": TrustedSerializer(pyd_models.ReviewResult)})}
+)
+RUBRIC_SERIALIZER = TrustedSerializer(pyd_models.RubricDB)
+
+def serialize_peer_review(peer_review: dict) -> dict:
+    """
+    Return a stored peer review assignment as its PeerReviewAssignmentDB would be dumped, with its status.
+    """
+    return PEER_REVIEW_SERIALIZER.dump(peer_review, Status=pyd_models.review_status(peer_review["ReviewDeadline"]))
+
+def peer_reviews_with_rubrics(db, peer_reviews: list) -> list:
+    """
+    Serialize the peer review assignments with their rubric, read with a single query.
+    """
+    rubric_ids = list({ObjectId(pr["RubricID"]) for pr in peer_reviews})
+    rubrics = {
+        str(rubric["_id"]): RUBRIC_SERIALIZER.dump(rubric)
+        for rubric in db["rubrics"].find({"_id": {"$in": rubric_ids}})
+    } if rubric_ids else {}
+    resp_content = []
+    for pr in peer_reviews:
+        if pr["RubricID"] not in rubrics:
+            raise HTTPException(
+                detail="Rubric not found",
+                status_code=404
+            )
+        pr_data = serialize_peer_review(pr)
+        pr_data["Rubric"] = rubrics[pr["RubricID"]]
+        resp_content.append(pr_data)
+    return resp_content
+
 @review_ass_router.get("/", response_model=List[pyd_models.GetPeerReviewAssignmentResponse])
 def get_all_peer_reviews():
     """
@@ -21,15 +57,9 @@ def get_all_peer_reviews():
     """
     db = get_db()
     pr_collection = db["peer_review_assignments"]
-    peer_reviews = list(pr_collection.find())
-    resp_content = []
-    for pr in peer_reviews:
-        rubric_data = pyd_models.RubricDB(**db["rubrics"].find_one({"_id": ObjectId(pr["RubricID"])})).model_dump(mode="json")
-        pr_data = pyd_models.PeerReviewAssignmentDB(**pr).model_dump(mode="json")
-        pr_data["Rubric"] = rubric_data
-        resp_content.append(pyd_models.GetPeerReviewAssignmentResponse(_id=pr_data["id"], **pr_data).model_dump(mode="json"))
+    peer_reviews = list(pr_collection.find({}, PEER_REVIEW_SERIALIZER.projection))
     return JSONResponse(
-        content=resp_content,
+        content=peer_reviews_with_rubrics(db, peer_reviews),
         status_code=200
     )
 
@@ -40,15 +70,9 @@ def get_peer_reviews_batch(assignment_ids: List[str]):
     """
     db = get_db()
     pr_collection = db["peer_review_assignments"]
-    peer_reviews = list(pr_collection.find({"AssignmentID": {"$in": assignment_ids}}))
-    resp_content = []
-    for pr in peer_reviews:
-        rubric_data = pyd_models.RubricDB(**db["rubrics"].find_one({"_id": ObjectId(pr["RubricID"])})).model_dump(mode="json")
-        pr_data = pyd_models.PeerReviewAssignmentDB(**pr).model_dump(mode="json")
-        pr_data["Rubric"] = rubric_data
-        resp_content.append(pyd_models.GetPeerReviewAssignmentResponse(_id=pr_data["id"], **pr_data).model_dump(mode="json"))
+    peer_reviews = list(pr_collection.find({"AssignmentID": {"$in": assignment_ids}}, PEER_REVIEW_SERIALIZER.projection))
     return JSONResponse(
-        content=resp_content,
+        content=peer_reviews_with_rubrics(db, peer_reviews),
         status_code=200
     )
     
@@ -66,7 +90,7 @@ def get_assignment_peer_review(assignment_id: str):
     """
     db = get_db()
     pr_collection = db["peer_review_assignments"]
-    peer_review = pr_collection.find_one({"AssignmentID": assignment_id})
+    peer_review = pr_collection.find_one({"AssignmentID": assignment_id}, PEER_REVIEW_SERIALIZER.projection)
     if not peer_review:
         raise HTTPException(
             detail="Peer Review Assignment not found",
@@ -80,8 +104,8 @@ def get_assignment_peer_review(assignment_id: str):
         )
     return JSONResponse(
         content={
-            "peer_review": pyd_models.PeerReviewAssignmentDB(**peer_review).model_dump(mode="json"),
-            "rubric": pyd_models.RubricDB(**rubric).model_dump(mode="json")
+            "peer_review": serialize_peer_review(peer_review),
+            "rubric": RUBRIC_SERIALIZER.dump(rubric)
         },
         status_code=200
     )
@@ -44,6 +44,15 @@ class PeerReviewAssignmentBase(BaseModel):
     ReviewerAssignmentMode: str  # Enum: Automatic, Manual
     PeerReviewPairings: List[PeerReviewPairing]
 
+def review_status(deadline: Union[datetime, str]) -> str:
+    """
+    Return the status of a peer review assignment with the given review deadline.
+    """
+    if isinstance(deadline, str):
+        deadline = datetime.fromisoformat(deadline)
+    now = datetime.now(deadline.tzinfo) if deadline.tzinfo else datetime.now()
+    return "Peer Review Started" if now < deadline else "Peer Review Closed"
+
 class PeerReviewAssignment(PeerReviewAssignmentBase):
     Status: str  
     
@@ -51,13 +60,7 @@ class PeerReviewAssignment(PeerReviewAssignmentBase):
     def set_status(cls, values):
         deadline = values.get('ReviewDeadline')
         if deadline:
-            if isinstance(deadline, str):
-                deadline = datetime.fromisoformat(deadline)
-            now = datetime.now(deadline.tzinfo) if deadline.tzinfo else datetime.now()
-            if now < deadline:
-                values['Status'] = "Peer Review Started"
-            else:
-                values['Status'] = "Peer Review Closed"
+            values['Status'] = review_status(deadline)
         return values
 
 class PeerReviewAssignmentDB(PeerReviewAssignment):
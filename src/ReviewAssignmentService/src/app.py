@@ -9,14 +9,22 @@ except Exception as e:
 import db_config
 
 from fastapi import FastAPI
+from json_codec import JSONResponse, MessagePackMiddleware
 from fastapi.middleware.cors import CORSMiddleware
+from conditional_get import ConditionalGetMiddleware
 from ReviewAssignment import review_ass_router
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=JSONResponse)
 
 app.include_router(review_ass_router)
 
+# ETags and 304 responses for the read endpoints
+app.add_middleware(ConditionalGetMiddleware)
+
+# MessagePack for the internal calls of the orchestrator
+app.add_middleware(MessagePackMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  
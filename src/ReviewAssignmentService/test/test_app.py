@@ -87,7 +87,7 @@ def test_get_all_peer_reviews_success(mock_get_db):
     }[key]
     
     mock_pr_collection.find.return_value = [test_peer_review_data]
-    mock_rubric_collection.find_one.return_value = {"_id": "507f1f77bcf86cd799439012", **test_rubric}
+    mock_rubric_collection.find.return_value = [{"_id": "507f1f77bcf86cd799439012", **test_rubric}]
     
     response = client.get("/api/v1/review-assignment/")
     assert response.status_code == 200
@@ -125,7 +125,7 @@ def test_get_peer_reviews_batch_success(mock_get_db):
     }[key]
     
     mock_pr_collection.find.return_value = [test_peer_review_data]
-    mock_rubric_collection.find_one.return_value = {"_id": "507f1f77bcf86cd799439012", **test_rubric}
+    mock_rubric_collection.find.return_value = [{"_id": "507f1f77bcf86cd799439012", **test_rubric}]
     
     assignment_ids = ["assignment-123", "assignment-456"]
     response = client.post("/api/v1/review-assignment/batch", json=assignment_ids)
@@ -572,4 +572,34 @@ def test_update_peer_review_update_fails(mock_get_db):
     assert response.status_code == 500
     data = response.json()
     assert "detail" in data
-    assert "failed to update" in data["detail"].lower()
\ No newline at end of file
+    assert "failed to update" in data["detail"].lower()
+
+#UT-SYS-020
+@patch('ReviewAssignment.main.get_db')
+def test_get_all_peer_reviews_reads_rubrics_once(mock_get_db):
+    """Test that the rubrics of the listed peer reviews are read with one query and serialized as validated."""
+    from ReviewAssignment import pyd_models
+    mock_db = MagicMock()
+    mock_get_db.return_value = mock_db
+
+    mock_pr_collection = MagicMock()
+    mock_rubric_collection = MagicMock()
+    mock_db.__getitem__.side_effect = lambda key: {
+        "peer_review_assignments": mock_pr_collection,
+        "rubrics": mock_rubric_collection
+    }[key]
+
+    other_peer_review = {**test_peer_review_data, "_id": "507f1f77bcf86cd799439013", "AssignmentID": "assignment-456"}
+    mock_pr_collection.find.return_value = [test_peer_review_data, other_peer_review]
+    mock_rubric_collection.find.return_value = [{"_id": "507f1f77bcf86cd799439012", **test_rubric}]
+
+    response = client.get("/api/v1/review-assignment/")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 2
+    assert mock_rubric_collection.find.call_count == 1
+    mock_rubric_collection.find_one.assert_not_called()
+
+    validated = pyd_models.PeerReviewAssignmentDB(**test_peer_review_data).model_dump(mode="json")
+    validated["Rubric"] = pyd_models.RubricDB(_id="507f1f77bcf86cd799439012", **test_rubric).model_dump(mode="json")
+    assert data[0] == validated
@@ -1,20 +1,25 @@
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from json_codec import JSONResponse, MessagePackRoute
 from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional
 from datetime import datetime
+from os import getenv
 from db_config import get_db, ObjectId
 
 
 processing_router = APIRouter(
     prefix="/api/v1/processing",
     tags=["Review Processing Service"],
+    route_class=MessagePackRoute
 )
 
 by_assignment_collection_name = "by_assignment_collection"
 by_submission_collection_name = "by_submission_collection"
 by_review_collection_name = "by_review_collection"
 
+# IDs accepted by a batch lookup
+MAX_BATCH_IDS = int(getenv("MAX_BATCH_IDS", "500"))
+
 
 # Model for ReviewResults
 class PerCriterionScore(BaseModel):
@@ -35,6 +40,9 @@ class PeerReviewPairing(BaseModel):
 class StartCalcRequest(BaseModel):
     Pairings: List[PeerReviewPairing]
 
+class SubmissionBatchRequest(BaseModel):
+    SubmissionIDs: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_IDS, description="IDs of the submissions to retrieve the results of")
+
 
 @processing_router.post("/calculate_statistics/")
 async def calculate_statistics(
@@ -199,6 +207,35 @@ async def get_aggregated_by_submission(submission_id: str):
     del result['_id']
     return JSONResponse(content=result, status_code=200)
 
+@processing_router.post("/aggregated-by-submission/batch")
+async def get_aggregated_by_submission_batch(batch: SubmissionBatchRequest):
+    """
+    Retrieve the results of several submissions with a single query, keyed by submission ID,
+    listing the submissions without results.
+    """
+    db = get_db()
+    submission_ids = list(dict.fromkeys(batch.SubmissionIDs))
+    results = {}
+    for result in db[by_submission_collection_name].find({"SubmissionID": {"$in": submission_ids}}, {"_id": 0}):
+        results[result["SubmissionID"]] = result
+    return JSONResponse(
+        content={
+            "Results": results,
+            "Missing": [submission_id for submission_id in submission_ids if submission_id not in results],
+        },
+        status_code=200
+    )
+
+@processing_router.post("/aggregated-by-review/batch")
+async def get_aggregated_by_review_batch(batch: SubmissionBatchRequest):
+    """
+    Retrieve the results of the reviews of several submissions with a single query.
+    """
+    db = get_db()
+    submission_ids = list(dict.fromkeys(batch.SubmissionIDs))
+    results = list(db[by_review_collection_name].find({"RevieweeSubmissionID": {"$in": submission_ids}}, {"_id": 0}))
+    return JSONResponse(content={"Results": results}, status_code=200)
+
 @processing_router.get("/aggregated-by-review/{submission_id}")
 async def get_aggregated_by_review(submission_id: str, reviewer_id: Optional[str] = None):
     db = get_db()
@@ -6,11 +6,19 @@ except Exception as e:
     print(f"Error loading .env file: {e}")
 
 from fastapi import FastAPI
+from json_codec import JSONResponse, MessagePackMiddleware
 from fastapi.middleware.cors import CORSMiddleware
+from conditional_get import ConditionalGetMiddleware
 from Processing import processing_router
 
 
-app = FastAPI()
+app = FastAPI(default_response_class=JSONResponse)
+
+# ETags and 304 responses for the read endpoints
+app.add_middleware(ConditionalGetMiddleware)
+
+# MessagePack for the internal calls of the orchestrator
+app.add_middleware(MessagePackMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
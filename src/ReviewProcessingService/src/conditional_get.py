@@ -0,0 +1,92 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def http_date(value: datetime) -> str:
+    """
+    Format a datetime for a Last-Modified header. Naive datetimes are in the local time of the service.
+    """
+    return format_datetime(value.astimezone(timezone.utc).replace(microsecond=0), usegmt=True)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison, as required for If-None-Match
+    candidates = (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+    return etag in candidates
+
+
+def _not_modified_since(if_modified_since: str, last_modified: str) -> bool:
+    try:
+        return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+
+
+class ConditionalGetMiddleware:
+    """
+    Give the successful GET responses a strong ETag, the hash of their body, and answer 304 Not Modified
+    when the client already has the same body (If-None-Match) or a copy newer than its Last-Modified
+    header (If-Modified-Since). Streamed responses are sent as they are.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        start_message = None
+
+        async def send_with_validators(message: Message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # held until the body is known
+                start_message = message
+                return
+            if start_message is None:
+                await send(message)
+                return
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            if start["status"] != 200 or message.get("more_body", False):
+                await send(start)
+                await send(message)
+                return
+
+            headers = MutableHeaders(scope=start)
+            if "etag" not in headers:
+                headers["ETag"] = f'"{hashlib.sha256(body).hexdigest()}"'
+            if "cache-control" not in headers:
+                # cached copies are revalidated on every use
+                headers["Cache-Control"] = "private, no-cache"
+
+            if_none_match = request_headers.get("if-none-match")
+            if if_none_match is not None:
+                not_modified = _etag_matches(if_none_match, headers["etag"])
+            else:
+                if_modified_since = request_headers.get("if-modified-since")
+                not_modified = (
+                    if_modified_since is not None and "last-modified" in headers
+                    and _not_modified_since(if_modified_since, headers["last-modified"])
+                )
+            if not not_modified:
+                await send(start)
+                await send(message)
+                return
+
+            not_modified_headers = [
+                (name, value) for name, value in start["headers"]
+                if name.lower() not in (b"content-length", b"content-type", b"content-encoding")
+            ]
+            await send({"type": "http.response.start", "status": 304, "headers": not_modified_headers})
+            await send({"type": "http.response.body", "body": b""})
+
+        await self.app(scope, receive, send_with_validators)
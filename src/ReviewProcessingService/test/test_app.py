@@ -346,3 +346,40 @@ def test_calculate_statistics_missing_assignment_id():
     )
     
     assert response.status_code == 422
+
+#UT-SYS-016
+@patch('Processing.main.get_db')
+def test_get_aggregated_by_submission_batch(mock_get_db):
+    """Test that the results of several submissions are returned keyed by submission, listing the missing ones."""
+    mock_db = MagicMock()
+    mock_get_db.return_value = mock_db
+    mock_db.__getitem__.return_value.find.return_value = [sample_submission_result.copy()]
+
+    response = client.post(
+        "/api/v1/processing/aggregated-by-submission/batch",
+        json={"SubmissionIDs": ["subm1", "subm2"]}
+    )
+
+    assert response.status_code == 200
+    response_data = response.json()
+    assert response_data["Results"]["subm1"]["OverallAverageScore"] == 7.5
+    assert response_data["Missing"] == ["subm2"]
+
+#UT-SYS-017
+@patch('Processing.main.get_db')
+def test_get_aggregated_by_review_batch(mock_get_db):
+    """Test that the reviews of several submissions are read with a single query."""
+    mock_db = MagicMock()
+    mock_get_db.return_value = mock_db
+    review = {"ReviewerStudentID": "student2", "RevieweeSubmissionID": "subm1", "OverallAverageScore": 7.5}
+    mock_db.__getitem__.return_value.find.return_value = [review]
+
+    response = client.post(
+        "/api/v1/processing/aggregated-by-review/batch",
+        json={"SubmissionIDs": ["subm1", "subm2", "subm1"]}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {"Results": [review]}
+    query = mock_db.__getitem__.return_value.find.call_args.args[0]
+    assert query == {"RevieweeSubmissionID": {"$in": ["subm1", "subm2"]}}